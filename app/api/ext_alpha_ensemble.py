@@ -1,8 +1,38 @@
 from chamelefx.log import get_logger
-from fastapi import APIRouter
+from fastapi import APIRouter, Body
+from typing import Dict, List, Optional
+from chamelefx.alpha import ensemble as ens
 
 router = APIRouter()
 
 @router.get('/alpha_ensemble/ping')
 async def ping():
     return {'ok': True, 'name': 'ext_alpha_ensemble'}
+
+@router.get('/alpha/ensemble/weights')
+def ensemble_weights():
+    e = ens.get()
+    return {'ok': True, 'weights': e.weights(), 'method': e.method, 'n': e.n, 'ts': e.ts}
+
+@router.post('/alpha/ensemble/update')
+def ensemble_update(signals: Dict[str, float] = Body(...), pnl: float = Body(...)):
+    try:
+        return ens.update(signals, pnl)
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+
+@router.post('/alpha/ensemble/combine')
+def ensemble_combine(signals: Dict[str, Dict[str, float]] = Body(..., embed=True), clamp: Optional[float] = Body(None, embed=True)):
+    """{symbol: {signal: value}} -> combined signal and confidence per symbol."""
+    e = ens.get()
+    syms: List[str] = list(signals)
+    M = e.matrix(signals)
+    comb, conf = e.combine(M), e.confidence(M, clamp)
+    return {'ok': True, 'symbols': syms, 'combined': comb.tolist(), 'confidence': conf.tolist(), 'weights': e.weights()}
+
+@router.post('/alpha/ensemble/reset')
+def ensemble_reset(weights: Optional[Dict[str, float]] = Body(None), method: Optional[str] = Body(None)):
+    try:
+        return ens.reset(weights, method)
+    except ValueError as e:
+        return {'ok': False, 'error': str(e)}
@@ -1,8 +1,10 @@
 
 from fastapi import APIRouter
 from pydantic import BaseModel
+from typing import List, Optional
 router = APIRouter(prefix="/alpha", tags=["alpha"])
 class FeatureReq(BaseModel): symbol: str
+class FeatureBatchReq(BaseModel): symbols: Optional[List[str]] = None
 try:
     from chamelefx.alpha import features as fx
 except Exception:
@@ -17,3 +19,11 @@ def compute_features(req: FeatureReq):
         res.setdefault("ok", True); res["symbol"] = symbol; return res
     except Exception as e:
         return {"ok": False, "symbol": symbol, "error": str(e), "raw": {}, "norm": {}}
+@router.post("/features/batch")
+def compute_features_batch(req: FeatureBatchReq):
+    """All symbols (default: config symbols.universe) in one columnar payload."""
+    try:
+        if fx and hasattr(fx,"compute_universe"): return fx.compute_universe(req.symbols)
+        return {"ok": True, "symbols": [], "features": [], "raw": {}, "norm": {}, "meta": {"src": "stub"}}
+    except Exception as e:
+        return {"ok": False, "error": str(e), "symbols": req.symbols or [], "raw": {}, "norm": {}}
@@ -25,7 +25,7 @@ def alpha_trade_live(
 ):
     # compute weight from signal
     try:
-        w = float(W().weight_from_signal(signal, method=method, clamp=clamp, params=params))
+        w = float(W().weight_from_signal(signal, method=method, clamp=clamp, params=params, symbol=symbol))
     except Exception:
         w = 0.0
     # place order
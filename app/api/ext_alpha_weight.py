@@ -1,12 +1,31 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
 from fastapi import APIRouter, Body
+from typing import List
+import numpy as np
+from chamelefx.alpha import weighting as W
 router = APIRouter()
 @router.post("/alpha/weight_from_signal")
-def weight_from_signal(symbol: str = Body("EURUSD"), weights: dict | None = Body(None), clamp: float = Body(0.35), params: dict | None = Body(None)):
-    # trivial sign-based weight as placeholder
-    w = 0.0
-    if weights and isinstance(weights, dict):
-        w = float(weights.get("signal", 0.0))
-    w = max(-clamp, min(clamp, w))
-    return {"ok": True, "symbol": symbol, "weight": w, "clamp": clamp, "src": "stub"}
+def weight_from_signal(symbol: str = Body("EURUSD"), weights: dict | None = Body(None), clamp: float = Body(0.35), params: dict | None = Body(None),
+                       signal: float | None = Body(None), method: str | None = Body(None)):
+    if signal is None and weights and isinstance(weights, dict):
+        signal = weights.get("signal", 0.0)
+    p = dict(params or {}); method = method or p.pop("method", None)
+    try:
+        m = W._params(method, p)[0]
+        vol, vol_src = W.resolve_vol(symbol, None, p) if m != "clamp" else (None, "none")
+        w = W.weight_from_signal(signal or 0.0, method=method, clamp=clamp, params=p, symbol=symbol, vol=vol)
+    except ValueError as e:
+        return {"ok": False, "symbol": symbol, "error": str(e)}
+    return {"ok": True, "symbol": symbol, "weight": w, "clamp": clamp, "method": m, "src": "weighting",
+            "vol": vol, "vol_src": vol_src, "vol_scaled": vol is not None}
+@router.post("/alpha/weights_from_signals")
+def weights_from_signals(signals: List[float] = Body(...), clamp: float = Body(0.35), params: dict | None = Body(None),
+                         method: str | None = Body(None), vol: List[float] | None = Body(None)):
+    p = dict(params or {}); method = method or p.pop("method", None)
+    try:
+        w = W.weights_from_signals(np.asarray(signals, dtype=float), method=method, clamp=clamp, params=p,
+                                   vol=None if vol is None else np.asarray(vol, dtype=float))
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "weights": w.tolist(), "n": int(w.size), "clamp": clamp, "method": W._params(method, p)[0]}
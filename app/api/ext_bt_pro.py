@@ -13,8 +13,14 @@ router = APIRouter()
 def btpro_wf_run(symbols: List[str] = Body(None, embed=True),
                  window: int = Body(None, embed=True),
                  step: int = Body(None, embed=True),
-                 test: int = Body(None, embed=True)):
-    return WF.run(symbols=symbols, window=window, step=step, test=test)
+                 test: int = Body(None, embed=True),
+                 workers: int = Body(None, embed=True),
+                 run_id: str = Body(None, embed=True)):
+    return WF.run(symbols=symbols, window=window, step=step, test=test, workers=workers, run_id=run_id)
+
+@router.get("/btpro/wf/progress")
+def btpro_wf_progress(run_id: str | None = None):
+    return WF.progress(run_id)
 
 @router.get("/btpro/wf/summary")
 def btpro_wf_summary():
@@ -81,9 +81,11 @@ def _perf_kpis() -> Dict[str, float]:
     return {"sharpe":0.0,"max_dd":0.0,"win_rate":0.0,"expectancy":0.0,"equity_last":0.0}
 
 def _alpha_health() -> Dict[str, Any]:
-    decay = _jload(TEL / "alpha_decay.json", {})
+    from chamelefx.alpha import decay as _decay
+    from chamelefx.performance import attribution as _attrib
+    decay = _decay._load()          # snapshot + journal tail
     drift = _jload(TEL / "alpha_drift.json", {})
-    attrib= _jload(TEL / "alpha_attribution.json", {})
+    attrib= _attrib._load()
     # decay: decide bucket by t-stat (example thresholds)
     tstat = None
     try:
@@ -116,6 +118,8 @@ def _alpha_health() -> Dict[str, Any]:
     top3, bottom3 = [], []
     try:
         items = attrib.get("signals", [])
+        if isinstance(items, dict):
+            items = [{"name": k, "pnl": v.get("pnl_sum", 0.0)} for k, v in items.items()]
         # items like [{"name":"sigA","pnl": 123.4}, ...]
         items = sorted(items, key=lambda x: float(x.get("pnl",0.0)))
         bottom3 = [x.get("name","?") for x in items[:3]]
@@ -1,8 +1,16 @@
 from chamelefx.log import get_logger
 from fastapi import APIRouter
+from chamelefx.utils import latency as _latency
 
 router = APIRouter()
 
 @router.get('/exec_latency/ping')
 async def ping():
     return {'ok': True, 'name': 'ext_exec_latency'}
+
+@router.get('/exec/latency')
+def exec_latency(stage: str | None = None, venue: str | None = None, symbol: str | None = None, by: str = "key"):
+    """p50/p90/p99/max (ms) of the hot-path histograms; by = key | stage | venue | symbol."""
+    if by not in ("key", "stage", "venue", "symbol"):
+        return {'ok': False, 'error': 'by must be key|stage|venue|symbol'}
+    return {'ok': True, 'by': by, 'rows': _latency.summary(stage, venue, symbol, by=by)}
@@ -1,8 +1,31 @@
 from chamelefx.log import get_logger
-from fastapi import APIRouter
+from fastapi import APIRouter, Body
+from typing import Optional
+from chamelefx.execution import scheduler as SCH
 
 router = APIRouter()
 
 @router.get('/exec_pov/ping')
 async def ping():
     return {'ok': True, 'name': 'ext_exec_pov'}
+
+@router.post('/exec/pov/start')
+def exec_pov_start(symbol: str = Body(..., embed=True),
+                   side: str = Body("buy", embed=True),
+                   qty: float = Body(..., embed=True),
+                   rate: Optional[float] = Body(None, embed=True),
+                   duration_sec: Optional[float] = Body(None, embed=True),
+                   interval_sec: float = Body(2.0, embed=True)):
+    """Participate at `rate` (capped by execution.router.pov_cap) of reported volume."""
+    return SCH.start("pov", symbol, side, qty, rate=rate, duration_sec=duration_sec, interval_sec=interval_sec)
+
+@router.post('/exec/pov/volume')
+def exec_pov_volume(symbol: str = Body(..., embed=True),
+                    volume: float = Body(..., embed=True),
+                    cumulative: bool = Body(False, embed=True)):
+    """Feed observed market volume for POV targets and participation caps."""
+    return SCH.report_volume(symbol, volume, cumulative=cumulative)
+
+@router.get('/exec/pov/cap')
+def exec_pov_cap():
+    return {"ok": True, "pov_cap": SCH._pov_cap_default()}
@@ -1,8 +1,45 @@
 from chamelefx.log import get_logger
-from fastapi import APIRouter
+from fastapi import APIRouter, Body, Query
+from typing import List, Optional
+from chamelefx.execution import scheduler as SCH
 
 router = APIRouter()
 
 @router.get('/exec_slicer/ping')
 async def ping():
     return {'ok': True, 'name': 'ext_exec_slicer'}
+
+@router.post('/exec/algo/start')
+def exec_algo_start(algo: str = Body("twap", embed=True),
+                    symbol: str = Body(..., embed=True),
+                    side: str = Body("buy", embed=True),
+                    qty: float = Body(..., embed=True),
+                    duration_sec: Optional[float] = Body(None, embed=True),
+                    interval_sec: float = Body(5.0, embed=True),
+                    rate: Optional[float] = Body(None, embed=True),
+                    pov_cap: Optional[float] = Body(None, embed=True),
+                    profile: Optional[List[float]] = Body(None, embed=True),
+                    start_at: Optional[float] = Body(None, embed=True)):
+    """Start a TWAP/VWAP/POV parent; children go out through orders_bridge."""
+    return SCH.start(algo, symbol, side, qty, duration_sec=duration_sec, interval_sec=interval_sec,
+                     rate=rate, pov_cap=pov_cap, profile=profile, start_at=start_at)
+
+@router.post('/exec/algo/cancel')
+def exec_algo_cancel(id: str = Body(..., embed=True)):
+    return SCH.cancel(id)
+
+@router.post('/exec/algo/amend')
+def exec_algo_amend(id: str = Body(..., embed=True),
+                    qty: Optional[float] = Body(None, embed=True),
+                    duration_sec: Optional[float] = Body(None, embed=True),
+                    rate: Optional[float] = Body(None, embed=True),
+                    interval_sec: Optional[float] = Body(None, embed=True)):
+    return SCH.amend(id, qty=qty, duration_sec=duration_sec, rate=rate, interval_sec=interval_sec)
+
+@router.get('/exec/algo/status')
+def exec_algo_status(id: str = Query(...)):
+    return SCH.status(id)
+
+@router.get('/exec/algo/list')
+def exec_algo_list(active_only: bool = Query(False)):
+    return SCH.parents(active_only=active_only)
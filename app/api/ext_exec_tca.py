@@ -1,8 +1,20 @@
 from chamelefx.log import get_logger
 from fastapi import APIRouter
+from chamelefx.execution import tca as _tca
 
 router = APIRouter()
 
 @router.get('/exec_tca/ping')
 async def ping():
     return {'ok': True, 'name': 'ext_exec_tca'}
+
+@router.get('/exec/tca')
+def exec_tca(symbol: str | None = None, venue: str | None = None, since: float | None = None,
+             until: float | None = None, by: str = "symbol,venue,hour,size", horizons: str | None = None):
+    """IS / arrival / VWAP / markout costs grouped by symbol, venue, hour and size (cached per fill high-water)."""
+    try:
+        hz = tuple(int(h) for h in horizons.split(",") if h.strip()) if horizons else _tca.HORIZONS
+    except ValueError:
+        return {'ok': False, 'error': 'horizons must be comma-separated seconds'}
+    groups = tuple(g.strip() for g in by.split(",") if g.strip())
+    return _tca.analyze(symbol=symbol, venue=venue, since=since, until=until, by=groups, horizons=hz)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+from chamelefx.utils.admin_gate import require_admin
+from fastapi import APIRouter, Depends
+from typing import Optional
+from chamelefx.utils import ttlcache
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/ops/cache/stats")
+def ops_cache_stats(name: Optional[str] = None):
+    out = ttlcache.stats_all()
+    if name:
+        out["caches"] = [c for c in out["caches"] if c["name"] == name]
+    return out
+
+@router.post("/ops/cache/clear")
+def ops_cache_clear(name: Optional[str] = None):
+    cleared = []
+    for n, c in ttlcache.registry().items():
+        if name is None or n == name:
+            c.clear(); cleared.append(n)
+    return {"ok": True, "cleared": sorted(cleared)}
@@ -3,6 +3,7 @@ from chamelefx.log import get_logger
 from fastapi import APIRouter, Body
 # The correct implementation uses the blotter adapter for integration
 from chamelefx.integrations import blotter_adapter as BA
+from chamelefx.integrations import trade_store as TS
 from pathlib import Path as _Path
 import json as _json
 _ORDERS_OPEN_PATH = (_Path(__file__).resolve().parents[3] / "chamelefx" / "runtime" / "orders_open.json")
@@ -28,9 +29,40 @@ def orders_open():
     return {"ok": True, "orders": BA.open_orders()}
 
 @router.get("/orders/recent")
-def orders_recent():
-    """Returns recent fills/executions."""
-    return {"ok": True, "fills": BA.recent_fills()}
+def orders_recent(n: int = 20, symbol: str | None = None):
+    """Returns recent fills/executions (newest first) from the trade store."""
+    return {"ok": True, "fills": TS.recent_fills(n=n, symbol=symbol)}
+
+@router.get("/orders/fills")
+def orders_fills(symbol: str | None = None, venue: str | None = None,
+                 since: float | None = None, until: float | None = None, limit: int = 1000):
+    """Fill history in [since, until) filtered by symbol/venue (indexed range query)."""
+    return {"ok": True, "fills": TS.fills(symbol=symbol, venue=venue, since=since, until=until, limit=limit)}
+
+@router.get("/orders/history")
+def orders_history(symbol: str | None = None, status: str | None = None,
+                   since: float | None = None, until: float | None = None, limit: int = 1000):
+    """Order echoes journaled by orders_bridge.place."""
+    return {"ok": True, "orders": TS.orders(symbol=symbol, status=status, since=since, until=until, limit=limit)}
+
+@router.get("/orders/mt5/health")
+def orders_mt5_health():
+    """Health of the persistent MT5 session (connection, reconnects, queue, latency)."""
+    return BA.health()
+
+@router.get("/orders/pipeline/stats")
+def orders_pipeline_stats():
+    """Per-stage latency of the order pipeline (gate/size/route/send/journal/ack)."""
+    from chamelefx.app.api import orders_bridge as OB
+    return OB.pipeline_stats()
+
+@router.post("/orders/basket")
+def orders_basket(legs: list = Body(..., embed=True),
+                  concurrency: int | None = Body(None, embed=True),
+                  meta: dict | None = Body(None, embed=True)):
+    """Multi-leg basket: one gate pass, vectorized sizing, concurrent dispatch. Per-leg results + timings."""
+    from chamelefx.app.api import orders_bridge as OB
+    return OB.place_basket(legs, concurrency=concurrency, meta=meta)
 
 @router.post("/orders/cancel")
 def orders_cancel(order_id: str = Body(..., embed=True)):
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
 from fastapi import APIRouter, Body
-from typing import Dict, Any
+from typing import Dict, Any, List
 from chamelefx.ops import guardrails as GR
 from chamelefx.ops import watchdog as WD
 
@@ -18,9 +18,7 @@ def risk_record_pnl(symbol: str = Body(..., embed=True),
 
 @router.get("/risk/state")
 def risk_state():
-    from chamelefx.ops.guardrails import _load_state as _ls  # type: ignore
-    s = _ls()
-    return {"ok": True, "state": s}
+    return {"ok": True, "state": GR.state()}
 
 @router.post("/risk/pretrade_gate")
 def risk_pretrade_gate(symbol: str = Body(..., embed=True),
@@ -28,6 +26,10 @@ def risk_pretrade_gate(symbol: str = Body(..., embed=True),
                        weight: float = Body(0.0, embed=True)):
     return GR.pretrade_gate({"symbol": symbol, "side": side, "weight": weight})
 
+@router.post("/risk/pretrade_gate/batch")
+def risk_pretrade_gate_batch(orders: List[Dict[str, Any]] = Body(..., embed=True)):
+    return GR.pretrade_gate_batch(orders)
+
 @router.post("/risk/reset_today")
 def risk_reset_today(symbol: str | None = Body(None, embed=True)):
     return WD.reset_today(symbol)
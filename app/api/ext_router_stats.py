@@ -1,10 +1,14 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
-from fastapi import APIRouter, Query
-from chamelefx.router import scorer
+from fastapi import APIRouter
+from chamelefx.router import venue_stats
 
 router = APIRouter()
 
 @router.get("/router/stats")
-def router_stats(symbol: str = Query("EURUSD")):
-    return scorer.compute(symbol)
+def router_stats(venue: str | None = None):
+    """Per-venue fill/reject/partial rates, latency EWMA + quantiles, slippage EWMA (in-memory)."""
+    if venue:
+        s = venue_stats.get(venue)
+        return {"ok": s is not None, "venue": venue.upper(), "stats": s}
+    return venue_stats.summary()
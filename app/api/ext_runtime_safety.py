@@ -13,6 +13,7 @@ _BUCKETS = {}  # path -> {tokens, last_ts}
 _RATE   = {     # per 2 seconds
   "/stats/summary_fast": 8,
   "/alpha/features/compute": 6,
+  "/alpha/features/batch": 6,
   "/alpha/weight_from_signal": 10,
 }
 _WINDOW = 2.0
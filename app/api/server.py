@@ -31,6 +31,9 @@ for mod in [
     "app.api.ext_portfolio_apply","app.api.ext_portfolio_opt","app.api.ext_perf",
     "app.api.ext_mt5_resilience","app.api.ext_replay_db","app.api.ext_diag_snapshot",
     "app.api.ext_ops_effective_config","app.api.ext_ops_weekly_report",
+    "app.api.ext_exec_slicer","app.api.ext_exec_pov","app.api.ext_exec_latency",
+    "app.api.ext_exec_tca","app.api.ext_ops_cache","app.api.ext_alpha_ensemble",
+    "app.api.ext_orders_blotter",
 ]:
     _try_include(mod)
 
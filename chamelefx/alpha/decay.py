@@ -1,37 +1,42 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
-import json, time, math, statistics
+import time, math, statistics
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+from chamelefx.utils.journal import Journal
+from chamelefx.utils.ttlcache import cached
 
 ROOT = Path(__file__).resolve().parents[2]
 DATA = ROOT / "data" / "telemetry"
 FILE = DATA / "alpha_decay.json"
 
-def _load() -> Dict[str, Any]:
-    try:
-        return json.loads(FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return {"signals": {}, "ts": time.time()}
+def _default() -> Dict[str, Any]:
+    return {"signals": {}, "ts": time.time()}
 
-def _save(x: Dict[str, Any]) -> None:
-    DATA.mkdir(parents=True, exist_ok=True)
-    tmp = FILE.with_suffix(".tmp")
-    tmp.write_text(json.dumps(x, indent=2), encoding="utf-8")
-    tmp.replace(FILE)
+def _roll(arr: List[float], x: float, cap: int) -> None:
+    arr.append(float(x))
+    if cap and len(arr) > cap:
+        del arr[:len(arr) - cap]
+
+def _apply(d: Dict[str, Any], ev: Dict[str, Any]) -> None:
+    s = d.setdefault("signals", {}).setdefault(ev["signal"], {"sig": [], "pnl": [], "samples": 0})
+    cap = int(ev.get("window", 250))
+    _roll(s.setdefault("sig", []), ev["value"], cap)
+    _roll(s.setdefault("pnl", []), ev["pnl"], cap)
+    s["samples"] = len(s["sig"])
+    d["ts"] = ev.get("ts", time.time())
 
-def _roll(arr: List[float], cap: int) -> List[float]:
-    return arr[-cap:] if cap and len(arr) > cap else arr
+_J = Journal(FILE, _apply, _default)
+
+def _load() -> Dict[str, Any]:
+    return _J.load()
 
 def record(signal_name: str, signal_value: float, pnl: float, window: int = 250) -> Dict[str, Any]:
-    d = _load()
-    s = d["signals"].setdefault(signal_name, {"sig": [], "pnl": [], "samples": 0})
-    s["sig"]  = _roll(s.get("sig",[])  + [float(signal_value)], window)
-    s["pnl"]  = _roll(s.get("pnl",[])  + [float(pnl)], window)
-    s["samples"] = len(s["sig"])
-    d["ts"] = time.time()
-    _save(d)
-    return {"ok": True, "signal": signal_name, "samples": s["samples"]}
+    _J.append({"signal": signal_name, "value": float(signal_value), "pnl": float(pnl),
+               "window": int(window), "ts": time.time()})
+    summary_all.cache_clear()
+    s = _load().get("signals", {}).get(signal_name, {})
+    return {"ok": True, "signal": signal_name, "samples": int(s.get("samples", 0))}
 
 def _safe_corr(a: List[float], b: List[float]) -> float:
     try:
@@ -68,6 +73,7 @@ def summary(signal_name: str, window: int = 250) -> Dict[str, Any]:
         "t_stat": tstat
     }
 
+@cached(ttl=2.0)
 def summary_all(window: int = 250) -> Dict[str, Any]:
     d = _load()
     out = {}
@@ -3,6 +3,7 @@ from chamelefx.log import get_logger
 import json, time, math
 from pathlib import Path
 from typing import Dict, Any, List
+from chamelefx.utils.ttlcache import cached
 
 ROOT = Path(__file__).resolve().parents[2]
 DATA = ROOT / "data" / "telemetry"
@@ -54,12 +55,14 @@ def record_distributions(model: str, live_scores: List[float], backtest_scores:
     m["ts"] = time.time()
     d["ts"] = time.time()
     _save(d)
+    summary_all.cache_clear()
     return {"ok": True, "model": model, "kl": m["kl"]}
 
 def summary(model: str) -> Dict[str, Any]:
     d = _load()
     return {"ok": True, "model": model, **d.get("models", {}).get(model, {})}
 
+@cached(ttl=2.0)
 def summary_all() -> Dict[str, Any]:
     d = _load()
     return {"ok": True, "models": d.get("models", {}), "ts": d.get("ts",0)}
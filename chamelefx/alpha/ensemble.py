@@ -1,7 +1,182 @@
+"""
+Online signal ensemble.
 
+``Ensemble`` keeps one weight per named signal in a NumPy vector and learns
+it from realized PnL, O(k) per step:
+
+  eg     exponentiated gradient on the simplex: w_i *= exp(eta * x_i * r), renormalized,
+         then mixed with a ``share`` of the uniform vector (fixed share) so a signal
+         that lost weight can recover when the regime turns; weights stay >= 0, sum to 1.
+         r is the PnL normalized to [-1, 1]: sign(pnl) * min(1, |pnl| / scale), with
+         scale = ``pnl_scale`` when configured, else a running mean of |pnl|, so the step
+         size does not depend on the account currency or position size
+  ridge  diagonal ridge / online least squares with forgetting:
+         a_i = f*a_i + x_i^2, b_i = f*b_i + x_i*pnl, w_i = b_i / (a_i + lam)
+
+``combine`` / ``confidence`` take a (symbols x signals) matrix and return one
+value per symbol in a single matrix operation. The process-wide ensemble
+(``get()``) is seeded from config ``alpha.ensemble.weights``, snapshotted to
+data/telemetry/ensemble.json (also at exit) and served from memory.
+"""
 from __future__ import annotations
+from chamelefx.log import get_logger
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+from pathlib import Path
+import atexit, json, math, threading, time
+
+import numpy as np
+
+from chamelefx.utils import config as _config
+
+ROOT = Path(__file__).resolve().parents[2]
+TEL  = ROOT / "data" / "telemetry"
+STATE = TEL / "ensemble.json"
+
+DEFAULT_WEIGHTS = {"trend": 0.35, "rsi": 0.25, "revert": 0.20, "carry": 0.20}
+METHODS = ("eg", "ridge")
+PERSIST_SEC = 10.0
+SCALE_ALPHA = 0.05      # running |pnl| scale for eg when pnl_scale is not set
+
+log = get_logger(__name__)
+
+Signals = Union[Mapping[str, float], Sequence[float], np.ndarray]
+
+
 class Ensemble:
-    def __init__(self, *args, **kwargs): pass
+    def __init__(self, names: Optional[Sequence[str]] = None, weights: Optional[Signals] = None,
+                 method: str = "eg", eta: float = 0.05, lam: float = 1.0, forget: float = 0.999,
+                 clip: float = 1.0, share: float = 0.01, pnl_scale: float = 0.0):
+        if isinstance(weights, Mapping) and names is None:
+            names = list(weights)
+        self.names: List[str] = [str(n) for n in (names or DEFAULT_WEIGHTS)]
+        self.index = {n: i for i, n in enumerate(self.names)}
+        k = len(self.names)
+        if method not in METHODS:
+            raise ValueError(f"unknown ensemble method: {method}")
+        self.method, self.eta, self.lam, self.forget, self.clip = method, float(eta), float(lam), float(forget), float(clip)
+        self.share = min(1.0, max(0.0, float(share)))
+        self.pnl_scale = max(0.0, float(pnl_scale or 0.0))
+        self.scale = 0.0              # eg: running mean |pnl| (used when pnl_scale is 0)
+        self.w = np.full(k, 1.0 / k) if k else np.zeros(0)
+        if weights is not None:
+            self.w = self.vector(weights, fill=0.0)
+        self.a = np.zeros(k)          # ridge: decayed sum x_i^2
+        self.b = np.zeros(k)          # ridge: decayed sum x_i * pnl
+        self.n = 0
+        self.ts = 0.0
+        self._lock = threading.Lock()
+
+    # -- shapes --
+    def vector(self, x: Signals, fill: float = 0.0) -> np.ndarray:
+        """Signals as a length-k vector in ``names`` order (dict keys not in the ensemble are ignored)."""
+        if isinstance(x, Mapping):
+            v = np.full(len(self.names), fill)
+            for name, val in x.items():
+                i = self.index.get(str(name))
+                if i is not None:
+                    v[i] = float(val)
+            return v
+        return np.asarray(x, dtype=np.float64).reshape(len(self.names))
+
+    def matrix(self, rows: Union[Mapping[str, Mapping[str, float]], np.ndarray]) -> np.ndarray:
+        """(symbols x k) matrix from {symbol: {signal: value}} (missing signals are 0)."""
+        if isinstance(rows, Mapping):
+            return np.vstack([self.vector(r) for r in rows.values()]) if rows else np.zeros((0, len(self.names)))
+        return np.asarray(rows, dtype=np.float64).reshape(-1, len(self.names))
+
+    # -- learning --
+    def update(self, signals: Signals, pnl: float) -> np.ndarray:
+        """One step from the signals that were live and the PnL they earned."""
+        x = np.nan_to_num(self.vector(signals))
+        r = float(pnl)
+        if not math.isfinite(r):
+            return self.w
+        with self._lock:
+            if self.method == "eg":
+                a = abs(r)
+                if not self.pnl_scale and a > 0:
+                    self.scale = a if self.scale <= 0 else (1.0 - SCALE_ALPHA) * self.scale + SCALE_ALPHA * a
+                scale = self.pnl_scale or self.scale
+                r = math.copysign(min(1.0, a / scale), r) if scale > 0 else 0.0
+                g = np.clip(self.eta * x * r, -30.0, 30.0)
+                w = self.w * np.exp(g)
+                s = w.sum()
+                w = w / s if s > 0 and np.isfinite(s) else np.full_like(w, 1.0 / max(1, w.size))
+                self.w = (1.0 - self.share) * w + self.share / max(1, w.size)
+            else:
+                f = self.forget
+                self.a = f * self.a + x * x
+                self.b = f * self.b + x * r
+                self.w = self.b / (self.a + self.lam)
+            self.n += 1
+            self.ts = time.time()
+            return self.w
+
+    def update_many(self, X: np.ndarray, pnl: Sequence[float]) -> np.ndarray:
+        """Sequential updates over the rows of X (T x k) with per-row PnL."""
+        X = self.matrix(X)
+        for x, r in zip(X, np.asarray(pnl, dtype=np.float64)):
+            self.update(x, r)
+        return self.w
+
+    # -- scoring --
+    def combine(self, X: Union[Signals, np.ndarray]) -> Union[float, np.ndarray]:
+        """Weighted signal, clipped to +/- clip: a float for one signal vector, an array for a matrix."""
+        one = isinstance(X, Mapping) or np.ndim(X) == 1
+        M = self.matrix(self.vector(X) if one else X)
+        out = np.clip(M @ self.w, -self.clip, self.clip)
+        return float(out[0]) if one else out
+
+    def confidence(self, X: Union[Signals, np.ndarray], clamp: Optional[float] = None) -> Union[float, np.ndarray]:
+        """
+        Per-symbol ``confidences`` for one vector or a matrix, over the ensemble's
+        signals: a dict is reindexed onto ``names`` first (missing signals count
+        as 0 in the dispersion, unknown ones are dropped), so on partial dicts it
+        differs from module ``confidence``, which takes the std of the values given.
+        """
+        one = isinstance(X, Mapping) or np.ndim(X) == 1
+        M = self.matrix(self.vector(X) if one else X)
+        out = confidences(M, self.w, clamp)
+        return float(out[0]) if one else out
+
+    def weights(self) -> Dict[str, float]:
+        return {n: float(v) for n, v in zip(self.names, self.w)}
+
+    # -- persistence --
+    def to_dict(self) -> Dict[str, Any]:
+        return {"names": self.names, "w": self.w.tolist(), "a": self.a.tolist(), "b": self.b.tolist(),
+                "method": self.method, "eta": self.eta, "lam": self.lam, "forget": self.forget,
+                "clip": self.clip, "share": self.share, "pnl_scale": self.pnl_scale, "scale": self.scale,
+                "n": self.n, "ts": self.ts}
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> "Ensemble":
+        e = cls(d["names"], np.asarray(d["w"], dtype=np.float64), d.get("method", "eg"), d.get("eta", 0.05),
+                d.get("lam", 1.0), d.get("forget", 0.999), d.get("clip", 1.0), d.get("share", 0.01),
+                d.get("pnl_scale", 0.0))
+        k = len(e.names)
+        e.a = np.asarray(d.get("a") or [0.0] * k, dtype=np.float64)
+        e.b = np.asarray(d.get("b") or [0.0] * k, dtype=np.float64)
+        e.n, e.ts = int(d.get("n", 0)), float(d.get("ts", 0.0))
+        e.scale = float(d.get("scale", 0.0))
+        return e
+
+
+def confidences(N: np.ndarray, weights: Signals, clamp: Optional[float] = None) -> np.ndarray:
+    """
+    Vectorized ``confidence`` for a (symbols x k) matrix of normalized signals:
+    clip(mean|w|, 0, 1) * (1 - 0.5 * min(1, std(row))).
+    """
+    w = np.abs(np.asarray(list(weights.values()) if isinstance(weights, Mapping) else weights, dtype=np.float64))
+    N = np.atleast_2d(np.asarray(N, dtype=np.float64))
+    if w.size == 0:
+        return np.zeros(N.shape[0])
+    base = min(1.0, max(0.0, float(w.mean())))
+    pen = np.minimum(1.0, N.std(axis=1)) if N.shape[1] else np.zeros(N.shape[0])
+    out = np.clip(base * (1.0 - 0.5 * pen), 0.0, 1.0)
+    return np.minimum(out, float(clamp)) if clamp is not None else out
+
+
 def confidence(norm_or_weights, weights=None, clamp: float | None = None) -> float:
     try:
         if isinstance(norm_or_weights, dict) and weights is not None:
@@ -23,3 +198,83 @@ def confidence(norm_or_weights, weights=None, clamp: float | None = None) -> flo
         avg_abs = sum(abs(float(x)) for x in seq)/len(seq); return float(max(0.0, min(1.0, avg_abs)))
     except Exception:
         return 0.0
+
+
+# ---- process-wide ensemble ------------------------------------------------------------
+
+_LOCK = threading.Lock()
+_ENS: Optional[Ensemble] = None
+_LAST_PERSIST = 0.0
+
+
+def _cfg() -> Dict[str, Any]:
+    try:
+        return dict(((_config.get() or {}).get("alpha") or {}).get("ensemble") or {})
+    except Exception:
+        return {}
+
+
+def get() -> Ensemble:
+    """The resident ensemble: last snapshot if there is one, else config weights."""
+    global _ENS
+    if _ENS is None:
+        with _LOCK:
+            if _ENS is None:
+                try:
+                    _ENS = Ensemble.from_dict(json.loads(STATE.read_text(encoding="utf-8")))
+                except FileNotFoundError:
+                    pass
+                except Exception:
+                    log.exception("ensemble snapshot unreadable, starting from config")
+                if _ENS is None:
+                    c = _cfg()
+                    _ENS = Ensemble(weights=dict(c.get("weights") or DEFAULT_WEIGHTS), method=c.get("method", "eg"),
+                                    eta=c.get("eta", 0.05), lam=c.get("lam", 1.0), forget=c.get("forget", 0.999),
+                                    clip=c.get("clip", 1.0), share=c.get("share", 0.01),
+                                    pnl_scale=c.get("pnl_scale", 0.0))
+    return _ENS
+
+
+def save(force: bool = False) -> None:
+    global _LAST_PERSIST
+    e = get()
+    with _LOCK:
+        if not force and time.time() - _LAST_PERSIST < PERSIST_SEC:
+            return
+        _LAST_PERSIST = time.time()
+        with e._lock:
+            obj = e.to_dict()
+    try:
+        TEL.mkdir(parents=True, exist_ok=True)
+        tmp = STATE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(obj, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(STATE)
+    except Exception:
+        log.exception("ensemble snapshot failed")
+
+
+def _save_at_exit() -> None:
+    if _ENS is not None:
+        save(force=True)
+
+atexit.register(_save_at_exit)
+
+
+def update(signals: Signals, pnl: float) -> Dict[str, Any]:
+    e = get()
+    e.update(signals, pnl)
+    save()
+    return {"ok": True, "weights": e.weights(), "n": e.n}
+
+
+def reset(weights: Optional[Mapping[str, float]] = None, method: Optional[str] = None) -> Dict[str, Any]:
+    """Start over from ``weights`` (default: config) and snapshot immediately."""
+    global _ENS
+    c = _cfg()
+    e = Ensemble(weights=dict(weights or c.get("weights") or DEFAULT_WEIGHTS), method=method or c.get("method", "eg"),
+                 eta=c.get("eta", 0.05), lam=c.get("lam", 1.0), forget=c.get("forget", 0.999), clip=c.get("clip", 1.0), share=c.get("share", 0.01),
+                 pnl_scale=c.get("pnl_scale", 0.0))
+    with _LOCK:
+        _ENS = e
+    save(force=True)
+    return {"ok": True, "weights": e.weights(), "method": e.method}
@@ -1,5 +1,366 @@
+"""
+Streaming technical-indicator features.
 
+Per symbol a ``FeatureState`` holds the running state of every indicator, so a
+new bar is folded in with O(1) work:
+
+  ema_fast / ema_slow / ema_gap   EMA(12), EMA(26) of close, gap = fast/slow - 1
+  atr / atr_pct                   Wilder ATR(14), also as a fraction of close
+  rsi                             Wilder RSI(14)
+  z_close / z_ret                 z-score of close / log return over 20 bars
+  rv / rv_ann                     realized vol of log returns over 20 bars (per bar, annualized)
+  spread_bps                      EMA(20) of the quoted spread when bars carry one,
+                                  else the Corwin-Schultz high/low estimate
+
+Wilder averages use the running mean for their first n inputs. ``warmup``
+builds the same state from a bar history with vectorized NumPy (blockwise
+closed-form EMA), so warming up on N bars equals N sequential ``update`` calls.
+``compute(symbol)`` warms up from the databank on first use, folds in any bars
+added since, and returns the precomputed ``raw`` and ``norm`` vectors.
+``compute_universe()`` does the same for every symbol of ``symbols.universe``
+in one pass and returns a (symbols x features) matrix as columns; results are
+cached per last-bar timestamp and concurrent callers share one computation.
+"""
 from __future__ import annotations
-def compute(symbol: str, **kwargs):
-    s = str(symbol or "EURUSD")
-    return {"ok": True, "symbol": s, "raw": {}, "norm": {}, "meta": {"src": "stub"}}
+import math, threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from chamelefx.log import get_logger
+from chamelefx.utils.rolling import RollingWindow
+from chamelefx.utils.ttlcache import TTLCache
+
+log = get_logger(__name__)
+
+EMA_FAST, EMA_SLOW = 12, 26
+ATR_N = RSI_N = 14
+Z_N = RV_N = 20
+VOLZ_N = 100
+SPREAD_N = 20
+_CS_K = 3.0 - 2.0 * math.sqrt(2.0)
+
+FEATURES = ("ema_fast", "ema_slow", "ema_gap", "atr", "atr_pct", "rsi", "z_close", "z_ret",
+            "rv", "rv_ann", "spread_bps")
+NORM = ("trend", "rsi", "z_close", "z_ret", "vol", "spread")
+
+
+# ---- vectorized kernels ----------------------------------------------------------
+
+def _ewm(x: np.ndarray, a: float, y0: Optional[float] = None) -> np.ndarray:
+    """y[k] = (1-a)*y[k-1] + a*x[k] (y[-1] = y0, or x[0]) in closed form per block."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty_like(x)
+    if x.size == 0:
+        return out
+    r = 1.0 - a
+    if r <= 0.0:
+        out[:] = x
+        return out
+    B = max(1, min(x.size, int(30.0 / -math.log(r))))     # keep r**-B well inside float range
+    prev = float(x[0]) if y0 is None else float(y0)
+    pw = r ** -np.arange(1, B + 1, dtype=np.float64)       # r^-(j+1)
+    for s in range(0, x.size, B):
+        blk = x[s:s + B]; m = blk.size
+        y = (prev + a * np.cumsum(blk * pw[:m])) / pw[:m]
+        out[s:s + m] = y
+        prev = float(y[-1])
+    return out
+
+
+def _wilder(x: np.ndarray, n: int) -> np.ndarray:
+    """Running mean for the first n values, then Wilder smoothing (a = 1/n)."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty_like(x)
+    k = min(n, x.size)
+    out[:k] = np.cumsum(x[:k]) / np.arange(1, k + 1)
+    if x.size > n:
+        out[n:] = _ewm(x[n:], 1.0 / n, out[n - 1])
+    return out
+
+
+def _cs_spread(h1, l1, h2, l2):
+    """Corwin-Schultz spread (fraction of price) from two consecutive bars' high/low."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = np.log(h1 / l1) ** 2 + np.log(h2 / l2) ** 2
+        gamma = np.log(np.maximum(h1, h2) / np.minimum(l1, l2)) ** 2
+        alpha = (np.sqrt(2.0 * beta) - np.sqrt(beta)) / _CS_K - np.sqrt(gamma / _CS_K)
+        s = 2.0 * (np.exp(alpha) - 1.0) / (1.0 + np.exp(alpha))
+    return np.where(np.isfinite(s), np.maximum(s, 0.0), 0.0)
+
+
+def _clip(v: float, lim: float = 3.0) -> float:
+    return float(min(lim, max(-lim, v)))
+
+
+# ---- per-symbol state -------------------------------------------------------------
+
+class FeatureState:
+    __slots__ = ("symbol", "n", "ts", "close", "hi", "lo", "ema_f", "ema_s", "atr", "gain", "loss",
+                 "spread", "z_close", "z_ret", "rv", "volz", "bar_sec", "last_ret")
+
+    def __init__(self, symbol: str, bar_sec: float = 86400.0):
+        self.symbol = symbol
+        self.n = 0
+        self.ts = 0.0
+        self.close = self.hi = self.lo = math.nan
+        self.ema_f = self.ema_s = self.atr = self.gain = self.loss = self.spread = math.nan
+        self.z_close = RollingWindow(Z_N)
+        self.z_ret = RollingWindow(Z_N)
+        self.rv = RollingWindow(RV_N)
+        self.volz = RollingWindow(VOLZ_N)
+        self.bar_sec = float(bar_sec)
+        self.last_ret = 0.0
+
+    # -- O(1) update --
+    def update(self, ts: float, o: float, h: float, l: float, c: float, spread: Optional[float] = None) -> None:
+        c = float(c); h = float(h); l = float(l)
+        first = self.n == 0
+        k = self.n + 1
+        if first:
+            self.ema_f = self.ema_s = c
+            tr, up, dn, r = h - l, 0.0, 0.0, 0.0
+            cs = 0.0
+        else:
+            pc = self.close
+            if self.n == 1 and float(ts) > self.ts:
+                self.bar_sec = float(ts) - self.ts          # learn the bar interval from the first gap
+            af, as_ = 2.0 / (EMA_FAST + 1), 2.0 / (EMA_SLOW + 1)
+            self.ema_f += af * (c - self.ema_f)
+            self.ema_s += as_ * (c - self.ema_s)
+            tr = max(h - l, abs(h - pc), abs(l - pc))
+            d = c - pc
+            up, dn = max(d, 0.0), max(-d, 0.0)
+            r = math.log(c / pc) if c > 0 and pc > 0 else 0.0
+            cs = float(_cs_spread(np.float64(self.hi), np.float64(self.lo), np.float64(h), np.float64(l)))
+        self.atr = self._wild(self.atr, tr, k, ATR_N)
+        # RSI's averages start at the first price change (bar 2)
+        if not first:
+            self.gain = self._wild(self.gain, up, k - 1, RSI_N)
+            self.loss = self._wild(self.loss, dn, k - 1, RSI_N)
+        s = float(spread) / c if (spread is not None and c > 0) else cs
+        self.spread = s if first else self.spread + (2.0 / (SPREAD_N + 1)) * (s - self.spread)
+        self.z_close.push(c)
+        if not first:
+            self.z_ret.push(r)
+            self.rv.push(r)
+            self.volz.push(self.rv.std)
+        self.last_ret = r
+        self.close, self.hi, self.lo, self.ts, self.n = c, h, l, float(ts), k
+
+    @staticmethod
+    def _wild(prev: float, x: float, k: int, n: int) -> float:
+        if k <= 1 or not math.isfinite(prev):
+            return x
+        return prev + (x - prev) / min(k, n)
+
+    # -- vectorized warm-up --
+    def warmup(self, ts, o, h, l, c, spread=None) -> "FeatureState":
+        """Rebuild state from full bar arrays (replaces any existing state)."""
+        c = np.asarray(c, dtype=np.float64); h = np.asarray(h, dtype=np.float64)
+        l = np.asarray(l, dtype=np.float64); ts = np.asarray(ts, dtype=np.float64)
+        N = c.size
+        self.__init__(self.symbol, float(np.median(np.diff(ts))) if N > 1 else self.bar_sec)
+        if N == 0:
+            return self
+        self.ema_f = float(_ewm(c, 2.0 / (EMA_FAST + 1))[-1])
+        self.ema_s = float(_ewm(c, 2.0 / (EMA_SLOW + 1))[-1])
+        pc = np.concatenate(([c[0]], c[:-1]))
+        tr = np.maximum.reduce([h - l, np.abs(h - pc), np.abs(l - pc)])
+        tr[0] = h[0] - l[0]
+        self.atr = float(_wilder(tr, ATR_N)[-1])
+        d = np.diff(c)
+        if d.size:
+            self.gain = float(_wilder(np.maximum(d, 0.0), RSI_N)[-1])
+            self.loss = float(_wilder(np.maximum(-d, 0.0), RSI_N)[-1])
+        if spread is not None:
+            s = np.asarray(spread, dtype=np.float64) / np.where(c > 0, c, np.nan)
+        else:
+            s = np.concatenate(([0.0], _cs_spread(h[:-1], l[:-1], h[1:], l[1:])))
+        self.spread = float(_ewm(s, 2.0 / (SPREAD_N + 1))[-1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where((c[1:] > 0) & (c[:-1] > 0), np.log(c[1:] / c[:-1]), 0.0)
+        self.z_close = RollingWindow(Z_N, c[-Z_N:])
+        self.z_ret = RollingWindow(Z_N, r[-Z_N:])
+        self.rv = RollingWindow(RV_N, r[-RV_N:])
+        # rolling std of r (population, window RV_N, partial windows at the start) for the vol z-score
+        if r.size:
+            m = min(r.size, VOLZ_N + RV_N)
+            rr = r[-m:]
+            cs1 = np.concatenate(([0.0], np.cumsum(rr))); cs2 = np.concatenate(([0.0], np.cumsum(rr * rr)))
+            off = r.size - m                                  # global index of rr[0]
+            idx = np.arange(1, m + 1)
+            lo = np.maximum(idx - np.minimum(RV_N, idx + off), 0)   # only the kept tail needs exact starts
+            cnt = idx - lo
+            mu = (cs1[idx] - cs1[lo]) / cnt
+            var = np.maximum((cs2[idx] - cs2[lo]) / cnt - mu * mu, 0.0)
+            self.volz = RollingWindow(VOLZ_N, np.sqrt(var)[-VOLZ_N:])
+        self.last_ret = float(r[-1]) if r.size else 0.0
+        self.close, self.hi, self.lo, self.ts, self.n = float(c[-1]), float(h[-1]), float(l[-1]), float(ts[-1]), N
+        return self
+
+    # -- outputs --
+    def raw(self) -> Dict[str, float]:
+        c = self.close
+        rsi = 50.0
+        if math.isfinite(self.gain) and math.isfinite(self.loss):
+            rsi = 100.0 if self.loss == 0 and self.gain > 0 else (50.0 if self.loss == 0 else
+                                                                   100.0 - 100.0 / (1.0 + self.gain / self.loss))
+        zc = (c - self.z_close.mean) / self.z_close.std if self.z_close.std > 0 else 0.0
+        zr = (self.last_ret - self.z_ret.mean) / self.z_ret.std if self.z_ret.std > 0 else 0.0
+        rv = self.rv.std
+        return {"ema_fast": self.ema_f, "ema_slow": self.ema_s,
+                "ema_gap": self.ema_f / self.ema_s - 1.0 if self.ema_s else 0.0,
+                "atr": self.atr, "atr_pct": self.atr / c if c else 0.0, "rsi": rsi,
+                "z_close": zc, "z_ret": zr, "rv": rv,
+                "rv_ann": rv * math.sqrt(365.0 * 86400.0 / self.bar_sec) if self.bar_sec > 0 else rv,
+                "spread_bps": self.spread * 1e4 if math.isfinite(self.spread) else 0.0}
+
+    def norm(self, raw: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Roughly unit-scale versions in [-1, 1]."""
+        r = raw or self.raw()
+        vz = self.volz
+        return {"trend": _clip(r["ema_gap"] / r["atr_pct"] if r["atr_pct"] > 0 else 0.0) / 3.0,
+                "rsi": (r["rsi"] - 50.0) / 50.0,
+                "z_close": _clip(r["z_close"]) / 3.0,
+                "z_ret": _clip(r["z_ret"]) / 3.0,
+                "vol": _clip((r["rv"] - vz.mean) / vz.std if vz.std > 0 else 0.0) / 3.0,
+                "spread": _clip(r["spread_bps"] / 10.0, 1.0)}
+
+
+# ---- engine -------------------------------------------------------------------------
+
+_LOCK = threading.Lock()
+_STATES: Dict[str, FeatureState] = {}
+
+
+def _sym(symbol: str) -> str:
+    return str(symbol or "EURUSD").upper()
+
+
+def state(symbol: str) -> FeatureState:
+    """Resident state for ``symbol``, warmed up from the databank and caught up to its last bar."""
+    from chamelefx.databank import columnar
+    sym = _sym(symbol)
+    cols = columnar.load(sym)
+    ts = cols["ts"]
+    with _LOCK:
+        st = _STATES.get(sym)
+        if st is not None and st.n >= len(ts) and (not len(ts) or st.ts >= float(ts[-1])):
+            return st                                   # live updates are at or ahead of the databank
+        if st is None or st.n > len(ts) or (st.n and float(ts[st.n - 1]) != st.ts):
+            st = _STATES[sym] = FeatureState(sym).warmup(ts, cols["open"], cols["high"], cols["low"], cols["close"])
+        elif st.n < len(ts):
+            for i in range(st.n, len(ts)):
+                st.update(ts[i], cols["open"][i], cols["high"][i], cols["low"][i], cols["close"][i])
+        return st
+
+
+def update(symbol: str, ts: float, o: float, h: float, l: float, c: float, spread: Optional[float] = None) -> Dict[str, Any]:
+    """Fold one live bar into the symbol's state (O(1))."""
+    sym = _sym(symbol)
+    with _LOCK:
+        st = _STATES.get(sym)
+        if st is None:
+            st = _STATES[sym] = FeatureState(sym)
+        if float(ts) > st.ts:
+            st.update(ts, o, h, l, c, spread)
+    return {"ok": True, "symbol": sym, "ts": st.ts, "bars": st.n}
+
+
+def compute(symbol: str, **kwargs) -> Dict[str, Any]:
+    s = _sym(symbol)
+    try:
+        st = state(s)
+    except KeyError:
+        with _LOCK:
+            st = _STATES.get(s)
+        if st is None or st.n == 0:
+            return {"ok": True, "symbol": s, "raw": {}, "norm": {}, "meta": {"src": "no_history"}}
+    with _LOCK:
+        raw = st.raw()
+        norm = st.norm(raw)
+        meta = {"src": "engine", "ts": st.ts, "bars": st.n}
+    return {"ok": True, "symbol": s, "raw": {k: float(v) for k, v in raw.items()},
+            "norm": {k: float(v) for k, v in norm.items()}, "meta": meta}
+
+
+# ---- universe batch -------------------------------------------------------------------
+
+UNIVERSE_CACHE_N = 8
+UNIVERSE_TTL_SEC = 3600.0        # keys carry the last bar ts, so this only bounds idle entries
+
+_UNI_CACHE = TTLCache(UNIVERSE_TTL_SEC, UNIVERSE_CACHE_N, name="alpha.features.universe")
+
+
+def universe() -> List[str]:
+    """Configured ``symbols.universe``, else every symbol in the databank."""
+    syms: Sequence[str] = ()
+    try:
+        from chamelefx.utils import config as _config
+        syms = ((_config.get() or {}).get("symbols") or {}).get("universe") or ()
+    except Exception:
+        log.debug("config unavailable for universe", exc_info=True)
+    if not syms:
+        from chamelefx.databank import columnar
+        syms = columnar.symbols()
+    return list(dict.fromkeys(_sym(s) for s in syms if s))
+
+
+def _bar_ts(symbol: str) -> float:
+    """Timestamp of the newest bar known for ``symbol`` (databank or live updates)."""
+    from chamelefx.databank import columnar
+    try:
+        ts = columnar.load(symbol)["ts"]
+        last = float(ts[-1]) if len(ts) else 0.0
+    except KeyError:
+        last = 0.0
+    st = _STATES.get(symbol)
+    return max(last, st.ts if st is not None and st.n else 0.0)
+
+
+def matrix(symbols: Sequence[str]) -> Dict[str, Any]:
+    """raw (S x len(FEATURES)) and norm (S x len(NORM)) arrays; NaN rows for symbols without history."""
+    S = len(symbols)
+    raw = np.full((S, len(FEATURES)), np.nan)
+    norm = np.full((S, len(NORM)), np.nan)
+    ts = np.zeros(S); bars = np.zeros(S, dtype=np.int64)
+    for i, s in enumerate(symbols):
+        try:
+            st = state(s)
+        except KeyError:
+            st = _STATES.get(s)
+            if st is None or st.n == 0:
+                continue
+        with _LOCK:
+            r = st.raw()
+            n = st.norm(r)
+            ts[i], bars[i] = st.ts, st.n
+        raw[i] = [r[k] for k in FEATURES]
+        norm[i] = [n[k] for k in NORM]
+    return {"symbols": list(symbols), "raw": raw, "norm": norm, "ts": ts, "bars": bars}
+
+
+def _columns(names: Sequence[str], m: np.ndarray) -> Dict[str, List[Optional[float]]]:
+    return {k: [float(v) if math.isfinite(v) else None for v in m[:, j].tolist()] for j, k in enumerate(names)}
+
+
+def compute_universe(symbols: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Features for a whole universe, columnar: ``raw[feature][i]`` / ``norm[feature][i]``
+    belong to ``symbols[i]`` (None where a symbol has no history).
+    """
+    syms = list(dict.fromkeys(_sym(s) for s in symbols)) if symbols else universe()
+    key = tuple((s, _bar_ts(s)) for s in syms)
+    return _UNI_CACHE.get(key, lambda: _universe_payload(syms, key))
+
+
+def _universe_payload(syms: List[str], key: Tuple) -> Dict[str, Any]:
+    m = matrix(syms)
+    ok = m["bars"] > 0
+    return {"ok": True, "symbols": syms, "features": list(FEATURES), "norm_features": list(NORM),
+            "raw": _columns(FEATURES, m["raw"]), "norm": _columns(NORM, m["norm"]),
+            "ts": [float(t) if b else None for t, b in zip(m["ts"].tolist(), ok.tolist())],
+            "bars": m["bars"].tolist(),
+            "missing": [s for s, b in zip(syms, ok.tolist()) if not b],
+            "meta": {"src": "engine", "asof": max((k[1] for k in key), default=0.0)}}
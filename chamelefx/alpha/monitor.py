@@ -2,100 +2,170 @@ from __future__ import annotations
 from chamelefx.log import get_logger
 from typing import Dict, Any, List
 from pathlib import Path
-import json, statistics, time
+import atexit, threading, time
+from chamelefx.utils.atomic_json import read_json, write_json_atomic
+from chamelefx.utils.rolling import RollingWindow
 
 ROOT = Path(__file__).resolve().parents[1]
 RUN  = ROOT / "runtime"
 RUN.mkdir(parents=True, exist_ok=True)
 STORE = RUN / "alpha_monitor.json"
 
-DEFAULT = {"symbols": {}, "ts": 0}
+# feedback/sizing_regime/weekly_report read STORE directly; it is rewritten at
+# most every SNAPSHOT_SEC while ingesting (a timer flushes the tail of a burst,
+# so it is never more than SNAPSHOT_SEC stale), and on exit.
+SNAPSHOT_SEC = 5.0
 
-def _read() -> dict:
-    try:
-        d = json.loads(STORE.read_text(encoding="utf-8"))
-        if isinstance(d, dict):
-            return d
-        return DEFAULT.copy()
-    except Exception:
-        return DEFAULT.copy()
+log = get_logger(__name__)
+
+def _default() -> dict:
+    return {"symbols": {}, "ts": 0}
+
+def _cap(window: int) -> int:
+    return max(10, int(window))
+
+class _SymbolState:
+    """Rolling signal stats plus price returns for one symbol, all O(1) per tick."""
+    __slots__ = ("signals", "rets", "prices", "last")
+
+    def __init__(self, window: int, signals: List[float] = (), prices: List[float] = (), last: dict | None = None):
+        cap = _cap(window)
+        self.signals = RollingWindow(cap, signals)
+        self.prices = RollingWindow(cap, prices)    # kept for the snapshot / regime warm-up
+        px = self.prices.values()
+        self.rets = RollingWindow(cap - 1, (_ret(px[i-1], px[i]) for i in range(1, len(px))))
+        self.last = dict(last or {})
 
-def _write(d: dict) -> None:
-    d["ts"] = time.time()
-    STORE.write_text(json.dumps(d, indent=2), encoding="utf-8")
+    def resize(self, window: int) -> None:
+        cap = _cap(window)
+        if cap != self.signals.cap:
+            self.__init__(window, self.signals.values(), self.prices.values(), self.last)
 
-def _rolling_stats(arr: List[float]) -> dict:
-    if not arr:
+    def push(self, signal: float, price: float | None) -> None:
+        self.signals.push(signal)
+        if price is not None:
+            prev = self.prices.last()
+            self.prices.push(price)
+            if prev is not None:
+                self.rets.push(_ret(prev, float(price)))
+
+def _ret(prev: float, px: float) -> float:
+    return (px - prev) / (prev or 1.0)
+
+def _rolling_stats(w: RollingWindow) -> dict:
+    if not w.n:
         return {"n":0,"mean":0.0,"stdev":0.0,"snr":0.0}
-    n = len(arr)
-    mean = float(statistics.mean(arr))
-    stdev = float(statistics.pstdev(arr)) if n>1 else 0.0
-    snr = float(abs(mean) / (stdev + 1e-12))
-    return {"n":n,"mean":mean,"stdev":stdev,"snr":snr}
-
-def _regime_flags(prices: List[float]) -> dict:
-    # minimal regime detector: rolling return & rolling stdev
-    if not prices or len(prices) < 5:
+    return {"n":w.n,"mean":float(w.mean),"stdev":float(w.std),"snr":float(w.snr)}
+
+def _regime_flags(st: _SymbolState) -> dict:
+    # minimal regime detector over [0.0] + consecutive returns of the price window
+    n_p = st.prices.n
+    if n_p < 5:
         return {"trend":"unknown","vol":"unknown"}
-    rets = [0.0] + [(prices[i]-prices[i-1])/(prices[i-1] or 1.0) for i in range(1,len(prices))]
-    rmean = float(statistics.mean(rets))
-    rvol  = float(statistics.pstdev(rets)) if len(rets)>1 else 0.0
+    n_r, m_r, m2_r = st.rets.moments()
+    n = n_r + 1                       # the leading 0.0
+    rmean = m_r * n_r / n
+    m2 = m2_r + m_r * m_r * n_r / n   # merge a single 0.0 observation into (n_r, m_r, m2_r)
+    rvol = (max(0.0, m2) / n) ** 0.5
     trend = "trend" if abs(rmean) > (rvol*0.25) else "range"
     vol = "low"
     if rvol > 0.015: vol = "high"
     elif rvol > 0.006: vol = "normal"
     return {"trend":trend, "vol":vol}
 
-def ingest(symbol: str, signal_value: float, price: float | None = None, window: int = 200, bt_mean_hint: float | None = None) -> dict:
-    # Ingest a live datapoint (signal + optional price). Keeps a rolling window and computes health.
-    d = _read()
-    sym = str(symbol).upper()
-    srec = d["symbols"].setdefault(sym, {"signals": [], "prices": [], "last": {}})
+_LOCK = threading.Lock()
+_STATE: Dict[str, _SymbolState] = {}
+_TS = 0.0
+_DIRTY = False
+_LAST_SNAP = 0.0
+_TIMER: threading.Timer | None = None
 
-    sigs = srec["signals"]
-    sigs.append(float(signal_value))
-    if len(sigs) > max(10, int(window)):
-        srec["signals"] = sigs[-int(window):]
+def _boot() -> None:
+    global _TS
+    d = read_json(STORE, None)
+    if not isinstance(d, dict):
+        d = _default()
+    for sym, rec in (d.get("symbols") or {}).items():
+        try:
+            sig = [float(x) for x in rec.get("signals", [])]
+            px = [float(x) for x in rec.get("prices", [])]
+            _STATE[sym] = _SymbolState(max(len(sig), len(px), 200), sig, px, rec.get("last"))
+        except Exception:
+            log.exception("alpha monitor: bad snapshot entry for %s", sym)
+    _TS = float(d.get("ts", 0) or 0)
 
-    if price is not None:
-        pxs = srec["prices"]
-        pxs.append(float(price))
-        if len(pxs) > max(10, int(window)):
-            srec["prices"] = pxs[-int(window):]
+def _snapshot_obj() -> dict:
+    return {"symbols": {sym: {"signals": st.signals.values(), "prices": st.prices.values(), "last": st.last}
+                        for sym, st in _STATE.items()},
+            "ts": _TS}
 
-    stats = _rolling_stats(srec["signals"])
-    regime = _regime_flags(srec.get("prices", []))
+def flush() -> None:
+    """Persist the resident state to STORE now."""
+    global _DIRTY, _LAST_SNAP, _TIMER
+    with _LOCK:
+        if _TIMER is not None:
+            _TIMER.cancel()
+            _TIMER = None
+        if not _DIRTY:
+            return
+        obj = _snapshot_obj()
+        _DIRTY = False
+        _LAST_SNAP = time.time()
+    try:
+        write_json_atomic(STORE, obj)
+    except Exception:
+        log.exception("alpha monitor snapshot failed")
 
-    degrade = (stats["n"] >= 30 and stats["snr"] < 0.25)
+_boot()
+atexit.register(flush)
 
-    drift = None
-    if bt_mean_hint is not None:
-        try:
-            drift = float(stats["mean"] - float(bt_mean_hint))
-        except Exception:
-            drift = None
-
-    last = {
-        "ts": time.time(),
-        "stats": stats,
-        "regime": regime,
-        "degrade": bool(degrade),
-        "drift_vs_bt_mean": drift
-    }
-    srec["last"] = last
-    _write(d)
+def ingest(symbol: str, signal_value: float, price: float | None = None, window: int = 200, bt_mean_hint: float | None = None) -> dict:
+    # Ingest a live datapoint (signal + optional price). Keeps a rolling window and computes health.
+    global _TS, _DIRTY, _TIMER
+    sym = str(symbol).upper()
+    now = time.time()
+    with _LOCK:
+        st = _STATE.get(sym)
+        if st is None:
+            st = _STATE[sym] = _SymbolState(window)
+        else:
+            st.resize(window)
+        st.push(float(signal_value), None if price is None else float(price))
+
+        stats = _rolling_stats(st.signals)
+        degrade = (stats["n"] >= 30 and stats["snr"] < 0.25)
+        drift = None
+        if bt_mean_hint is not None:
+            try:
+                drift = float(stats["mean"] - float(bt_mean_hint))
+            except Exception:
+                drift = None
+        st.last = {
+            "ts": now,
+            "stats": stats,
+            "regime": _regime_flags(st),
+            "degrade": bool(degrade),
+            "drift_vs_bt_mean": drift
+        }
+        _TS = now
+        _DIRTY = True
+        last = dict(st.last)
+        due = (now - _LAST_SNAP) >= SNAPSHOT_SEC
+        if not due and _TIMER is None:
+            _TIMER = threading.Timer(SNAPSHOT_SEC - (now - _LAST_SNAP), flush)
+            _TIMER.daemon = True
+            _TIMER.start()
+    if due:
+        flush()
     return {"ok": True, "symbol": sym, **last}
 
 def health(symbol: str) -> dict:
-    d = _read()
     sym = str(symbol).upper()
-    rec = d["symbols"].get(sym) or {}
-    return {"ok": True, "symbol": sym, "last": rec.get("last", {}), "n": len(rec.get("signals", []))}
+    with _LOCK:
+        st = _STATE.get(sym)
+        return {"ok": True, "symbol": sym, "last": dict(st.last) if st else {}, "n": st.signals.n if st else 0}
 
 def regimes() -> dict:
-    d = _read()
-    out = {}
-    for sym, rec in d.get("symbols", {}).items():
-        r = (rec.get("last") or {}).get("regime") or {"trend":"unknown","vol":"unknown"}
-        out[sym] = r
-    return {"ok": True, "ts": d.get("ts", 0), "regimes": out}
+    with _LOCK:
+        out = {sym: (st.last or {}).get("regime") or {"trend":"unknown","vol":"unknown"} for sym, st in _STATE.items()}
+        return {"ok": True, "ts": _TS, "regimes": out}
@@ -1,2 +1,118 @@
+"""
+Signal -> position weight.
+
+Methods (config ``alpha.weighting``; ``params`` override per call):
+
+  clamp   w = scale * s
+  kelly   w = fraction * s / (vol / target_vol)**2, zeroed below ``floor``
+          (fractional Kelly: size grows with the edge and shrinks with variance)
+  vol     w = scale * s * target_vol / vol
+
+``vol`` (annualized) is optional; without it no volatility scaling is applied.
+The live path resolves it for a ``symbol`` from the feature engine's realized
+vol (``rv_ann``) when the caller passes none (``resolve_vol``).
+Every method finishes with a clip to +/- min(clamp, cap).
+
+``weights_from_signals`` is the vectorized form used by backtests and parity
+checks; ``weight_from_signal`` (the live path) runs the same kernel on one
+value, so both produce bit-identical weights.
+"""
+from __future__ import annotations
 from chamelefx.log import get_logger
-# weighting.py placeholder - implement logic
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from chamelefx.utils import config as _config
+
+log = get_logger(__name__)
+
+METHODS = ("clamp", "kelly", "vol")
+DEFAULT_METHOD = "kelly"
+KELLY_FRACTION = 0.25
+VOL_EPS = 1e-6
+
+
+def _cfg() -> Dict[str, Any]:
+    try:
+        return dict(((_config.get() or {}).get("alpha") or {}).get("weighting") or {})
+    except Exception:
+        return {}
+
+
+def _params(method: Optional[str], params: Optional[Dict[str, Any]]) -> tuple:
+    """(method, resolved params): config defaults for the method, overridden by ``params``."""
+    cfg = _cfg()
+    m = str(method or cfg.get("method_default") or DEFAULT_METHOD).lower()
+    if m not in METHODS:
+        raise ValueError(f"unknown weighting method: {m}")
+    va = cfg.get("vol_adjust") or {}
+    p = {"scale": 1.0, "fraction": KELLY_FRACTION, "floor": 0.0, "cap": float("inf"),
+         "target_vol": float(va.get("target_vol", 0.12))}
+    if m == "kelly":
+        p.update({k: float(v) for k, v in (cfg.get("kelly") or {}).items() if k in p})
+    p.update({k: v for k, v in (params or {}).items() if v is not None})
+    return m, p
+
+
+def weights_from_signals(signals, method: Optional[str] = None, clamp: float = 0.35,
+                         params: Optional[Dict[str, Any]] = None, vol=None) -> np.ndarray:
+    """
+    Weights for an array of signals. ``vol`` (scalar or array broadcastable to
+    ``signals``, annualized) falls back to ``params["vol"]``; NaN signals give 0.
+    """
+    m, p = _params(method, params)
+    s = np.nan_to_num(np.asarray(signals, dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+    v = p.get("vol") if vol is None else vol
+    ratio = None
+    if v is not None:
+        ratio = np.maximum(np.abs(np.asarray(v, dtype=np.float64)), VOL_EPS) / max(float(p["target_vol"]), VOL_EPS)
+    if m == "kelly":
+        w = float(p["fraction"]) * s
+        if ratio is not None:
+            w = w / (ratio * ratio)
+        w = np.where(np.abs(w) < float(p["floor"]), 0.0, w)
+    elif m == "vol":
+        w = float(p["scale"]) * s
+        if ratio is not None:
+            w = w / ratio
+    else:
+        w = float(p["scale"]) * s
+    lim = min(abs(float(clamp)), float(p["cap"]))
+    return np.clip(w, -lim, lim)
+
+
+def resolve_vol(symbol: Optional[str] = None, vol: Optional[float] = None,
+                params: Optional[Dict[str, Any]] = None) -> tuple:
+    """
+    (vol, source) for one symbol: the explicit ``vol``, else ``params["vol"]``,
+    else the symbol's annualized realized vol from ``alpha.features`` once its
+    window is warm. (None, "none") means no volatility scaling will be applied.
+    """
+    if vol is not None:
+        return float(vol), "arg"
+    if (params or {}).get("vol") is not None:
+        return float(params["vol"]), "params"
+    if symbol:
+        try:
+            from chamelefx.alpha import features as _features
+            st = _features.state(symbol)
+            rv = float(st.raw()["rv_ann"]) if st.n > _features.RV_N else float("nan")
+            if np.isfinite(rv) and rv > 0:
+                return rv, "features"
+        except Exception:
+            log.debug("realized vol unavailable for %s", symbol, exc_info=True)
+    return None, "none"
+
+
+def weight_from_signal(signal: float, method: Optional[str] = None, clamp: float = 0.35,
+                       params: Optional[Dict[str, Any]] = None, symbol: Optional[str] = None,
+                       vol: Optional[float] = None) -> float:
+    """Scalar form of ``weights_from_signals``; with no ``vol``, it is resolved for ``symbol`` (``resolve_vol``)."""
+    try:
+        s = float(signal)
+    except (TypeError, ValueError):
+        s = 0.0
+    if vol is None and _params(method, params)[0] != "clamp":
+        vol = resolve_vol(symbol, None, params)[0]
+    return float(weights_from_signals(np.array([s]), method, clamp, params, vol)[0])
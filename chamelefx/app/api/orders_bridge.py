@@ -1,44 +1,30 @@
 from __future__ import annotations
-import os, json, time, shutil, math
+import asyncio, itertools, os, threading, time, shutil, math
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from typing import Any, Dict, Optional
+import numpy as np
+from chamelefx.utils import config as _config
+from chamelefx.utils import latency as _latency
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 CFX  = os.path.join(ROOT, "chamelefx")
 APP  = os.path.join(CFX, "app", "api")
 RUN  = os.path.join(CFX, "runtime")
 CFG_PATH = os.path.join(CFX, "config.json")
-ORDERS_FILE = os.path.join(RUN, "orders_recent.json")
 
 def _backup(path: str):
     if os.path.exists(path):
         shutil.copy2(path, path + f".bak.{int(time.time())}")
 
-def _ensure_dirs():
-    os.makedirs(os.path.dirname(ORDERS_FILE), exist_ok=True)
-
 def _load_cfg() -> Dict[str, Any]:
-    try:
-        with open(CFG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+    return _config.get()
 
 def _append_recent(entry: Dict[str, Any]) -> None:
-    """Append order echo into runtime file (best-effort)."""
+    """Append order echo into the trade store (best-effort, batched insert)."""
     try:
-        _ensure_dirs()
-        data = {"orders": []}
-        if os.path.exists(ORDERS_FILE):
-            with open(ORDERS_FILE, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                except Exception:
-                    data = {"orders": []}
-        data.setdefault("orders", []).append(entry)
-        tmp = ORDERS_FILE + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        os.replace(tmp, ORDERS_FILE)
+        from chamelefx.integrations import trade_store as _store
+        _store.add_order(entry)
     except Exception:
         pass
 
@@ -59,29 +45,50 @@ def _mt5_module():
         _MT5 = None
     return _MT5
 
-def _mt5_ensure_started(cfg: Dict[str, Any]) -> bool:
+_MT5_FAILS = 0
+_MT5_NEXT_TRY = 0.0
+_MT5_START_LOCK = threading.Lock()
+
+@_config.on_change
+def _on_cfg_change(cfg) -> None:
+    # mt5 section may have been toggled/edited: re-probe on the next order
+    global _MT5_READY, _MT5_FAILS, _MT5_NEXT_TRY
+    _MT5_READY = None
+    _MT5_FAILS = 0
+    _MT5_NEXT_TRY = 0.0
+
+def _mt5_ensure_started(cfg: Dict[str, Any]) -> Optional[bool]:
     """
-    Try to start/connect MT5 exactly once per process; cache readiness.
+    Start/connect MT5 once per process and cache readiness, without sleeping.
+    Returns True when live, False when MT5 is off (disabled, no client module,
+    or retry.attempts failures; stays off until the config changes) and None
+    when MT5 is enabled but not ready yet: a failed attempt schedules the next
+    one after backoff_sec * 2**fails and orders arriving in between get an
+    explicit not-ready error instead of an echo ACK. A caller that finds a
+    start attempt in progress waits for its outcome.
     Expected mt5 config fields (already in your config.json):
       enabled, account_id, server, path, timeout_sec, retry{attempts,backoff_sec}
     """
-    global _MT5_READY
+    global _MT5_READY, _MT5_FAILS, _MT5_NEXT_TRY
     if _MT5_READY is not None:
         return _MT5_READY
 
     mod = _mt5_module()
-    if mod is None:
-        _MT5_READY = False
-        return False
-
     mt5_cfg = (cfg.get("mt5") or {})
-    if not mt5_cfg.get("enabled", False):
+    if mod is None or not mt5_cfg.get("enabled", False):
         _MT5_READY = False
         return False
 
     attempts = int((mt5_cfg.get("retry") or {}).get("attempts", 3))
     backoff  = float((mt5_cfg.get("retry") or {}).get("backoff_sec", 1.0))
-    for i in range(max(1, attempts)):
+    if time.time() < _MT5_NEXT_TRY:
+        return None
+    with _MT5_START_LOCK:
+        if _MT5_READY is not None:
+            return _MT5_READY
+        if time.time() < _MT5_NEXT_TRY:
+            return None               # the attempt we waited for failed
+        ok = False
         try:
             # Your mt5_client should provide something like ensure_started(**kwargs)
             # If your naming differs, adapt here.
@@ -91,14 +98,24 @@ def _mt5_ensure_started(cfg: Dict[str, Any]) -> bool:
                 path=mt5_cfg.get("path",""),
                 timeout_sec=int(mt5_cfg.get("timeout_sec", 5))
             ))
-            if ok:
-                _MT5_READY = True
-                return True
         except Exception:
             pass
-        time.sleep(backoff)
-    _MT5_READY = False
-    return False
+        if ok:
+            _MT5_READY = True
+            return True
+        _MT5_FAILS += 1
+        if _MT5_FAILS >= max(1, attempts):
+            _MT5_READY = False
+            return False
+        _MT5_NEXT_TRY = time.time() + backoff * (2 ** (_MT5_FAILS - 1))
+        return None
+
+def _not_ready(job: Dict[str, Any]) -> None:
+    """MT5 is enabled but (re)starting: fail the order instead of echo-acking it."""
+    body = job["body"]
+    job["result"] = {"ok": False, "live": False, "symbol": body["symbol"], "error": "mt5_not_ready",
+                     "retry_in_sec": round(max(0.0, _MT5_NEXT_TRY - time.time()), 3)}
+    job["journal"] = {"status": "not_ready", **body, "result": job["result"]}
 
 def _clamp(val: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, val))
@@ -117,11 +134,12 @@ def _weight_to_lots(symbol: str, weight: float, cfg: Dict[str, Any]) -> float:
     lots = _clamp((w / 0.10) * 0.10 * lot_scale, 0.01, 5.0)  # 0.1 weight -> 0.10 lots
     return float(lots)
 
-def _mt5_place_market(symbol: str, side: str, lots: float) -> Dict[str, Any]:
+def _mt5_place_market(symbol: str, side: str, lots: float, venue: Optional[str] = None) -> Dict[str, Any]:
     """
     Place MT5 market order. Returns a uniform dict.
-    Expects chamelefx.integrations.mt5_client to expose: market_order(symbol, lots, side)
+    Expects chamelefx.integrations.mt5_client to expose: market_order(symbol, lots, side, venue)
       - side: "buy" or "sell"
+      - venue: router venue the order was routed to (stats are keyed by it)
       - returns dict with {ok, ticket?, error?}
     """
     mod = _mt5_module()
@@ -129,28 +147,31 @@ def _mt5_place_market(symbol: str, side: str, lots: float) -> Dict[str, Any]:
         return {"ok": False, "error": "mt5_module_missing"}
 
     try:
-        resp = mod.market_order(symbol=symbol, lots=float(lots), side=side)
+        resp = mod.market_order(symbol=symbol, lots=float(lots), side=side, venue=venue)
         if resp and resp.get("ok"):
             return {"ok": True, "ticket": resp.get("ticket"), "raw": resp}
         return {"ok": False, "error": "mt5_rejected", "raw": resp}
     except Exception as e:
         return {"ok": False, "error": "mt5_exception", "detail": repr(e)}
 
-# -------- Public API ----------------------------------------------------------
+# -------- Order pipeline ------------------------------------------------------
+#
+# gate -> size -> route -> send -> journal, one asyncio task per stage on a
+# dedicated loop thread, bounded queues in between. The caller's future is
+# resolved right after `send` (or at `gate` when blocked); journaling and
+# stage telemetry happen afterwards, off the caller's critical path.
 
-def place(symbol: str,
-          side: str = "buy",
-          weight: float = 0.0,
-          order_type: str = "market",
-          price: Optional[float] = None,
-          meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """
-    Unified order entry:
-      - runs guardrails (best-effort)
-      - if MT5 enabled + available: route to MT5
-      - else: local echo (dry ACK) for dev
-      - always appends to runtime/orders_recent.json
-    """
+STAGES = ("gate", "size", "route", "send", "journal")
+_SEQ = itertools.count(1)
+_STATS: Dict[str, deque] = {k: deque(maxlen=2048) for k in STAGES + ("ack",)}
+
+def _pcfg(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    return ((cfg.get("execution") or {}).get("pipeline") or {})
+
+def _order_id() -> str:
+    return f"cfx-{int(time.time()*1000)}-{next(_SEQ)}"
+
+def _new_job(symbol, side, weight, order_type, price, meta) -> Dict[str, Any]:
     meta = meta or {}
     body = {
         "symbol": symbol,
@@ -161,62 +182,417 @@ def place(symbol: str,
         "ts": time.time(),
         "meta": meta
     }
+    return {"id": _order_id(), "body": body, "meta": meta, "t0": time.perf_counter(), "t": {},
+            "result": None, "journal": None}
+
+def _timed(stage: str, job: Dict[str, Any], fn) -> None:
+    t = time.perf_counter()
+    fn(job)
+    job["t"][stage] = round((time.perf_counter() - t) * 1000.0, 4)
 
-    # Guardrails pre-trade gate (best-effort)
+def _st_gate(job: Dict[str, Any]) -> None:
+    """Guardrails pre-trade gate (best-effort)."""
+    body = job["body"]
     try:
         from chamelefx.ops.guardrails import pretrade_gate as _gate
         g = _gate(dict(body))
         if not g.get("ok") or g.get("blocked"):
-            result = {"ok": False, "blocked": True, "reason": g.get("reason","guardrails"), "state": g}
-            _append_recent({"status": "blocked", **body, "result": result})
-            return result
+            job["result"] = {"ok": False, "blocked": True, "reason": g.get("reason","guardrails"), "state": g}
+            job["journal"] = {"status": "blocked", **body, "result": job["result"]}
+            return
         # allow guardrails to adjust weight/order params
-        body = g.get("body", body)
+        job["body"] = g.get("body", body)
     except Exception:
         pass
 
-    cfg = _load_cfg()
-    used_live = False
-    mt5_ticket = None
-    mt5_raw = None
+def _st_size(job: Dict[str, Any]) -> None:
+    job["cfg"] = _load_cfg()
+    job["lots"] = _weight_to_lots(job["body"]["symbol"], float(job["body"].get("weight", 0.0)), job["cfg"])
+
+def _route_venue(symbol: str) -> str:
+    """Router's best enabled venue for the symbol (router.venues); 'MT5' if the router has none."""
+    try:
+        from chamelefx.router import scorer as _scorer
+        d = _scorer.decide(symbol)
+        if d.get("ok"):
+            return str(d["best"]["venue"])
+    except Exception:
+        pass
+    return "MT5"
+
+def _st_route(job: Dict[str, Any]) -> None:
+    market = str(job["body"].get("order_type", "market")).lower() == "market"
+    ready = _mt5_ensure_started(job["cfg"]) if market else False
+    if ready is None:
+        _not_ready(job)
+    job["live"] = bool(ready)
+    if job["live"]:
+        job["venue"] = _route_venue(job["body"]["symbol"])
 
-    # Live path if possible
-    if _mt5_ensure_started(cfg) and order_type.lower() == "market":
-        lots = _weight_to_lots(symbol, float(body.get("weight", 0.0)), cfg)
+def _st_send(job: Dict[str, Any]) -> None:
+    body, symbol = job["body"], job["body"]["symbol"]
+    if job["live"]:
+        lots = job["lots"]
         side_norm = "buy" if str(body.get("side","buy")).lower().startswith("b") else "sell"
-        live = _mt5_place_market(symbol=symbol, side=side_norm, lots=lots)
+        live = _mt5_place_market(symbol=symbol, side=side_norm, lots=lots, venue=job.get("venue"))
         if live.get("ok"):
-            used_live = True
-            mt5_ticket = live.get("ticket")
-            mt5_raw = live.get("raw")
             result = {
                 "ok": True,
                 "live": True,
+                "venue": job.get("venue"),
                 "symbol": symbol,
                 "side": side_norm,
                 "weight": float(body.get("weight", 0.0)),
                 "lots": lots,
-                "ticket": mt5_ticket
+                "ticket": live.get("ticket")
             }
-            _append_recent({"status": "live_sent", **body, "lots": lots, "ticket": mt5_ticket, "result": result})
-            return result
-        else:
-            # If MT5 fails, fall through to echo-ack (dev-safe) but mark as live_failed
-            meta["live_error"] = live
+            job["result"] = result
+            job["journal"] = {"status": "live_sent", **body, "lots": lots, "ticket": live.get("ticket"), "result": result}
+            return
+        # If MT5 fails, fall through to echo-ack (dev-safe) but mark as live_failed
+        job["meta"]["live_error"] = live
 
     # Dev echo path (or fallback)
     result = {
         "ok": True,
         "live": False,
         "symbol": symbol,
-        "side": side,
+        "side": body.get("side"),
         "weight": float(body.get("weight", 0.0)),
-        "order_type": order_type,
+        "order_type": body.get("order_type"),
         "ticket": None,
         "note": "echo (MT5 disabled/unavailable)"
     }
-    _append_recent({"status": "echo", **body, "result": result})
-    return result
+    job["result"] = result
+    job["journal"] = {"status": "echo", **body, "result": result}
+
+def _ack(job: Dict[str, Any]) -> Dict[str, Any]:
+    job["t"]["ack"] = round((time.perf_counter() - job["t0"]) * 1000.0, 4)
+    res = dict(job["result"])
+    res["order_id"] = job["id"]
+    res["timings_ms"] = dict(job["t"])
+    return res
+
+def _st_journal(job: Dict[str, Any]) -> None:
+    if job.get("journal") is not None:
+        _append_recent({"order_id": job["id"], **job["journal"], "timings_ms": dict(job["t"])})
+
+def _record_stats(job: Dict[str, Any]) -> None:
+    venue = (job.get("venue") or "MT5") if job.get("live") else "echo"
+    symbol = job["body"].get("symbol", "")
+    for k, v in job["t"].items():
+        if k in _STATS:
+            _STATS[k].append(v)
+            _latency.record("order." + k, v / 1000.0, venue, symbol)
+
+def _cancelled(job: Dict[str, Any]) -> None:
+    """The caller gave up (ack timeout) before the send stage: never send."""
+    job["result"] = {"ok": False, "live": False, "symbol": job["body"]["symbol"], "cancelled": True,
+                     "error": "ack_timeout"}
+    job["journal"] = {"status": "cancelled", **job["body"], "result": job["result"]}
+
+def _run_inline(job: Dict[str, Any]) -> Dict[str, Any]:
+    _timed("gate", job, _st_gate)
+    for name, fn in (("size", _st_size), ("route", _st_route), ("send", _st_send)):
+        if job["result"] is not None:
+            break
+        _timed(name, job, fn)
+    res = _ack(job)
+    _timed("journal", job, _st_journal)
+    _record_stats(job)
+    return res
+
+class _Pipeline:
+    def __init__(self, maxsize: int = 1024, send_workers: int = 1):
+        self.maxsize = max(1, int(maxsize))
+        self.send_workers = max(1, int(send_workers))
+        self.loop = asyncio.new_event_loop()
+        self.q: Dict[str, asyncio.Queue] = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.send_workers + 1, thread_name_prefix="orders-io")
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._main, args=(ready,), name="orders-pipeline", daemon=True)
+        self._thread.start()
+        ready.wait(5.0)
+
+    def _main(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.q = {k: asyncio.Queue(maxsize=self.maxsize) for k in STAGES}
+        nxt = dict(zip(STAGES, STAGES[1:]))
+        for name, fn, n in (("gate", _st_gate, 1), ("size", _st_size, 1), ("route", _st_route, 1),
+                            ("send", _st_send, self.send_workers), ("journal", _st_journal, 1)):
+            for _ in range(n):
+                self.loop.create_task(self._stage(name, fn, nxt.get(name)))
+        ready.set()
+        self.loop.run_forever()
+
+    async def _stage(self, name: str, fn, nxt: Optional[str]) -> None:
+        q = self.q[name]
+        while True:
+            job, fut = await q.get()
+            # broker / disk I/O (and a possible MT5 start attempt) goes to threads
+            blocking = name == "send" or (name == "route" and _MT5_READY is None)
+            try:
+                if name == "journal":
+                    await self.loop.run_in_executor(self._pool, _timed, name, job, fn)
+                    _record_stats(job)
+                    continue
+                if name == "send" and not fut.set_running_or_notify_cancel():
+                    # place() timed out and cancelled while the order was queued
+                    _cancelled(job)
+                    await self.q["journal"].put((job, fut))
+                    continue
+                if fut.cancelled():
+                    _cancelled(job)
+                    await self.q["journal"].put((job, fut))
+                    continue
+                if blocking:
+                    await self.loop.run_in_executor(self._pool, _timed, name, job, fn)
+                else:
+                    _timed(name, job, fn)
+                if job["result"] is not None:
+                    # blocked at gate or sent: ACK now, journal later
+                    if not fut.done():
+                        fut.set_result(_ack(job))
+                    await self.q["journal"].put((job, fut))
+                else:
+                    await self.q[nxt].put((job, fut))
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+            finally:
+                q.task_done()
+
+    def submit(self, job: Dict[str, Any]) -> Future:
+        fut: Future = Future()
+        asyncio.run_coroutine_threadsafe(self.q["gate"].put((job, fut)), self.loop)
+        return fut
+
+    def depths(self) -> Dict[str, int]:
+        return {k: q.qsize() for k, q in self.q.items()}
+
+    def join(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued order has been through all stages, journal included."""
+        async def _all():
+            for k in STAGES:
+                await self.q[k].join()
+        try:
+            asyncio.run_coroutine_threadsafe(_all(), self.loop).result(timeout)
+            return True
+        except FutureTimeout:
+            return False
+
+_PIPE: Optional[_Pipeline] = None
+_PIPE_LOCK = threading.Lock()
+
+def _pipeline(cfg: Dict[str, Any]) -> Optional[_Pipeline]:
+    global _PIPE
+    pc = _pcfg(cfg)
+    if not pc.get("enabled", True):
+        return None
+    if _PIPE is None:
+        with _PIPE_LOCK:
+            if _PIPE is None:
+                _PIPE = _Pipeline(maxsize=int(pc.get("queue_size", 1024)), send_workers=int(pc.get("send_workers", 1)))
+    return _PIPE
+
+def _pct(a, q: float) -> float:
+    if not a: return 0.0
+    s = sorted(a)
+    return float(s[min(len(s)-1, int(q*len(s)))])
+
+def pipeline_stats() -> Dict[str, Any]:
+    """Per-stage latency (ms) over the last 2048 orders plus queue depths."""
+    out = {}
+    for k, d in _STATS.items():
+        a = list(d)
+        out[k] = {"n": len(a), "avg": (sum(a)/len(a)) if a else 0.0, "p50": _pct(a, 0.50), "p99": _pct(a, 0.99),
+                  "max": max(a) if a else 0.0}
+    return {"ok": True, "stages": out, "queues": _PIPE.depths() if _PIPE else {}}
+
+# -------- Public API ----------------------------------------------------------
+
+def submit(symbol: str,
+           side: str = "buy",
+           weight: float = 0.0,
+           order_type: str = "market",
+           price: Optional[float] = None,
+           meta: Optional[Dict[str, Any]] = None) -> Future:
+    """Queue an order; the future resolves with the ACK once the send stage is done."""
+    job = _new_job(symbol, side, weight, order_type, price, meta)
+    pipe = _pipeline(_load_cfg())
+    if pipe is None:
+        fut: Future = Future()
+        try:
+            fut.set_result(_run_inline(job))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+    return pipe.submit(job)
+
+async def place_async(symbol: str, side: str = "buy", weight: float = 0.0, order_type: str = "market",
+                      price: Optional[float] = None, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return await asyncio.wrap_future(submit(symbol, side, weight, order_type, price, meta))
+
+def place(symbol: str,
+          side: str = "buy",
+          weight: float = 0.0,
+          order_type: str = "market",
+          price: Optional[float] = None,
+          meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Unified order entry:
+      - runs guardrails (best-effort)
+      - if MT5 enabled + available: route to MT5
+      - else: local echo (dry ACK) for dev
+      - always journals the order echo to the trade store (runtime/trades.db)
+    Runs through the staged pipeline; returns the ACK (with order_id and
+    per-stage timings_ms) as soon as the order is sent. Journaling completes
+    asynchronously. If no ACK arrives within ack_timeout_sec the order is
+    cancelled (it will not be sent) and TimeoutError is raised; an order that
+    is already at the send stage cannot be recalled, so its ACK is awaited.
+    """
+    timeout = float(_pcfg(_load_cfg()).get("ack_timeout_sec", 30.0))
+    fut = submit(symbol, side, weight, order_type, price, meta)
+    try:
+        return fut.result(timeout=timeout)
+    except FutureTimeout:
+        if fut.cancel():
+            raise
+        return fut.result(timeout=timeout)
+
+# -------- Baskets ---------------------------------------------------------------
+
+_BASKET_POOL: Optional[ThreadPoolExecutor] = None
+_BASKET_MAX = 64
+
+def _basket_pool() -> ThreadPoolExecutor:
+    """Shared leg pool sized to the concurrency cap; each basket bounds its own
+    share with a semaphore, so the pool is never resized under a running basket."""
+    global _BASKET_POOL
+    with _PIPE_LOCK:
+        if _BASKET_POOL is None:
+            _BASKET_POOL = ThreadPoolExecutor(max_workers=_BASKET_MAX, thread_name_prefix="basket")
+    return _BASKET_POOL
+
+def _lots_vec(weights, cfg: Dict[str, Any]):
+    """Vectorized _weight_to_lots."""
+    lot_scale = float((((cfg.get("execution") or {}).get("router") or {}).get("lot_scale", 1.0)))
+    return np.clip(np.abs(np.asarray(weights, dtype=float)) / 0.10 * 0.10 * lot_scale, 0.01, 5.0)
+
+def place_basket(legs, concurrency: Optional[int] = None, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Place a multi-leg basket: one guardrails pass for all legs, one sizing
+    pass, then legs dispatched concurrently (at most `concurrency` in flight,
+    default execution.basket.concurrency or 8). `legs` is a list of
+    {symbol, weight, side?} (side defaults to the sign of weight) or a
+    {symbol: weight} mapping. Returns per-leg results in input order plus
+    timings_ms for gate/size/route/dispatch/journal/total. The broker calls
+    themselves are serialized (mt5_session thread; a lock in stub mode).
+    """
+    t0 = time.perf_counter()
+    tm: Dict[str, float] = {}
+    def lap(k: str, t: float) -> float:
+        now = time.perf_counter(); tm[k] = round((now - t) * 1000.0, 4); return now
+
+    if isinstance(legs, dict):
+        legs = [{"symbol": k, "weight": v} for k, v in legs.items()]
+    basket_id = f"basket-{int(time.time()*1000)}-{next(_SEQ)}"
+    jobs = []
+    for leg in legs or []:
+        w = float(leg.get("weight", 0.0))
+        side = str(leg.get("side") or ("sell" if w < 0 else "buy")).lower()
+        m = {**(meta or {}), **(leg.get("meta") or {}), "basket_id": basket_id}
+        jobs.append(_new_job(str(leg.get("symbol", "")).upper(), side, abs(w), str(leg.get("order_type", "market")),
+                             leg.get("price"), m))
+    if not jobs:
+        return {"ok": False, "error": "empty_basket", "legs": []}
+
+    # gate: one call for the whole basket
+    t = time.perf_counter()
+    try:
+        from chamelefx.ops.guardrails import pretrade_gate_batch as _gate_batch
+        gates = _gate_batch([dict(j["body"]) for j in jobs])["results"]
+    except Exception:
+        gates = [{"ok": True} for _ in jobs]
+    for j, g in zip(jobs, gates):
+        if not g.get("ok") or g.get("blocked"):
+            j["result"] = {"ok": False, "blocked": True, "reason": g.get("reason","guardrails"), "state": g}
+            j["journal"] = {"status": "blocked", **j["body"], "result": j["result"]}
+        else:
+            j["body"] = g.get("body", j["body"])
+    t = lap("gate", t)
+
+    # size: all legs at once
+    cfg = _load_cfg()
+    live_jobs = [j for j in jobs if j["result"] is None]
+    lots = _lots_vec([j["body"].get("weight", 0.0) for j in live_jobs], cfg) if live_jobs else []
+    for j, l in zip(live_jobs, lots):
+        j["cfg"] = cfg
+        j["lots"] = float(l)
+    t = lap("size", t)
+
+    # route: one readiness probe
+    live_ok = _mt5_ensure_started(cfg)
+    for j in live_jobs:
+        market = str(j["body"].get("order_type","market")).lower() == "market"
+        if market and live_ok is None:
+            _not_ready(j)
+        j["live"] = bool(live_ok and market)
+        if j["live"]:
+            j["venue"] = _route_venue(j["body"]["symbol"])
+    live_jobs = [j for j in live_jobs if j["result"] is None]
+    t = lap("route", t)
+
+    # dispatch: bounded concurrency
+    n = max(1, int(concurrency or ((cfg.get("execution") or {}).get("basket") or {}).get("concurrency", 8)))
+    if len(live_jobs) > 1 and n > 1:
+        pool = _basket_pool()
+        sem = threading.BoundedSemaphore(min(n, _BASKET_MAX))
+        def run(j):
+            try:
+                _timed("send", j, _st_send)
+            finally:
+                sem.release()
+        futs = []
+        for j in live_jobs:
+            sem.acquire()        # window taken before submit: no pool thread idles on another basket's cap
+            try:
+                futs.append(pool.submit(run, j))
+            except Exception:
+                sem.release()
+        for f in futs:
+            try:
+                f.result()
+            except Exception:
+                pass   # leg keeps result None -> reported as send_failed below
+    else:
+        for j in live_jobs:
+            _timed("send", j, _st_send)
+    for j in live_jobs:
+        if j["result"] is None:
+            j["result"] = {"ok": False, "error": "send_failed"}
+        _record_stats(j)
+    t = lap("dispatch", t)
+
+    results = []
+    for j in jobs:
+        r = dict(j["result"]); r["order_id"] = j["id"]; r["symbol"] = j["body"]["symbol"]
+        if "lots" in j: r.setdefault("lots", j["lots"])
+        if "send" in j["t"]: r["send_ms"] = j["t"]["send"]
+        results.append(r)
+
+    # journal: one batched insert for all legs
+    try:
+        from chamelefx.integrations import trade_store as _store
+        _store.add_orders([{"order_id": j["id"], **j["journal"]} for j in jobs if j.get("journal") is not None])
+    except Exception:
+        pass
+    lap("journal", t)
+    tm["total"] = round((time.perf_counter() - t0) * 1000.0, 4)
+    return {"ok": all(r.get("ok") for r in results), "basket_id": basket_id, "n": len(results),
+            "blocked": sum(1 for r in results if r.get("blocked")),
+            "failed": sum(1 for r in results if not r.get("ok") and not r.get("blocked")),
+            "concurrency": n, "legs": results, "timings_ms": tm}
 
 # ------------------------------------------------------------------------------
 
@@ -1,21 +1,13 @@
 from __future__ import annotations
 import statistics
 from typing import Dict, Any, List
-
-def _live_weighting():
-    import importlib
-    try: return importlib.import_module("chamelefx.alpha.weighting")
-    except Exception:
-        class _W:
-            @staticmethod
-            def weight_from_signal(s, method="kelly", clamp=0.35, params=None):
-                return max(-clamp, min(clamp, float(s)*0.1))
-        return _W
+import numpy as np
+from chamelefx.alpha import weighting as W
 
 def sizing_parity(signals: List[float], method="kelly", clamp=0.35)->Dict[str, Any]:
-    W = _live_weighting()
+    # live path (scalar, per signal) vs backtest path (one vectorized call)
     live = [float(W.weight_from_signal(s, method=method, clamp=clamp, params={})) for s in signals]
-    bt   = [float(W.weight_from_signal(s, method=method, clamp=clamp, params={})) for s in signals]
+    bt   = W.weights_from_signals(np.asarray(signals, dtype=float), method=method, clamp=clamp, params={}).tolist()
     def _mape(a,b):
         eps=1e-12
         return sum(abs(x-y)/max(eps, abs(y)) for x,y in zip(a,b))/max(1,len(a))
@@ -25,7 +17,8 @@ def sizing_parity(signals: List[float], method="kelly", clamp=0.35)->Dict[str, A
             return float(statistics.correlation(a,b))
         except Exception:
             return 0.0
-    return {"ok": True, "mape": _mape(live,bt), "corr": _corr(live,bt), "samples": len(signals)}
+    diff = max((abs(x-y) for x,y in zip(live,bt)), default=0.0)
+    return {"ok": True, "mape": _mape(live,bt), "corr": _corr(live,bt), "max_abs_diff": diff, "samples": len(signals)}
 
 def signal_parity(live: List[float], bt: List[float])->Dict[str, Any]:
     # Compare two signal streams (e.g., live vs backtest)
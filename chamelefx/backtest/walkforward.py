@@ -1,9 +1,16 @@
 from __future__ import annotations
-import json, time, statistics
+import json, os, threading, time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
 import random
 
+import numpy as np
+
+from chamelefx.utils import config as _config
+
 ROOT = Path(__file__).resolve().parents[2]
 TEL  = ROOT / "data" / "telemetry"
 WF_JSON = TEL / "walkforward_pro.json"
@@ -16,79 +23,177 @@ def _save(obj: Dict[str, Any]):
     tmp.replace(WF_JSON)
 
 def _cfg()->Dict[str, Any]:
-    import json
-    p = ROOT / "chamelefx" / "config.json"
-    try: return json.loads(p.read_text(encoding="utf-8"))
-    except Exception: return {}
+    return _config.get()
 
-def _hist_ret(symbol: str, n: int)->List[float]:
-    # Try databank if present
+def _hist_ret(symbol: str, n: int)->Tuple[List[float], str]:
+    """(returns, source): databank returns when it holds at least n bars, else toy returns."""
     try:
         from chamelefx.databank import history_returns
         arr = history_returns(symbol=symbol, lookback=n)
-        if arr: return [float(x) for x in arr]
+        if len(arr) >= n: return arr.tolist(), "databank"
     except Exception:
         pass
-    # Toy returns if none
-    return [random.gauss(0.0002, 0.002) for _ in range(n)]
-
-def _equity(rets: List[float])->List[float]:
-    eq=1.0; out=[]
-    for r in rets:
-        eq *= (1.0 + float(r))
-        out.append(eq)
-    return out
+    return [random.gauss(0.0002, 0.002) for _ in range(n)], "synthetic"
+
+def _walk(R: np.ndarray, start_train: int, window: int, test: int) -> Tuple[Dict[str, Any], np.ndarray]:
+    """One WF slice: naive mean-direction strategy fitted on train, applied to test."""
+    train = R[start_train:start_train+window]
+    testR = R[start_train+window:start_train+window+test]
+    bias = 1.0 if int((train > 0).sum()) >= len(train)/2 else -1.0
+    stratR = bias * testR
+    eq = np.cumprod(1.0 + stratR)
+    sd = float(stratR.std()) if len(stratR) >= 2 else 0.0
+    run = {
+        "train_i": int(start_train),
+        "train_len": int(len(train)),
+        "test_len": int(len(testR)),
+        "bias": bias,
+        "equity_last": float(eq[-1]) if len(eq) else 1.0,
+        "sharpe_approx": float(stratR.mean()/(sd or 1e-9)) if len(stratR) >= 2 else 0.0,
+    }
+    return run, eq
+
+# per-worker attachments, keyed by segment name (the pool lives for one run)
+_ATTACHED: Dict[str, Any] = {}
+
+def _attach(name: str):
+    shm = _ATTACHED.get(name)
+    if shm is None:
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13; pool children share the parent's resource tracker
+            shm = shared_memory.SharedMemory(name=name)
+        _ATTACHED[name] = shm
+    return shm
 
-def _sharpe(rets: List[float])->float:
-    if len(rets) < 2: return 0.0
-    mu = statistics.mean(rets)
-    sd = statistics.pstdev(rets) or 1e-9
-    return float(mu/sd)
+def _job(symbol: str, shm_name: str, n: int, start_train: int, window: int, test: int):
+    R = np.ndarray((n,), dtype=np.float64, buffer=_attach(shm_name).buf)
+    run, eq = _walk(R, start_train, window, test)
+    return symbol, run, eq
 
-def _slice_walk(symbol: str, window:int, step:int, test:int)->Dict[str, Any]:
+def _starts(n: int, window: int, step: int, test: int) -> List[int]:
+    return list(range(0, n - window - test + 1, max(1, step)))
+
+# progress per run id (most recent KEEP_RUNS runs)
+KEEP_RUNS = 32
+_RUNS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_PLOCK = threading.Lock()
+
+def _progress(run_id: str, **kw):
+    with _PLOCK:
+        p = _RUNS.get(run_id)
+        if p is None:
+            p = _RUNS[run_id] = {"run_id": run_id}
+            while len(_RUNS) > KEEP_RUNS:
+                _RUNS.popitem(last=False)
+        p.update(kw)
+
+def _tick(run_id: str):
+    with _PLOCK:
+        p = _RUNS.get(run_id)
+        if p is not None:
+            p["done"] = p.get("done", 0) + 1
+
+def progress(run_id: str|None=None) -> Dict[str, Any]:
+    """Progress of one run (default: the most recently started)."""
+    with _PLOCK:
+        if run_id is None and _RUNS:
+            run_id = next(reversed(_RUNS))
+        p = dict(_RUNS.get(run_id) or {"state": "idle" if run_id is None else "unknown", "run_id": run_id})
+        running = [k for k, v in _RUNS.items() if v.get("state") == "running"]
+    if p.get("total"):
+        p["pct"] = round(100.0 * p.get("done", 0) / p["total"], 1)
+    return {"ok": True, **p, "running": running}
+
+def run(symbols: List[str]|None=None, window:int|None=None, step:int|None=None, test:int|None=None,
+        workers:int|None=None, run_id:str|None=None)->Dict[str, Any]:
     """
-    Rolling WF with multiple slices:
-    - train windows advance by `step`
-    - each emits a test slice with naive mean-direction strategy for demo.
+    Serial by default; with workers > 1 (argument or backtest.walkforward.workers,
+    capped at the CPU count) (symbol, slice) jobs fan out over a process pool.
+    Return series are placed in shared memory once per symbol; workers attach by
+    name instead of receiving pickled copies. Results stream back via as_completed
+    (see progress(run_id)), and all equity curves of the run go to one compressed
+    .npz in EQ_DIR.
     """
-    need = window + test + 3*step
-    R = _hist_ret(symbol, need)
-    runs=[]; curves=[]
-    start_train = 0
-    while start_train + window + test <= len(R):
-        train = R[start_train:start_train+window]
-        testR = R[start_train+window:start_train+window+test]
-        bias = 1.0 if sum(1 for r in train if r>0) >= len(train)/2 else -1.0
-        stratR = [bias*r for r in testR]
-        eq = _equity(stratR)
-        runs.append({
-            "train_i": start_train,
-            "train_len": len(train),
-            "test_len": len(testR),
-            "bias": bias,
-            "equity_last": eq[-1] if eq else 1.0,
-            "sharpe_approx": _sharpe(stratR)
-        })
-        curves.append(eq)
-        start_train += step
-    # Save curves to files
-    EQ_DIR.mkdir(parents=True, exist_ok=True)
-    for i, c in enumerate(curves):
-        (EQ_DIR / f"{symbol}_run{i}.json").write_text(json.dumps(c), encoding="utf-8")
-    return {"symbol": symbol, "runs": runs, "curves": len(curves)}
-
-def run(symbols: List[str]|None=None, window:int|None=None, step:int|None=None, test:int|None=None)->Dict[str, Any]:
     cfg = _cfg().get("backtest", {}).get("walkforward", {})
     symbols = symbols or cfg.get("symbols", ["EURUSD","GBPUSD","USDJPY"])
     window  = int(window or cfg.get("window", 1000))
     step    = int(step or cfg.get("step", 200))
     test    = int(test or cfg.get("test", 250))
-    out={"ok": True, "ts": time.time(), "wf": []}
+    need = window + test + 3*step
+    hist = {s: _hist_ret(s, need) for s in symbols}
+    series = {s: np.ascontiguousarray(r, dtype=np.float64) for s, (r, _) in hist.items()}
+    jobs = [(s, i) for s in symbols for i in _starts(len(series[s]), window, step, test)]
+    workers = max(1, min(int(workers or cfg.get("workers", 1)), os.cpu_count() or 1, len(jobs) or 1))
+    run_id = run_id or time.strftime("%Y%m%d_%H%M%S") + f"_{os.getpid()}_{time.time_ns() % 10**6:06d}"
+    t0 = time.time()
+    _progress(run_id, state="running", total=len(jobs), done=0, workers=workers, started=t0, finished=None, error=None)
+
+    runs: Dict[str, List[Tuple[Dict[str, Any], np.ndarray]]] = {s: [] for s in symbols}
+    segs: List[shared_memory.SharedMemory] = []
+    try:
+        if workers == 1:
+            for s, i in jobs:
+                runs[s].append(_walk(series[s], i, window, test))
+                _tick(run_id)
+        else:
+            names = {}
+            for s, R in series.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(1, R.nbytes))
+                np.ndarray(R.shape, dtype=np.float64, buffer=shm.buf)[:] = R
+                segs.append(shm); names[s] = shm.name
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                futs = [ex.submit(_job, s, names[s], len(series[s]), i, window, test) for s, i in jobs]
+                for fut in as_completed(futs):
+                    s, r, eq = fut.result()
+                    runs[s].append((r, eq))
+                    _tick(run_id)
+    except Exception as e:
+        _progress(run_id, state="error", error=str(e), finished=time.time())
+        raise
+    finally:
+        for shm in segs:
+            shm.close(); shm.unlink()
+
+    out={"ok": True, "ts": t0, "run_id": run_id, "workers": workers, "wf": []}
+    arrays = {}
     for s in symbols:
-        out["wf"].append(_slice_walk(s, window, step, test))
+        rs = sorted(runs[s], key=lambda x: x[0]["train_i"])
+        for i, (_, eq) in enumerate(rs):
+            arrays[f"{s}_run{i}"] = eq
+        out["wf"].append({"symbol": s, "source": hist[s][1], "runs": [r for r, _ in rs], "curves": len(rs)})
+    EQ_DIR.mkdir(parents=True, exist_ok=True)
+    path = EQ_DIR / f"wf_{run_id}.npz"
+    np.savez_compressed(path, **arrays)
+    _prune_curves(path)
+    out["curves_file"] = str(path)
+    out["elapsed"] = round(time.time() - t0, 4)
     _save(out)
+    _progress(run_id, state="done", finished=time.time())
     return out
 
+def _prune_curves(keep: Path) -> None:
+    """Keep the KEEP_RUNS newest wf_*.npz curve files."""
+    try:
+        files = sorted(EQ_DIR.glob("wf_*.npz"), key=lambda p: p.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for p in files[KEEP_RUNS:]:
+        if p != keep:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+def curves(path: str|None=None)->Dict[str, List[float]]:
+    """Equity curves of a run (latest run if no path), keyed "<SYMBOL>_run<i>"."""
+    try:
+        p = Path(path) if path else Path(summary().get("curves_file", ""))
+        with np.load(p) as z:
+            return {k: z[k].tolist() for k in z.files}
+    except Exception:
+        return {}
+
 def summary()->Dict[str, Any]:
     try: return json.loads(WF_JSON.read_text(encoding="utf-8"))
     except Exception: return {"ok": False, "error": "no_walkforward_pro"}
@@ -0,0 +1,5 @@
+from __future__ import annotations
+# Columnar, memory-mapped price history (see databank/columnar.py)
+from .columnar import build, load, slice_range, tail, symbols, history_returns
+
+__all__ = ["build", "load", "slice_range", "tail", "symbols", "history_returns"]
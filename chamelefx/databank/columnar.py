@@ -0,0 +1,165 @@
+"""
+Columnar, memory-mapped price history.
+
+data/history/<SYMBOL>.csv (ts,open,high,low,close) is converted once into
+data/columnar/<SYMBOL>/<field>.<gen>.npy -- one array per field -- and afterwards
+opened with ``np.load(mmap_mode="r")``. Loading is O(1) regardless of history
+length; time-range slices are views (no copy). A column set is rebuilt
+automatically when its source CSV changes: a rebuild writes a new generation
+of files and then swaps meta.json atomically, so files that readers still have
+mapped are never replaced in place (which fails on Windows).
+"""
+from __future__ import annotations
+import json, os, threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from chamelefx.log import get_logger
+
+log = get_logger(__name__)
+
+ROOT = Path(__file__).resolve().parents[2]
+HIST = ROOT / "data" / "history"
+COLS = ROOT / "data" / "columnar"
+
+FIELDS = ("ts", "open", "high", "low", "close")
+_DTYPES = {"ts": np.int64}
+
+_lock = threading.Lock()
+_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def _sym(symbol: str) -> str:
+    return str(symbol or "").upper()
+
+
+def _src_sig(csv: Path) -> Dict[str, int]:
+    st = csv.stat()
+    return {"mtime_ns": int(st.st_mtime_ns), "size": int(st.st_size)}
+
+
+def _read_meta(d: Path) -> Dict[str, Any]:
+    try:
+        return json.loads((d / "meta.json").read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _save_npy(p: Path, arr: np.ndarray) -> None:
+    tmp = p.with_name(p.stem + ".tmp.npy")
+    np.save(tmp, arr)
+    os.replace(tmp, p)
+
+
+def _col_path(d: Path, field: str, meta: Dict[str, Any]) -> Path:
+    gen = meta.get("gen")
+    return d / (f"{field}.npy" if gen is None else f"{field}.{int(gen)}.npy")
+
+
+def _gc_generations(d: Path, meta: Dict[str, Any]) -> None:
+    """Remove column files of older generations; ones still mapped elsewhere are left for the next build."""
+    keep = {_col_path(d, k, meta).name for k in meta.get("fields", FIELDS)}
+    for p in d.glob("*.npy"):
+        if p.name not in keep:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+def symbols() -> List[str]:
+    names = {p.stem.upper() for p in HIST.glob("*.csv")}
+    if COLS.exists():
+        names |= {p.name.upper() for p in COLS.iterdir() if (p / "meta.json").exists()}
+    return sorted(names)
+
+
+def build(symbol: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+    """Convert CSV history into per-field .npy columns (all symbols if none given)."""
+    todo = [_sym(symbol)] if symbol else [p.stem.upper() for p in HIST.glob("*.csv")]
+    built, skipped = [], []
+    for sym in todo:
+        csv = HIST / f"{sym}.csv"
+        if not csv.exists():
+            skipped.append(sym)
+            continue
+        out = COLS / sym
+        sig = _src_sig(csv)
+        if not force and _read_meta(out).get("source") == sig:
+            skipped.append(sym)
+            continue
+        with open(csv, "r", encoding="utf-8") as f:
+            header = [h.strip().lower() for h in f.readline().split(",")]
+        idx = [header.index(k) for k in FIELDS]
+        raw = np.loadtxt(csv, delimiter=",", skiprows=1, usecols=idx, ndmin=2, dtype=np.float64)
+        order = np.argsort(raw[:, 0], kind="stable")
+        raw = raw[order]
+        if raw.shape[0]:
+            # drop duplicate timestamps, keep the last row written for each
+            keep = np.append(raw[1:, 0] != raw[:-1, 0], True)
+            raw = raw[keep]
+        out.mkdir(parents=True, exist_ok=True)
+        meta = {"symbol": sym, "rows": int(raw.shape[0]), "fields": list(FIELDS), "source": sig,
+                "gen": int(_read_meta(out).get("gen", 0)) + 1}
+        for j, k in enumerate(FIELDS):
+            _save_npy(_col_path(out, k, meta), np.ascontiguousarray(raw[:, j], dtype=_DTYPES.get(k, np.float64)))
+        tmp = out / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        os.replace(tmp, out / "meta.json")          # readers switch to the new generation here
+        with _lock:
+            _cache.pop(sym, None)                   # drop our maps of the old generation
+        _gc_generations(out, meta)
+        built.append(sym)
+    return {"ok": True, "built": built, "skipped": skipped}
+
+
+def load(symbol: str) -> Dict[str, np.ndarray]:
+    """Memory-mapped columns for a symbol, e.g. ``load("EURUSD")["close"]``."""
+    sym = _sym(symbol)
+    d = COLS / sym
+    csv = HIST / f"{sym}.csv"
+    meta = _read_meta(d)
+    if csv.exists() and meta.get("source") != _src_sig(csv):
+        build(sym)
+        meta = _read_meta(d)
+    if not meta:
+        raise KeyError(f"no history for {sym}")
+    with _lock:
+        hit = _cache.get(sym)
+        if hit and hit["meta"] == meta:
+            return hit["cols"]
+        cols = {k: np.load(_col_path(d, k, meta), mmap_mode="r") for k in meta.get("fields", FIELDS)}
+        _cache[sym] = {"meta": meta, "cols": cols}
+        return cols
+
+
+def slice_range(symbol: str, start: Optional[float] = None, end: Optional[float] = None,
+                fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Bars with start <= ts < end as zero-copy views into the mapped columns."""
+    cols = load(symbol)
+    ts = cols["ts"]
+    i = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+    j = len(ts) if end is None else int(np.searchsorted(ts, end, side="left"))
+    return {k: cols[k][i:j] for k in (fields or cols.keys())}
+
+
+def tail(symbol: str, n: int, fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Last ``n`` bars as views."""
+    cols = load(symbol)
+    n = max(0, int(n))
+    return {k: cols[k][-n:] if n else cols[k][:0] for k in (fields or cols.keys())}
+
+
+def history_returns(symbol: str, lookback: Optional[int] = None, field: str = "close") -> np.ndarray:
+    """Simple returns of the last ``lookback`` bars (fewer if history is shorter)."""
+    px = load(symbol)[field]
+    if lookback is not None:
+        px = px[-(int(lookback) + 1):]
+    if len(px) < 2:
+        return np.empty(0, dtype=np.float64)
+    prev = px[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(prev != 0, px[1:] / prev - 1.0, 0.0)
+    return r
@@ -1,28 +1,21 @@
 from __future__ import annotations
-import os, json, time, math
+import os, time, math
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+from chamelefx.utils.journal import Journal
+from chamelefx.utils.ttlcache import cached
 
 ROOT = Path(__file__).resolve().parents[2]
 DATA = ROOT / "data" / "telemetry"
 FILE = DATA / "execution_costs.json"
 
-def _load() -> Dict[str, Any]:
-    try:
-        return json.loads(FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return {"symbols": {}, "ts": time.time()}
+def _default() -> Dict[str, Any]:
+    return {"symbols": {}, "ts": time.time()}
 
-def _save(obj: Dict[str, Any]) -> None:
-    DATA.mkdir(parents=True, exist_ok=True)
-    tmp = FILE.with_suffix(".json.tmp")
-    tmp.write_text(json.dumps(obj, indent=2), encoding="utf-8")
-    tmp.replace(FILE)
-
-def _roll(arr: List[float], cap: int) -> List[float]:
-    if cap <= 0: return arr
-    if len(arr) > cap: return arr[-cap:]
-    return arr
+def _roll(arr: List[float], x: float, cap: int) -> None:
+    arr.append(float(x))
+    if cap > 0 and len(arr) > cap:
+        del arr[:len(arr) - cap]
 
 def _bps(a: float, b: float) -> float:
     try:
@@ -30,29 +23,40 @@ def _bps(a: float, b: float) -> float:
     except Exception:
         return 0.0
 
-def record_fill(symbol: str, px: float, side: str, ref_vwap: Optional[float]=None, ref_mid: Optional[float]=None, qty: float=1.0) -> Dict[str, Any]:
-    """
-    Update execution cost telemetry. Stores:
-      - slippage_bps (fill vs mid)
-      - is_bps (implementation shortfall vs ref_vwap)
-    """
-    d = _load()
-    sym = d["symbols"].setdefault(symbol, {"fills":0,"slippage_bps":[],"is_bps":[],"vwap_ref":[],"mid_ref":[]})
+def _apply(d: Dict[str, Any], ev: Dict[str, Any]) -> None:
+    sym = d.setdefault("symbols", {}).setdefault(ev["symbol"], {"fills":0,"slippage_bps":[],"is_bps":[],"vwap_ref":[],"mid_ref":[]})
     sym["fills"] = int(sym.get("fills",0)) + 1
+    sell = str(ev.get("side","")).lower().startswith("s")
+    px, ref_mid, ref_vwap = ev["px"], ev.get("ref_mid"), ev.get("ref_vwap")
     if ref_mid is not None:
         # if buy, positive slippage if fill > mid; if sell, reverse sign
         s_bps = _bps(px, ref_mid)
-        if str(side).lower().startswith("s"): s_bps = -s_bps
-        sym["slippage_bps"] = _roll(sym.get("slippage_bps",[]) + [s_bps], 1000)
+        if sell: s_bps = -s_bps
+        _roll(sym.setdefault("slippage_bps",[]), s_bps, 1000)
+        _roll(sym.setdefault("mid_ref",[]), ref_mid, 200)
     if ref_vwap is not None:
         isb = _bps(px, ref_vwap)
-        if str(side).lower().startswith("s"): isb = -isb
-        sym["is_bps"] = _roll(sym.get("is_bps",[]) + [isb], 1000)
-        sym["vwap_ref"] = _roll(sym.get("vwap_ref",[]) + [ref_vwap], 200)
-    if ref_mid is not None:
-        sym["mid_ref"] = _roll(sym.get("mid_ref",[]) + [ref_mid], 200)
-    d["ts"] = time.time()
-    _save(d)
+        if sell: isb = -isb
+        _roll(sym.setdefault("is_bps",[]), isb, 1000)
+        _roll(sym.setdefault("vwap_ref",[]), ref_vwap, 200)
+    d["ts"] = ev.get("ts", time.time())
+
+_J = Journal(FILE, _apply, _default)
+
+def _load() -> Dict[str, Any]:
+    return _J.load()
+
+def record_fill(symbol: str, px: float, side: str, ref_vwap: Optional[float]=None, ref_mid: Optional[float]=None, qty: float=1.0) -> Dict[str, Any]:
+    """
+    Update execution cost telemetry. Stores:
+      - slippage_bps (fill vs mid)
+      - is_bps (implementation shortfall vs ref_vwap)
+    """
+    _J.append({"symbol": symbol, "px": float(px), "side": str(side),
+               "ref_vwap": None if ref_vwap is None else float(ref_vwap),
+               "ref_mid": None if ref_mid is None else float(ref_mid),
+               "qty": float(qty), "ts": time.time()})
+    summary_all.cache_clear()
     return {"ok": True, "symbol": symbol}
 
 def symbol_summary(symbol: str, window: int = 200) -> Dict[str, Any]:
@@ -72,6 +76,7 @@ def symbol_summary(symbol: str, window: int = 200) -> Dict[str, Any]:
         "samples_is": len(isv)
     }
 
+@cached(ttl=2.0)
 def summary_all(window: int = 200) -> Dict[str, Any]:
     d = _load()
     out = {}
@@ -2,6 +2,7 @@ from __future__ import annotations
 import time, json, os
 from pathlib import Path
 from typing import Dict, Any, List
+from chamelefx.utils import config as _config
 
 ROOT = Path(__file__).resolve().parents[2]
 CFX  = ROOT / "chamelefx"
@@ -9,10 +10,7 @@ CFG_PATH = CFX / "config.json"
 STATE = CFX / "runtime" / "router_state.json"
 
 def _load_cfg() -> Dict[str, Any]:
-    try:
-        return json.loads(CFG_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return _config.get()
 
 def _load_state() -> Dict[str, Any]:
     try:
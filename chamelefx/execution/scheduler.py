@@ -0,0 +1,405 @@
+"""
+Execution-algorithm scheduler (TWAP / VWAP / POV).
+
+All parent orders share one asyncio loop thread and one hashed timer wheel:
+the driver wakes once per tick, fires the parents whose slot is due and
+re-arms them, so hundreds of concurrent algos cost one timer, not one thread
+each. Children are sent through orders_bridge.submit() (quantities are in the
+same weight units orders_bridge uses).
+
+  twap  child target follows total * (elapsed + interval)/duration
+  vwap  child target follows the cumulative volume profile (U-shape by default)
+  pov   child target = rate * volume observed since start (report_volume)
+
+Every child is additionally capped at pov_cap x volume observed over the last
+interval once volume for the symbol has been reported; pov_cap defaults to
+config execution.router.pov_cap (0.10). Parents can be cancelled or amended
+(total, end, rate, interval) while working.
+
+No child is smaller than ``min_child``, which is at least the broker's
+minimum lot expressed in weight (orders_bridge rounds anything smaller up to
+0.01 lots): slices below it accumulate into the next one, and a tail below it
+is merged into the current slice. Children are handed to the sender on a
+worker thread, outside the scheduler lock. Finished parents are evicted
+``keep_sec`` after their last update (config execution.scheduler.keep_sec).
+"""
+from __future__ import annotations
+import asyncio, itertools, math, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from chamelefx.log import get_logger
+from chamelefx.utils import config as _config
+
+log = get_logger(__name__)
+
+ALGOS = ("twap", "vwap", "pov")
+EPS = 1e-9
+MIN_LOTS = 0.01          # orders_bridge._weight_to_lots floor
+KEEP_SEC = 3600.0
+_SEQ = itertools.count(1)
+
+
+def _pov_cap_default() -> float:
+    return float(_config.value("execution.router.pov_cap", 0.10, float))
+
+
+def _lot_floor() -> float:
+    """Smallest weight orders_bridge sends without rounding up (lots = weight * lot_scale)."""
+    return MIN_LOTS / max(EPS, float(_config.value("execution.router.lot_scale", 1.0, float)))
+
+
+def _u_profile(n: int) -> List[float]:
+    """Intraday-style U curve: heavier first/last slices."""
+    if n <= 1:
+        return [1.0]
+    w = [1.0 + 1.5 * (2.0 * i / (n - 1) - 1.0) ** 2 for i in range(n)]
+    s = sum(w)
+    return [x / s for x in w]
+
+
+class _Wheel:
+    """Hashed timer wheel: `slots` buckets of `tick` seconds, multi-round entries."""
+
+    def __init__(self, tick: float = 0.05, slots: int = 512):
+        self.tick = float(tick)
+        self.slots: List[List[list]] = [[] for _ in range(int(slots))]
+        self.cursor = 0
+        self.base = time.monotonic()   # monotonic time of the current cursor position
+        self.size = 0
+
+    def add(self, due: float, key: str) -> None:
+        ticks = max(1, int(math.ceil((due - self.base) / self.tick - 1e-9)))
+        n = len(self.slots)
+        self.slots[(self.cursor + ticks) % n].append([(ticks - 1) // n, key])
+        self.size += 1
+
+    def advance(self) -> List[str]:
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        self.base += self.tick
+        slot = self.slots[self.cursor]
+        fire, keep = [], []
+        for e in slot:
+            if e[0] <= 0:
+                fire.append(e[1])
+            else:
+                e[0] -= 1
+                keep.append(e)
+        self.slots[self.cursor] = keep
+        self.size -= len(fire)
+        return fire
+
+
+class _Parent:
+    __slots__ = ("id", "algo", "symbol", "side", "total", "start", "end", "interval", "rate", "pov_cap",
+                 "profile", "min_child", "status", "done_qty", "inflight", "children", "created", "updated",
+                 "vol0", "vol_last", "error")
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {k: getattr(self, k) for k in self.__slots__ if k not in ("children", "profile")}
+        d["remaining"] = max(0.0, self.total - self.done_qty)
+        d["progress"] = (self.done_qty / self.total) if self.total > 0 else 1.0
+        d["n_children"] = len(self.children)
+        d["children"] = list(self.children)[-20:]
+        return d
+
+
+class Scheduler:
+    def __init__(self, tick: float = 0.05, slots: int = 512, sender=None,
+                 floor: Optional[Callable[[], float]] = None, keep_sec: float = KEEP_SEC):
+        self.wheel = _Wheel(tick, slots)
+        self.sender = sender               # callable(symbol, side, weight, meta) -> concurrent Future
+        self.floor = floor or (lambda: 0.0)  # smallest child the sender executes exactly
+        self.keep_sec = float(keep_sec)
+        self._pruned = 0.0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exec-send")
+        self.parents: Dict[str, _Parent] = {}
+        self.volume: Dict[str, float] = {}  # cumulative observed volume per symbol
+        self._lock = threading.RLock()
+        self._stats = {"ticks": 0, "fires": 0, "children": 0, "child_fail": 0}
+        self.loop = asyncio.new_event_loop()
+        self._wake: Optional[asyncio.Event] = None
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._main, args=(ready,), name="exec-scheduler", daemon=True)
+        self._thread.start()
+        ready.wait(5.0)
+
+    # ---- loop thread ------------------------------------------------------
+    def _main(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self.loop)
+        self._wake = asyncio.Event()
+        self.loop.create_task(self._drive())
+        ready.set()
+        self.loop.run_forever()
+
+    async def _drive(self) -> None:
+        w = self.wheel
+        while True:
+            with self._lock:
+                idle = w.size == 0
+            if idle:
+                self._wake.clear()
+                await self._wake.wait()
+                with self._lock:
+                    w.base = time.monotonic()   # re-anchor after idling
+                continue
+            delay = w.base + w.tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sends = []
+            with self._lock:
+                due = w.advance()
+                self._stats["ticks"] += 1
+                for pid in due:
+                    p = self.parents.get(pid)
+                    if p is not None and p.status == "working":
+                        c = self._fire(p)
+                        if c is not None:
+                            sends.append(c)
+            # the sender may block (inline orders_bridge path): never under the lock or on this loop
+            for c in sends:
+                self._pool.submit(self._dispatch, *c)
+
+    def _kick(self) -> None:
+        if self._wake is not None:
+            self.loop.call_soon_threadsafe(self._wake.set)
+
+    # ---- algo logic (called with _lock held, on the loop thread) -----------
+    def _target(self, p: _Parent, now: float) -> float:
+        if p.algo == "pov":
+            return p.rate * max(0.0, self.volume.get(p.symbol, 0.0) - p.vol0)
+        # each child covers the interval starting now, so slice k goes out at start + k*interval
+        t = now + p.interval
+        if t >= p.end:
+            return p.total
+        frac = max(0.0, (t - p.start) / max(EPS, p.end - p.start))
+        if p.algo == "vwap":
+            prof = p.profile
+            k = frac * len(prof)
+            i = int(k)
+            frac = sum(prof[:i]) + (prof[i] * (k - i) if i < len(prof) else 0.0)
+        return p.total * min(1.0, frac)
+
+    def _fire(self, p: _Parent) -> Optional[Tuple[_Parent, Dict[str, Any], float]]:
+        now = time.time()
+        self._stats["fires"] += 1
+        remaining = p.total - p.done_qty - p.inflight
+        child = min(remaining, self._target(p, now) - p.done_qty - p.inflight)
+        vol = self.volume.get(p.symbol)
+        if vol is not None and p.pov_cap > 0:
+            # participation cap against volume seen since the last child
+            child = min(child, p.pov_cap * max(0.0, vol - p.vol_last))
+        floor = max(EPS, p.min_child)
+        if child > EPS and remaining - child < floor - EPS:
+            child = remaining              # merge a sub-minimum tail into this slice
+        out = None
+        if child >= floor - EPS or (child > EPS and remaining - child <= EPS):
+            out = self._send(p, child, now)
+        if p.end and now >= p.end and p.inflight <= EPS and p.total - p.done_qty > EPS and p.algo != "pov":
+            # horizon over; keep sweeping the residual for a few intervals, then give up
+            if now >= p.end + 3 * p.interval:
+                p.status = "expired"
+        elif p.algo == "pov" and p.end and now >= p.end:
+            p.status = "expired"
+        self._settle(p)
+        if p.status == "working":
+            self.wheel.add(time.monotonic() + p.interval, p.id)
+        return out
+
+    def _send(self, p: _Parent, qty: float, now: float) -> Tuple[_Parent, Dict[str, Any], float]:
+        """Book the child as in flight; the caller dispatches it once the lock is released."""
+        p.inflight += qty
+        p.vol_last = self.volume.get(p.symbol, p.vol_last)
+        rec = {"ts": now, "qty": qty, "status": "sent", "order_id": None}
+        p.children.append(rec)
+        self._stats["children"] += 1
+        return p, rec, qty
+
+    def _dispatch(self, p: _Parent, rec: Dict[str, Any], qty: float) -> None:
+        try:
+            fut = self.sender(p.symbol, p.side, qty, {"parent_id": p.id, "algo": p.algo})
+        except Exception as e:
+            with self._lock:
+                self._child_done(p, rec, qty, None, e)
+                self._settle(p)
+            return
+        fut.add_done_callback(lambda f: self.loop.call_soon_threadsafe(self._on_child, p, rec, qty, f))
+
+    def _on_child(self, p: _Parent, rec: Dict[str, Any], qty: float, fut) -> None:
+        try:
+            res, err = fut.result(), None
+        except Exception as e:
+            res, err = None, e
+        with self._lock:
+            self._child_done(p, rec, qty, res, err)
+            self._settle(p)
+
+    def _child_done(self, p: _Parent, rec: Dict[str, Any], qty: float, res, err) -> None:
+        p.inflight = max(0.0, p.inflight - qty)
+        ok = bool(res and res.get("ok"))
+        rec["status"] = "ok" if ok else "failed"
+        rec["order_id"] = (res or {}).get("order_id")
+        if ok:
+            p.done_qty += qty
+        else:
+            self._stats["child_fail"] += 1
+            rec["error"] = repr(err) if err else (res or {}).get("reason") or (res or {}).get("error")
+        p.updated = time.time()
+
+    def _settle(self, p: _Parent) -> None:
+        if p.status == "working" and p.total - p.done_qty <= EPS and p.inflight <= EPS:
+            p.status = "done"
+            p.updated = time.time()
+
+    def _prune(self, now: float) -> None:
+        """Drop finished parents idle for keep_sec (at most one sweep a minute; lock held)."""
+        if now - self._pruned < 60.0:
+            return
+        self._pruned = now
+        old = [pid for pid, p in self.parents.items()
+               if p.status != "working" and p.inflight <= EPS and now - p.updated > self.keep_sec]
+        for pid in old:
+            del self.parents[pid]
+
+    # ---- public (any thread) -----------------------------------------------
+    def start(self, algo: str, symbol: str, side: str, qty: float, duration_sec: Optional[float] = None,
+              interval_sec: float = 5.0, rate: Optional[float] = None, pov_cap: Optional[float] = None,
+              profile: Optional[List[float]] = None, start_at: Optional[float] = None,
+              min_child: Optional[float] = None) -> Dict[str, Any]:
+        algo = str(algo).lower()
+        if algo not in ALGOS:
+            return {"ok": False, "error": f"unknown_algo:{algo}"}
+        if float(qty) <= 0:
+            return {"ok": False, "error": "qty_must_be_positive"}
+        now = time.time()
+        cap = _pov_cap_default() if pov_cap is None else float(pov_cap)
+        p = _Parent()
+        p.id = f"algo-{int(now)}-{next(_SEQ)}"
+        p.algo, p.symbol, p.side = algo, str(symbol).upper(), str(side).lower()
+        p.total = float(qty)
+        p.start = float(start_at or now)
+        p.interval = max(self.wheel.tick, float(interval_sec))
+        if algo == "pov":
+            p.rate = min(float(rate if rate is not None else cap), cap) if cap > 0 else float(rate or 0.0)
+            p.end = (p.start + float(duration_sec)) if duration_sec else 0.0
+        else:
+            if not duration_sec or float(duration_sec) <= 0:
+                return {"ok": False, "error": "duration_sec_required"}
+            p.rate = 0.0
+            p.end = p.start + float(duration_sec)
+        n = max(1, int(round((p.end - p.start) / p.interval))) if p.end else 1
+        prof = [max(0.0, float(x)) for x in (profile or [])] or _u_profile(n)
+        s = sum(prof) or 1.0
+        p.profile = [x / s for x in prof]
+        p.pov_cap, p.min_child = cap, max(float(self.floor()), float(min_child or 0.0))
+        p.status, p.done_qty, p.inflight, p.error = "working", 0.0, 0.0, None
+        p.children = deque(maxlen=1000)
+        p.created = p.updated = now
+        with self._lock:
+            self._prune(now)
+            p.vol0 = p.vol_last = self.volume.get(p.symbol, 0.0)
+            self.parents[p.id] = p
+            first = max(p.start, now)
+            self.wheel.add(time.monotonic() + (first - now) + (p.interval if algo == "pov" else 0.0), p.id)
+        self._kick()
+        return {"ok": True, "id": p.id, "parent": p.to_dict()}
+
+    def cancel(self, pid: str) -> Dict[str, Any]:
+        with self._lock:
+            p = self.parents.get(pid)
+            if p is None:
+                return {"ok": False, "error": "unknown_parent"}
+            if p.status == "working":
+                p.status = "cancelled"     # its wheel entry is dropped when it comes due
+                p.updated = time.time()
+            return {"ok": True, "parent": p.to_dict()}
+
+    def amend(self, pid: str, qty: Optional[float] = None, duration_sec: Optional[float] = None,
+              rate: Optional[float] = None, interval_sec: Optional[float] = None) -> Dict[str, Any]:
+        with self._lock:
+            p = self.parents.get(pid)
+            if p is None:
+                return {"ok": False, "error": "unknown_parent"}
+            if p.status != "working":
+                return {"ok": False, "error": f"parent_{p.status}"}
+            if qty is not None:
+                if float(qty) < p.done_qty + p.inflight - EPS:
+                    return {"ok": False, "error": "qty_below_executed"}
+                p.total = float(qty)
+            if duration_sec is not None and p.algo != "pov":
+                p.end = p.start + float(duration_sec)
+            elif duration_sec is not None:
+                p.end = (p.start + float(duration_sec)) if duration_sec else 0.0
+            if rate is not None and p.algo == "pov":
+                p.rate = min(float(rate), p.pov_cap) if p.pov_cap > 0 else float(rate)
+            if interval_sec is not None:
+                p.interval = max(self.wheel.tick, float(interval_sec))
+            p.updated = time.time()
+            self._settle(p)
+            return {"ok": True, "parent": p.to_dict()}
+
+    def report_volume(self, symbol: str, volume: float, cumulative: bool = False) -> Dict[str, Any]:
+        """Feed observed market volume (increment, or running total if cumulative)."""
+        sym = str(symbol).upper()
+        with self._lock:
+            cur = self.volume.get(sym, 0.0)
+            self.volume[sym] = max(cur, float(volume)) if cumulative else cur + max(0.0, float(volume))
+            return {"ok": True, "symbol": sym, "volume": self.volume[sym]}
+
+    def status(self, pid: str) -> Dict[str, Any]:
+        with self._lock:
+            p = self.parents.get(pid)
+            return {"ok": True, "parent": p.to_dict()} if p else {"ok": False, "error": "unknown_parent"}
+
+    def parents_list(self, active_only: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            ps = [p.to_dict() for p in self.parents.values() if not active_only or p.status == "working"]
+            working = sum(1 for p in self.parents.values() if p.status == "working")
+            return {"ok": True, "working": working, "timers": self.wheel.size, "stats": dict(self._stats),
+                    "parents": ps}
+
+
+def _bridge_send(symbol: str, side: str, weight: float, meta: Dict[str, Any]):
+    from chamelefx.app.api import orders_bridge as _ob
+    return _ob.submit(symbol=symbol, side=side, weight=weight, order_type="market", meta=meta)
+
+
+_SCHED: Optional[Scheduler] = None
+_SLOCK = threading.Lock()
+
+
+def scheduler() -> Scheduler:
+    global _SCHED
+    if _SCHED is None:
+        with _SLOCK:
+            if _SCHED is None:
+                c = _config.section("execution", "scheduler")
+                _SCHED = Scheduler(tick=float(c.get("tick_sec", 0.05)), slots=int(c.get("slots", 512)),
+                                   sender=_bridge_send, floor=_lot_floor,
+                                   keep_sec=float(c.get("keep_sec", KEEP_SEC)))
+    return _SCHED
+
+
+def start(algo: str, symbol: str, side: str, qty: float, **kw) -> Dict[str, Any]:
+    return scheduler().start(algo, symbol, side, qty, **kw)
+
+
+def cancel(pid: str) -> Dict[str, Any]:
+    return scheduler().cancel(pid)
+
+
+def amend(pid: str, **kw) -> Dict[str, Any]:
+    return scheduler().amend(pid, **kw)
+
+
+def report_volume(symbol: str, volume: float, cumulative: bool = False) -> Dict[str, Any]:
+    return scheduler().report_volume(symbol, volume, cumulative)
+
+
+def status(pid: str) -> Dict[str, Any]:
+    return scheduler().status(pid)
+
+
+def parents(active_only: bool = False) -> Dict[str, Any]:
+    return scheduler().parents_list(active_only)
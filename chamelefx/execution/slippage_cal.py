@@ -5,8 +5,6 @@ from typing import Dict, Any, List
 
 ROOT = Path(__file__).resolve().parents[2]
 DATA = ROOT / "data" / "telemetry"
-COSTS_FILE = DATA / "execution_costs.json"
-ORDERS_FILE = ROOT / "chamelefx" / "runtime" / "orders_recent.json"
 MODEL_FILE = DATA / "slippage_model.json"
 
 def _load_json(p: Path, default):
@@ -25,8 +23,10 @@ def calibrate(window: int=200, blend: float=0.5) -> Dict[str, Any]:
     """
     Build per-symbol slippage model (bps) from execution_costs + recent orders echo.
     """
-    costs = _load_json(COSTS_FILE, {"symbols":{}})
-    echo  = _load_json(ORDERS_FILE, {"orders":[]})
+    from chamelefx.execution.quality import _load as _costs  # snapshot + journal tail
+    costs = _costs()
+    from chamelefx.integrations import trade_store as _store
+    echo_counts = _store.order_counts()
     by_sym = {}
 
     # from costs json
@@ -36,9 +36,8 @@ def calibrate(window: int=200, blend: float=0.5) -> Dict[str, Any]:
 
     # from order echoes (if any have meta slippage/price refs later)
     # For now we only count #orders to weight trust
-    for o in echo.get("orders", []):
-        s = str(o.get("symbol","?"))
-        by_sym.setdefault(s, {})["orders"] = int(by_sym.get(s,{}).get("orders",0)) + 1
+    for s, n in echo_counts.items():
+        by_sym.setdefault(s, {})["orders"] = int(n)
 
     # final model
     model = {"symbols": {}, "ts": time.time()}
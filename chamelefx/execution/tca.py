@@ -0,0 +1,266 @@
+"""
+Transaction-cost analysis over the fill store.
+
+Fills are held in memory as NumPy columns (symbol/venue as integer codes) and
+extended incrementally from ``trade_store`` by fill id, so a call reads only
+fills added since the last one. Per-fill metrics, signed so that positive
+numbers are a cost:
+
+  is_bps       implementation shortfall vs the decision price (``bench``, else mid)
+  arrival_bps  fill vs arrival mid
+  vwap_bps     fill vs ``vwap`` when recorded, else the bar's typical price (h+l+c)/3
+  markout_<h>  mid move h seconds after the fill, from the databank bars
+               (positive = the fill was adverse; mid taken from the last bar closed by t+h,
+               NaN when that bar closed before the fill, i.e. h is shorter than the bar
+               step; ``markout_n`` reports how many fills each horizon covers)
+
+and they are aggregated (qty-weighted) by symbol, venue, UTC hour and size
+bucket with ``bincount``. ``cost_curve`` fits is_bps = a + b*sqrt(qty) per
+symbol. Results are cached per (filters, high-water mark).
+"""
+from __future__ import annotations
+import threading, time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from chamelefx.log import get_logger
+from chamelefx.integrations import trade_store as _store
+
+log = get_logger(__name__)
+
+HORIZONS = (60, 300, 3600, 86400)
+SIZE_EDGES = (0.05, 0.1, 0.5, 1.0, 5.0)
+GROUPS = ("symbol", "venue", "hour", "size")
+CACHE_MAX = 32
+
+_COLS_READ = ("id", "ts", "symbol", "side", "qty", "price", "bench", "mid", "vwap", "venue")
+
+
+class _Fills:
+    """Columnar copy of the fill table, appended by id."""
+
+    def __init__(self):
+        self.hwm = 0
+        self.names: Dict[str, List[str]] = {"symbol": [], "venue": []}
+        self._codes: Dict[str, Dict[str, int]] = {"symbol": {}, "venue": {}}
+        self.c: Dict[str, np.ndarray] = {
+            "ts": np.empty(0), "sym": np.empty(0, np.int32), "ven": np.empty(0, np.int32),
+            "sign": np.empty(0, np.int8), "qty": np.empty(0), "price": np.empty(0),
+            "bench": np.empty(0), "mid": np.empty(0), "vwap": np.empty(0)}
+
+    def _code(self, dim: str, v) -> int:
+        v = str(v or "").upper()
+        m = self._codes[dim]
+        if v not in m:
+            m[v] = len(self.names[dim]); self.names[dim].append(v)
+        return m[v]
+
+    def extend(self, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        _, ts, sym, side, qty, px, bench, mid, vwap, ven = zip(*rows)
+        f = lambda xs: np.array(xs, dtype=np.float64)          # None -> NaN
+        def codes(dim, xs):
+            m = {v: self._code(dim, v) for v in set(xs)}
+            return np.fromiter((m[x] for x in xs), dtype=np.int32, count=len(xs))
+        sgn = {s: (-1 if str(s or "").lower().startswith("s") else 1) for s in set(side)}
+        new = {
+            "ts": f(ts), "sym": codes("symbol", sym), "ven": codes("venue", ven),
+            "sign": np.fromiter((sgn[s] for s in side), dtype=np.int8, count=len(side)),
+            "qty": f(qty), "price": f(px), "bench": f(bench), "mid": f(mid), "vwap": f(vwap)}
+        for k, v in new.items():
+            self.c[k] = np.concatenate((self.c[k], v))
+        self.hwm = int(rows[-1][0])
+
+    def snapshot(self) -> "_Fills":
+        """Consistent view for readers while a concurrent sync extends the columns."""
+        s = _Fills.__new__(_Fills)
+        s.hwm, s.c = self.hwm, dict(self.c)
+        s.names = {k: list(v) for k, v in self.names.items()}
+        s._codes = {k: dict(v) for k, v in self._codes.items()}
+        return s
+
+    def __len__(self) -> int:
+        return int(self.c["ts"].size)
+
+
+_LOCK = threading.Lock()
+_FILLS = _Fills()
+_CACHE: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+
+
+def _sync() -> int:
+    """Bring the columns up to the store's high-water mark; returns it."""
+    global _FILLS
+    hw = _store.high_water()
+    with _LOCK:
+        if hw < _FILLS.hwm:                    # store was reset/rotated
+            _FILLS = _Fills(); _CACHE.clear()
+        if hw > _FILLS.hwm:
+            _FILLS.extend(_store.fill_rows(_COLS_READ, kind="fill", after_id=_FILLS.hwm))
+        return hw
+
+
+# ---- per-fill metrics ---------------------------------------------------------
+
+def _bps(sign, px, ref):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ref > 0, sign * (px - ref) / ref * 1e4, np.nan)
+
+
+def _bars(symbol: str):
+    try:
+        from chamelefx.databank import columnar
+        b = columnar.load(symbol)
+        ts = np.asarray(b["ts"], dtype=np.float64)
+        if ts.size < 2:
+            return None
+        step = float(np.median(np.diff(ts)))
+        return ts, step, np.asarray(b["high"]), np.asarray(b["low"]), np.asarray(b["close"])
+    except Exception:
+        return None
+
+
+def _bar_refs(F: _Fills, idx: np.ndarray, horizons: Sequence[int]):
+    """Typical price of the fill's bar and closed-bar mids at ts+h, per fill (NaN where unknown)."""
+    n = idx.size
+    typ = np.full(n, np.nan)
+    mk = np.full((len(horizons), n), np.nan)
+    sym = F.c["sym"][idx]; ts = F.c["ts"][idx]
+    for code in np.unique(sym):
+        sel = np.flatnonzero(sym == code)
+        bars = _bars(F.names["symbol"][code])
+        if bars is None:
+            continue
+        bts, step, hi, lo, cl = bars
+        t = ts[sel]
+        i = np.searchsorted(bts, t, side="right") - 1
+        ok = (i >= 0) & (t < bts[-1] + step)
+        ii = np.clip(i, 0, bts.size - 1)
+        typ[sel] = np.where(ok, (hi[ii] + lo[ii] + cl[ii]) / 3.0, np.nan)
+        ends = bts + step                      # bar k is closed at ends[k]
+        for r, h in enumerate(horizons):
+            th = t + h
+            j = np.searchsorted(ends, th, side="right") - 1
+            jj = np.clip(j, 0, cl.size - 1)
+            # the reference bar must close after the fill, else it says nothing about the move
+            okh = (j >= 0) & (th <= ends[-1]) & (ends[jj] > t)
+            mk[r, sel] = np.where(okh, cl[jj], np.nan)
+    return typ, mk
+
+
+def _metrics(F: _Fills, idx: np.ndarray, horizons: Sequence[int]) -> Dict[str, np.ndarray]:
+    c = {k: v[idx] for k, v in F.c.items()}
+    sign = c["sign"].astype(np.float64)
+    ref = np.where(np.isfinite(c["bench"]) & (c["bench"] > 0), c["bench"], c["mid"])
+    typ, mk = _bar_refs(F, idx, horizons)
+    vref = np.where(np.isfinite(c["vwap"]) & (c["vwap"] > 0), c["vwap"], typ)
+    out = {"is_bps": _bps(sign, c["price"], ref),
+           "arrival_bps": _bps(sign, c["price"], c["mid"]),
+           "vwap_bps": _bps(sign, c["price"], vref)}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["is_cost"] = sign * (c["price"] - ref) * c["qty"]
+        for r, h in enumerate(horizons):
+            # adverse move after the fill = cost: -(side * (mid_h - px))
+            out[f"markout_{h}"] = np.where(c["price"] > 0, -sign * (mk[r] - c["price"]) / c["price"] * 1e4, np.nan)
+    return out
+
+
+# ---- aggregation --------------------------------------------------------------
+
+def _group(keys: np.ndarray, k: int, qty: np.ndarray, m: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Qty-weighted means per group id (NaNs excluded per metric)."""
+    w = np.where(np.isfinite(qty) & (qty > 0), qty, 0.0)
+    n = np.bincount(keys, minlength=k)
+    rows = [{"n": int(n[g]), "qty": 0.0} for g in range(k)]
+    q = np.bincount(keys, weights=w, minlength=k)
+    for g in range(k):
+        rows[g]["qty"] = round(float(q[g]), 6)
+    for name, v in m.items():
+        ok = np.isfinite(v)
+        if name == "is_cost":
+            s = np.bincount(keys[ok], weights=v[ok], minlength=k)
+            for g in range(k):
+                rows[g][name] = round(float(s[g]), 8)
+            continue
+        ww = np.where(ok, w, 0.0)
+        num = np.bincount(keys, weights=np.where(ok, v, 0.0) * ww, minlength=k)
+        den = np.bincount(keys, weights=ww, minlength=k)
+        for g in range(k):
+            rows[g][name] = round(float(num[g] / den[g]), 4) if den[g] > 0 else None
+    return rows
+
+
+def _size_bucket(qty: np.ndarray, edges: Sequence[float]) -> Tuple[np.ndarray, List[str]]:
+    e = list(edges)
+    labels = [f"<{e[0]}"] + [f"{a}-{b}" for a, b in zip(e, e[1:])] + [f">={e[-1]}"]
+    return np.searchsorted(np.asarray(e), np.nan_to_num(qty), side="right").astype(np.int64), labels
+
+
+def _cost_curve(F: _Fills, idx: np.ndarray, is_bps: np.ndarray) -> Dict[str, Any]:
+    """Least-squares is_bps = a + b*sqrt(qty), qty-weighted, per symbol."""
+    out = {}
+    sym = F.c["sym"][idx]; qty = F.c["qty"][idx]
+    for code in np.unique(sym):
+        ok = (sym == code) & np.isfinite(is_bps) & np.isfinite(qty) & (qty > 0)
+        if ok.sum() < 3:
+            continue
+        x = np.sqrt(qty[ok]); y = is_bps[ok]; w = np.sqrt(qty[ok])
+        A = np.column_stack((np.ones_like(x), x)) * w[:, None]
+        (a, b), *_ = np.linalg.lstsq(A, y * w, rcond=None)
+        out[F.names["symbol"][code]] = {"a_bps": round(float(a), 4), "b_bps_per_sqrt_lot": round(float(b), 4),
+                                        "n": int(ok.sum())}
+    return out
+
+
+def analyze(symbol: Optional[str] = None, venue: Optional[str] = None, since: Optional[float] = None,
+            until: Optional[float] = None, by: Sequence[str] = GROUPS, horizons: Sequence[int] = HORIZONS,
+            size_edges: Sequence[float] = SIZE_EDGES) -> Dict[str, Any]:
+    """TCA over fills matching the filters; ``by`` picks the groupings (symbol/venue/hour/size)."""
+    t0 = time.perf_counter()
+    hw = _sync()
+    by = tuple(g for g in by if g in GROUPS)
+    horizons = tuple(int(h) for h in horizons)
+    key = (str(symbol or "").upper(), str(venue or "").upper(), since, until, by, horizons, tuple(size_edges), hw)
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None:
+            _CACHE.move_to_end(key)
+            return {**hit, "cached": True, "ms": round((time.perf_counter() - t0) * 1000.0, 3)}
+        F = _FILLS.snapshot()
+    mask = np.ones(len(F), dtype=bool)
+    if symbol:
+        mask &= F.c["sym"] == F._codes["symbol"].get(str(symbol).upper(), -1)
+    if venue:
+        mask &= F.c["ven"] == F._codes["venue"].get(str(venue).upper(), -1)
+    if since is not None:
+        mask &= F.c["ts"] >= float(since)
+    if until is not None:
+        mask &= F.c["ts"] < float(until)
+    idx = np.flatnonzero(mask)
+    m = _metrics(F, idx, horizons)
+    qty = F.c["qty"][idx]
+    res: Dict[str, Any] = {"ok": True, "hwm": hw, "n": int(idx.size), "horizons": list(horizons),
+                           "markout_n": {str(h): int(np.isfinite(m[f"markout_{h}"]).sum()) for h in horizons},
+                           "overall": _group(np.zeros(idx.size, np.int64), 1, qty, m)[0] if idx.size else {"n": 0},
+                           "groups": {}}
+    for g in by:
+        if g == "symbol":
+            keys, labels = F.c["sym"][idx].astype(np.int64), F.names["symbol"]
+        elif g == "venue":
+            keys, labels = F.c["ven"][idx].astype(np.int64), F.names["venue"]
+        elif g == "hour":
+            keys, labels = ((F.c["ts"][idx] // 3600) % 24).astype(np.int64), [f"{h:02d}" for h in range(24)]
+        else:
+            keys, labels = _size_bucket(qty, size_edges)
+        rows = _group(keys, len(labels), qty, m) if idx.size else []
+        res["groups"][g] = [{g: labels[i], **r} for i, r in enumerate(rows) if r["n"]]
+    res["cost_curve"] = _cost_curve(F, idx, m["is_bps"])
+    res["ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+    with _LOCK:
+        _CACHE[key] = res
+        while len(_CACHE) > CACHE_MAX:
+            _CACHE.popitem(last=False)
+    return {**res, "cached": False}
@@ -2,16 +2,11 @@ from __future__ import annotations
 from chamelefx.log import get_logger
 from typing import List, Dict, Any
 import time
-import MetaTrader5 as mt5
-
-def _connect():
-    if not mt5.initialize():
-        raise RuntimeError(f"MT5 init failed: {mt5.last_error()}")
+from chamelefx.integrations import mt5_session as _session
 
 def open_orders() -> List[Dict[str, Any]]:
     """Return currently open orders (pending orders)."""
-    _connect()
-    orders = mt5.orders_get()
+    orders = _session.call("orders_get")
     out=[]
     if orders:
         for o in orders:
@@ -23,13 +18,12 @@ def open_orders() -> List[Dict[str, Any]]:
                 "price": o.price_open,
                 "ts": o.time_setup,
             })
-    mt5.shutdown()
     return out
 
 def recent_fills(n: int=20) -> List[Dict[str, Any]]:
     """Return last n closed deals/fills."""
-    _connect()
-    deals = mt5.history_deals_get(time.time()-7*86400, time.time())
+    now = time.time()
+    deals = _session.call("history_deals_get", now-7*86400, now)
     out=[]
     if deals:
         for d in sorted(deals, key=lambda x: x.time, reverse=True)[:n]:
@@ -41,20 +35,22 @@ def recent_fills(n: int=20) -> List[Dict[str, Any]]:
                 "price": d.price,
                 "ts": d.time,
             })
-    mt5.shutdown()
     return out
 
 def cancel_order(order_id: str) -> Dict[str, Any]:
     """Cancel an open order by ticket."""
-    _connect()
-    res = mt5.order_send({
-        "action": mt5.TRADE_ACTION_REMOVE,
+    s = _session.get_session()
+    res = s.call("order_send", {
+        "action": s.const("TRADE_ACTION_REMOVE"),
         "order": int(order_id)
     })
-    mt5.shutdown()
-    return {"ok": res.retcode == mt5.TRADE_RETCODE_DONE, "order_id": order_id}
+    return {"ok": res is not None and res.retcode == s.const("TRADE_RETCODE_DONE"), "order_id": order_id}
 
 def replace_order(order_id: str, new_qty: float) -> Dict[str, Any]:
     """Simplified: cancel+recreate (stub)."""
     # Full replace requires capturing original details and resending
     return {"ok": False, "note": "Replace not implemented yet"}
+
+def health() -> Dict[str, Any]:
+    """Connection/queue/latency metrics of the shared MT5 session."""
+    return _session.health()
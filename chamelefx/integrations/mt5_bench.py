@@ -0,0 +1,166 @@
+"""
+Order-path benchmark against the simulated broker (``mt5_sim``).
+
+Drives ``orders_bridge.place`` ("bridge") or ``mt5_client.place`` ("client")
+open-loop at a target rate: order i is due at t0 + i/rate and its latency is
+measured from that due time, so a stalled order path shows up as queueing
+delay instead of silently lowering the offered load. ``service`` latency (from
+the actual call start) is reported alongside.
+
+    python -m chamelefx.integrations.mt5_bench --target bridge --rate 500 --duration 5 \\
+        --latency-ms 2 --reject 0.01 --partial 0.05
+
+Bench fills and order echoes go to a throw-away trade store in a temp dir and
+are kept out of venue_stats; the MT5 session and orders_bridge routing state
+are restored afterwards.
+"""
+from __future__ import annotations
+import argparse, contextlib, itertools, json, tempfile, threading, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from chamelefx.integrations import mt5_sim
+
+SYMBOLS = ("EURUSD", "GBPUSD", "USDJPY")
+
+
+def _pcts(xs: List[float]) -> Dict[str, float]:
+    if not xs:
+        return {}
+    a = np.asarray(xs) * 1000.0
+    q = np.percentile(a, [50, 90, 99, 99.9])
+    return {"p50": round(float(q[0]), 4), "p90": round(float(q[1]), 4), "p99": round(float(q[2]), 4),
+            "p999": round(float(q[3]), 4), "max": round(float(a.max()), 4), "mean": round(float(a.mean()), 4)}
+
+
+_STORE_API = ("add_fill", "add_fills", "add_order", "add_orders")
+
+
+@contextlib.contextmanager
+def _isolated():
+    """Point the trade store at a temp db, give latency histograms a scratch registry,
+    mute venue_stats, and restore session/bridge state on exit."""
+    from chamelefx.app.api import orders_bridge as OB
+    from chamelefx.integrations import mt5_session, trade_store
+    from chamelefx.router import venue_stats
+    from chamelefx.utils import latency
+    saved_store = {k: getattr(trade_store, k) for k in _STORE_API}
+    saved_record = venue_stats.record
+    saved_lat = latency._REG
+    saved_ob = (OB._MT5, OB._MT5_READY)
+    saved_session = mt5_session._SESSION
+    with tempfile.TemporaryDirectory(prefix="cfx-bench-") as tmp:
+        store = trade_store.TradeStore(Path(tmp) / "trades.db")
+        try:
+            for k in _STORE_API:
+                setattr(trade_store, k, getattr(store, k))
+            venue_stats.record = lambda *a, **k: None
+            with latency._REG_LOCK:
+                latency._REG = {}
+            yield
+        finally:
+            if OB._PIPE is not None:
+                OB._PIPE.join()              # let bench orders finish journaling into the temp store
+            for k, v in saved_store.items():
+                setattr(trade_store, k, v)
+            venue_stats.record = saved_record
+            with latency._REG_LOCK:
+                latency._REG = saved_lat   # bench samples stay out of the router's p90 latency
+            OB._MT5, OB._MT5_READY = saved_ob
+            with mt5_session._SLOCK:
+                bench_session, mt5_session._SESSION = mt5_session._SESSION, saved_session
+            if bench_session is not None and bench_session is not saved_session:
+                bench_session.close()
+            store.flush()
+
+
+def _sender(target: str, terminal: Any):
+    from chamelefx.integrations import mt5_client
+    mt5_client.set_terminal(terminal)
+    if not mt5_client.start().get("ok"):
+        raise RuntimeError("mt5 sim initialize failed")
+    if target == "client":
+        return lambda sym, side: mt5_client.place(sym, side, 0.1)
+    from chamelefx.app.api import orders_bridge as OB
+    OB._load_cfg()                # first load fires on_change, which resets readiness
+    OB._MT5 = mt5_client
+    OB._MT5_READY = True          # route live regardless of config.mt5.enabled
+    return lambda sym, side: OB.place(sym, side, 0.1, meta={"bench": True})
+
+
+def run(target: str = "bridge", rate: float = 200.0, duration: float = 5.0, concurrency: int = 8,
+        sim: Optional[Dict[str, Any]] = None, address: Optional[tuple] = None,
+        symbols=SYMBOLS) -> Dict[str, Any]:
+    """Benchmark one order path; spawns a broker with ``sim`` config unless ``address`` is given."""
+    proc = None if address else mt5_sim.spawn(sim or {"latency": {"dist": "lognormal", "median_ms": 2.0}})
+    terminal = mt5_sim.SimTerminal(address or proc.address)
+    try:
+        with _isolated():
+            send = _sender(target, terminal)
+            total = max(1, int(rate * duration))
+            seq = itertools.count()
+            lat: List[float] = []; svc: List[float] = []
+            counts = {"ok": 0, "rejected": 0, "partial": 0, "error": 0}
+            lock = threading.Lock()
+            t0 = time.perf_counter() + 0.05
+
+            def worker():
+                while True:
+                    i = next(seq)
+                    if i >= total:
+                        return
+                    due = t0 + i / rate
+                    wait = due - time.perf_counter()
+                    if wait > 0:
+                        time.sleep(wait)
+                    s = time.perf_counter()
+                    try:
+                        r = send(symbols[i % len(symbols)], "buy" if i % 2 == 0 else "sell")
+                        key = "ok" if r.get("ok") else "rejected"
+                    except Exception:
+                        r, key = {}, "error"
+                    e = time.perf_counter()
+                    with lock:
+                        lat.append(e - due); svc.append(e - s)
+                        counts[key] += 1
+                        counts["partial"] += bool(r.get("partial"))
+
+            ths = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, int(concurrency)))]
+            for t in ths: t.start()
+            for t in ths: t.join()
+            wall = time.perf_counter() - t0
+            return {"ok": True, "target": target, "orders": total, "offered_rate": rate,
+                    "throughput": round(total / wall, 2), "wall_sec": round(wall, 3), "concurrency": concurrency,
+                    "counts": counts, "latency_ms": _pcts(lat), "service_ms": _pcts(svc),
+                    "broker": terminal.sim_stats()}
+    finally:
+        if proc is not None:
+            proc.stop()
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Order path benchmark against the MT5 simulator")
+    ap.add_argument("--target", choices=("bridge", "client"), default="bridge")
+    ap.add_argument("--rate", type=float, default=200.0)
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--dist", default="lognormal")
+    ap.add_argument("--latency-ms", type=float, default=2.0)
+    ap.add_argument("--sigma", type=float, default=0.5)
+    ap.add_argument("--reject", type=float, default=0.0)
+    ap.add_argument("--partial", type=float, default=0.0)
+    ap.add_argument("--connect", default="", help="host:port of a running mt5_sim instead of spawning one")
+    a = ap.parse_args(argv)
+    addr = None
+    if a.connect:
+        host, _, port = a.connect.rpartition(":")
+        addr = (host or "127.0.0.1", int(port))
+    sim = {"latency": {"dist": a.dist, "median_ms": a.latency_ms, "sigma": a.sigma},
+           "reject_rate": a.reject, "partial_rate": a.partial}
+    print(json.dumps(run(a.target, a.rate, a.duration, a.concurrency, sim, addr), indent=2))
+
+
+if __name__ == "__main__":
+    main()
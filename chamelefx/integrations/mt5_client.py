@@ -1,23 +1,29 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
-import os, json, time, random
+import os, json, threading, time, random
 from typing import Any, Dict, Optional
+from chamelefx.integrations import trade_store as _store
+from chamelefx.integrations import mt5_session as _session
+from chamelefx.utils import latency as _latency
+from chamelefx.router import venue_stats as _venue_stats
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 RUN  = os.path.join(ROOT, "runtime")
 os.makedirs(RUN, exist_ok=True)
 
-FILLS_PATH = os.path.join(RUN, "fills.json")
 POSITIONS_PATH = os.path.join(RUN, "positions.json")
 LOGIN_PATH = os.path.join(RUN, "mt5_login.json")
+CALL_TIMEOUT_SEC = 10.0
+_POS_LOCK = threading.Lock()   # stub positions.json read-modify-write
 
-# Try import MetaTrader5; fall back to stub if import fails.
-try:
-    import MetaTrader5 as MT5
-    _HAVE_MT5 = True
-except Exception:
-    MT5 = None
-    _HAVE_MT5 = False
+# Every terminal call runs on the mt5_session thread (simulated broker from
+# CFX_MT5_SIM first, then MetaTrader5); no terminal means stub mode.
+def _terminal() -> Any:
+    return _session.get_session().terminal
+
+def set_terminal(terminal: Any) -> None:
+    """Use `terminal` (MetaTrader5 module surface, e.g. mt5_sim.SimTerminal) for all calls; None = stub."""
+    _session.set_terminal(terminal, login=_read_json(LOGIN_PATH, None))
 
 def _read_json(path: str, default):
     try:
@@ -30,13 +36,12 @@ def _write_json(path: str, data: Any):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
 
-def _append(path: str, rec: Dict[str, Any], cap: int = 500):
-    rows = _read_json(path, [])
-    if not isinstance(rows, list):
-        rows = []
-    rows.append(rec)
-    rows = rows[-cap:]
-    _write_json(path, rows)
+def _record(rec: Dict[str, Any]) -> None:
+    """Fills/modifies/closes go to the SQLite trade store (batched, unbounded)."""
+    try:
+        _store.add_fill(rec)
+    except Exception:
+        get_logger(__name__).exception("trade store append failed")
 
 def _positions() -> Dict[str, Any]:
     d = _read_json(POSITIONS_PATH, {})
@@ -62,63 +67,91 @@ def start() -> Dict[str, Any]:
       "server": "<str>"
     }
     """
-    if not _HAVE_MT5:
+    if _terminal() is None:
         return {"ok": True, "mode": "stub", "msg": "MetaTrader5 package not installed; using stub."}
+    try:
+        # the session connects (initialize + login) before running any job
+        _session.call(lambda t: True, timeout=CALL_TIMEOUT_SEC)
+    except Exception as e:
+        return {"ok": False, "mode": "mt5", "error": f"initialize_failed: {e}"}
+    return {"ok": True, "mode": "mt5"}
 
-    if not MT5.initialize():
-        return {"ok": False, "mode": "mt5", "error": f"initialize_failed: {MT5.last_error()}"}
+def ensure_started(account_id: Any = None, server: str = "", path: str = "", timeout_sec: int = 5) -> bool:
+    """One start attempt for orders_bridge (which owns retry/backoff)."""
+    return bool(start().get("ok"))
 
-    creds = _read_json(LOGIN_PATH, {})
-    if creds and all(k in creds for k in ("login","password","server")):
-        ok = MT5.login(int(creds["login"]), password=str(creds["password"]), server=str(creds["server"]))
-        if not ok:
-            return {"ok": False, "mode": "mt5", "error": f"login_failed: {MT5.last_error()}"}
-    return {"ok": True, "mode": "mt5"}
+def market_order(symbol: str, lots: float, side: str, venue: Optional[str] = None) -> Dict[str, Any]:
+    return place(symbol, side, lots, venue=venue)
 
 def ping() -> Dict[str, Any]:
-    if not _HAVE_MT5:
+    if _terminal() is None:
         return {"ok": True, "mode": "stub"}
     try:
-        v = MT5.version()
+        v = _session.call("version", timeout=CALL_TIMEOUT_SEC)
         return {"ok": True, "mode": "mt5", "version": v}
     except Exception as e:
         return {"ok": False, "mode": "mt5", "error": repr(e)}
 
 def place(symbol: str, side: str, lots: float, sl: Optional[float]=None, tp: Optional[float]=None,
-          comment: Optional[str]=None, magic: Optional[int]=None) -> Dict[str, Any]:
+          comment: Optional[str]=None, magic: Optional[int]=None, venue: Optional[str]=None) -> Dict[str, Any]:
+    """
+    Market order. ``venue`` is the router venue the order was routed to
+    (router.venues, e.g. MT5_PRIMARY); latency histograms, venue_stats and
+    the trade store record it under that name so the router's lookups match.
+    Default "MT5". A failed result carries ``retryable`` when the order never
+    reached the terminal, or ``unknown`` when it may have (timed out or failed
+    mid-send); look those up by ``comment`` before sending again.
+    """
+    venue = str(venue or "MT5")
+    t = time.perf_counter()
+    try:
+        return _place(symbol, side, lots, sl, tp, comment, magic, venue)
+    finally:
+        _latency.record("mt5.place", time.perf_counter() - t, venue if _terminal() is not None else "stub", symbol)
+
+def _place(symbol: str, side: str, lots: float, sl: Optional[float]=None, tp: Optional[float]=None,
+           comment: Optional[str]=None, magic: Optional[int]=None, venue: str = "MT5") -> Dict[str, Any]:
     ts = time.time()
-    if not _HAVE_MT5:
+    if _terminal() is None:
         # STUB: create a synthetic ticket and adjust positions file
         ticket = int(ts * 1000) + random.randint(1, 999)
-        # Merge into net position
-        pos = _positions().get(symbol)
-        if pos and pos.get("side") == side:
-            new_lots = float(pos.get("lots", 0.0)) + float(lots)
-        elif pos and pos.get("side") != side:
-            new_lots = float(pos.get("lots", 0.0)) - float(lots)
-            if new_lots < 0:
-                side = side  # flip to the side of residual
-                new_lots = abs(new_lots)
-        else:
-            new_lots = float(lots)
-        if new_lots <= 0:
-            _set_position(symbol, 0, side)
-        else:
-            _set_position(symbol, new_lots, side)
+        with _POS_LOCK:
+            # Merge into net position
+            pos = _positions().get(symbol)
+            if pos and pos.get("side") == side:
+                new_lots = float(pos.get("lots", 0.0)) + float(lots)
+            elif pos and pos.get("side") != side:
+                new_lots = float(pos.get("lots", 0.0)) - float(lots)
+                if new_lots < 0:
+                    side = side  # flip to the side of residual
+                    new_lots = abs(new_lots)
+            else:
+                new_lots = float(lots)
+            if new_lots <= 0:
+                _set_position(symbol, 0, side)
+            else:
+                _set_position(symbol, new_lots, side)
         fill = {"ts": ts, "ticket": ticket, "symbol": symbol, "side": side, "lots": float(lots),
                 "sl": sl, "tp": tp, "comment": comment, "magic": magic, "mode": "stub"}
-        _append(FILLS_PATH, fill)
+        _record(fill)
         return {"ok": True, "ticket": ticket, "fill": fill}
 
-    # REAL MT5 flow (simplified market order)
-    try:
+    # REAL MT5 flow (simplified market order), one job on the session thread
+    def send(MT5):
         typ = MT5.ORDER_TYPE_BUY if side.lower().startswith("b") else MT5.ORDER_TYPE_SELL
+        tick = MT5.symbol_info_tick(symbol)
+        if tick is None:
+            err = MT5.last_error()
+            if (err[0] if isinstance(err, (tuple, list)) else err) in _session._LINK_ERRORS:
+                return None    # nothing sent; lets the session reconnect and retry a dropped link
+            # no quote for this symbol: final, retrying will not help
+            return {"ok": False, "error": f"no_tick: {err}", "rejected": True}
         req = {
             "action": MT5.TRADE_ACTION_DEAL,
             "symbol": symbol,
             "volume": float(lots),
             "type": typ,
-            "price": MT5.symbol_info_tick(symbol).ask if typ==MT5.ORDER_TYPE_BUY else MT5.symbol_info_tick(symbol).bid,
+            "price": tick.ask if typ==MT5.ORDER_TYPE_BUY else tick.bid,
             "sl": sl or 0.0,
             "tp": tp or 0.0,
             "deviation": 20,
@@ -127,44 +160,81 @@ def place(symbol: str, side: str, lots: float, sl: Optional[float]=None, tp: Opt
             "type_time": MT5.ORDER_TIME_GTC,
             "type_filling": MT5.ORDER_FILLING_FOK,
         }
+        t_send = time.perf_counter()
         res = MT5.order_send(req)
-        ok = (res is not None and res.retcode == MT5.TRADE_RETCODE_DONE)
+        return typ, tick, req, res, time.perf_counter() - t_send
+
+    try:
+        out = _session.call(send, timeout=CALL_TIMEOUT_SEC)
+    except _session.MT5Unavailable as e:
+        return {"ok": False, "error": repr(e), "retryable": True}
+    except _session.CallTimeout as e:
+        # cancelled while still queued: never sent; already running: the outcome is unknown
+        if not e.started:
+            return {"ok": False, "error": "mt5_timeout", "retryable": True}
+        return {"ok": False, "error": "mt5_timeout", "unknown": True}
+    except Exception as e:
+        return {"ok": False, "error": repr(e), "unknown": True}
+    if out is None:
+        return {"ok": False, "error": "no_tick", "retryable": True}
+    if isinstance(out, dict):
+        return out
+    MT5 = _terminal()
+    try:
+        typ, tick, req, res, lat = out
+        _latency.record("mt5.order_send", lat, venue, symbol)
+        if res is None:
+            return {"ok": False, "error": "order_send returned None", "unknown": True}
+        partial = res.retcode == getattr(MT5, "TRADE_RETCODE_DONE_PARTIAL", 10010)
+        ok = res.retcode == MT5.TRADE_RETCODE_DONE or partial
         ticket = getattr(res, "order", None) or getattr(res, "deal", None)
-        rec = {"ts": ts, "ticket": ticket, "symbol": symbol, "side": side, "lots": float(lots),
-               "sl": sl, "tp": tp, "comment": comment, "magic": magic, "mode": "mt5", "retcode": getattr(res,'retcode',None)}
-        _append(FILLS_PATH, rec)
+        mid = (float(tick.bid) + float(tick.ask)) / 2.0
+        filled = float(getattr(res, "volume", 0.0) or lots) if ok else float(lots)
+        rec = {"ts": ts, "ticket": ticket, "symbol": symbol, "side": side, "lots": filled,
+               "price": float(getattr(res, "price", 0.0) or req["price"]), "bench": mid, "mid": mid, "venue": venue,
+               "sl": sl, "tp": tp, "comment": comment, "magic": magic, "mode": "mt5", "retcode": getattr(res,'retcode',None),
+               "lat_ms": round(lat * 1000.0, 3), "kind": "fill" if ok else "reject"}
+        _record(rec)
+        try:
+            slip = ((rec["price"] - mid) / mid * 1e4 * (1 if typ == MT5.ORDER_TYPE_BUY else -1)) if ok and mid > 0 else None
+            _venue_stats.record(venue, bool(ok), lat, partial=bool(partial),
+                                filled=filled / float(lots) if lots else 1.0, slip_bps=slip)
+        except Exception:
+            get_logger(__name__).exception("venue stats update failed")
         # For simplicity, treat as net pos update
         # (you can query MT5.positions_get to be exact)
-        return {"ok": bool(ok), "ticket": ticket, "mt5": getattr(res, "_asdict", lambda: None)()}
+        return {"ok": bool(ok), "ticket": ticket, "partial": bool(partial), "lots": filled,
+                "retcode": res.retcode, "mt5": getattr(res, "_asdict", lambda: None)()}
     except Exception as e:
-        return {"ok": False, "error": repr(e)}
+        return {"ok": False, "error": repr(e), "unknown": True}
 
 def modify(ticket: int, sl: Optional[float]=None, tp: Optional[float]=None) -> Dict[str, Any]:
     ts = time.time()
-    if not _HAVE_MT5:
+    if _terminal() is None:
         # STUB: record the modification only
-        _append(FILLS_PATH, {"ts": ts, "modify_ticket": ticket, "sl": sl, "tp": tp, "mode": "stub"})
+        _record({"ts": ts, "modify_ticket": ticket, "sl": sl, "tp": tp, "mode": "stub"})
         return {"ok": True, "ticket": ticket, "mode": "stub"}
     try:
         # NOTE: for real MT5 you'd need to fetch current position/order price and send an ORDER_TYPE_MODIFY request.
-        _append(FILLS_PATH, {"ts": ts, "modify_ticket": ticket, "sl": sl, "tp": tp, "mode": "mt5"})
+        _record({"ts": ts, "modify_ticket": ticket, "sl": sl, "tp": tp, "mode": "mt5"})
         return {"ok": True, "ticket": ticket, "mode": "mt5"}
     except Exception as e:
         return {"ok": False, "error": repr(e)}
 
 def close(ticket: Optional[int]=None, symbol: Optional[str]=None) -> Dict[str, Any]:
     ts = time.time()
-    if not _HAVE_MT5:
+    if _terminal() is None:
         # STUB: if ticket not tracked, close by symbol (flatten)
         if symbol:
-            _set_position(symbol, 0.0, "flat")
-            _append(FILLS_PATH, {"ts": ts, "close_symbol": symbol, "mode": "stub"})
+            with _POS_LOCK:
+                _set_position(symbol, 0.0, "flat")
+            _record({"ts": ts, "close_symbol": symbol, "mode": "stub"})
             return {"ok": True, "symbol": symbol, "mode": "stub"}
-        _append(FILLS_PATH, {"ts": ts, "close_ticket": ticket, "mode": "stub"})
+        _record({"ts": ts, "close_ticket": ticket, "mode": "stub"})
         return {"ok": True, "ticket": ticket, "mode": "stub"}
     try:
         # Real implementation would inspect position and send opposite order with same volume.
-        _append(FILLS_PATH, {"ts": ts, "close": ticket or symbol, "mode": "mt5"})
+        _record({"ts": ts, "close": ticket or symbol, "mode": "mt5"})
         return {"ok": True}
     except Exception as e:
         return {"ok": False, "error": repr(e)}
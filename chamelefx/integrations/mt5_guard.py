@@ -1,26 +1,23 @@
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any
-import json, time
+from typing import Dict, Any, Optional
+import json, threading, time
 from chamelefx.log import get_logger
-from chamelefx.utils.filelock import file_lock
+from chamelefx.integrations.outbox import Outbox, Unknown
+from chamelefx.utils import config as _config
 from chamelefx.utils.secrets import get_mt5_credentials
 
 log = get_logger(__name__)
 ROOT = Path(__file__).resolve().parents[2]
 RUNTIME = ROOT / "chamelefx" / "runtime"
-OUTBOX = RUNTIME / "orders_outbox.json"
+OUTBOX = RUNTIME / "orders_outbox.json"      # legacy single-file outbox (migrated once)
+OUTBOX_DIR = RUNTIME / "outbox"
 
 def _read_json(p: Path, default):
     try: return json.loads(p.read_text(encoding="utf-8"))
     except Exception: return default
 
-def _write_json_atomic(p: Path, obj: Any):
-    tmp = p.with_suffix(p.suffix + ".tmp")
-    tmp.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(p)
-
 def status() -> Dict[str, Any]:
     try:
         login, pw, server = get_mt5_credentials()
@@ -38,12 +35,108 @@ def reconnect() -> Dict[str, Any]:
     except Exception:
         log.exception("reconnect failed"); return {"ok": False}
 
+class SendError(RuntimeError):
+    """The order did not reach the broker; the outbox keeps it and retries."""
+
+def _tag(order: Dict[str, Any], seq: int) -> str:
+    """Order comment carrying the outbox seq (MT5 comments hold 31 chars)."""
+    tag = f"|ob{int(seq)}"
+    return str(order.get("comment") or "cfx")[:31 - len(tag)] + tag
+
+def _send(ent: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deliver one outbox entry to the broker via mt5_client, its seq stamped into
+    the order comment. Returns only for a final answer (filled, rejected with a
+    broker retcode, or a symbol the terminal has no quote for). Raises
+    SendError when the order provably never reached the terminal (no terminal,
+    session down, cancelled while queued), so it is retried; raises Unknown
+    when it may have (timed out or failed mid-send), so the outbox parks it
+    until ``_reconcile`` finds out.
+    """
+    from chamelefx.integrations import mt5_client
+    if mt5_client._terminal() is None:
+        raise SendError("no MT5 terminal (stub mode)")
+    order = ent["order"]
+    lots = order.get("lots", order.get("volume", order.get("qty", 0.0)))
+    res = mt5_client.place(str(order.get("symbol", "")).upper(), str(order.get("side", "buy")).lower(), float(lots),
+                           sl=order.get("sl"), tp=order.get("tp"), comment=_tag(order, ent["seq"]),
+                           magic=order.get("magic"))
+    if not res.get("ok") and not res.get("rejected") and (res.get("error") or res.get("retcode") is None):
+        if res.get("retryable"):
+            raise SendError(str(res.get("error") or "no retcode"))
+        raise Unknown(str(res.get("error") or "no retcode"))
+    return res
+
+def _reconcile(ent: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Look a parked entry up on the terminal by its comment tag: a result if its
+    deal (or resting order) exists, None if it never got through. The lookup
+    queues behind the timed-out send on the session thread, so that send has
+    finished by the time history is read. Raises while the terminal cannot answer.
+    """
+    from chamelefx.integrations import mt5_client, mt5_session as _session
+    tag = f"|ob{int(ent['seq'])}"
+    lo = int(float(ent.get("ts", 0.0))) - 60
+    deals = _session.call("history_deals_get", lo, int(time.time()) + 60, timeout=mt5_client.CALL_TIMEOUT_SEC)
+    if deals is None:
+        raise SendError("deal history unavailable")
+    hit = [d for d in deals if str(getattr(d, "comment", "")).endswith(tag)]
+    if not hit:
+        hit = [o for o in (_session.call("orders_get", timeout=mt5_client.CALL_TIMEOUT_SEC) or ())
+               if str(getattr(o, "comment", "")).endswith(tag)]
+    if not hit:
+        return None
+    first = hit[0]
+    lots = sum(float(getattr(h, "volume", getattr(h, "volume_current", 0.0)) or 0.0) for h in hit)
+    return {"ok": True, "ticket": getattr(first, "order", None) or getattr(first, "ticket", None),
+            "lots": lots, "reconciled": True}
+
+_OB = None
+_OB_LOCK = threading.Lock()
+
+def _outbox() -> Outbox:
+    """Process-wide outbox; settings from config mt5.outbox {batch, flush_sec, segment_mb, ack_every,
+    max_age_sec, auto_flush}."""
+    global _OB
+    if _OB is None:
+        with _OB_LOCK:
+            if _OB is None:
+                cfg = _config.section("mt5", "outbox")
+                ob = Outbox(OUTBOX_DIR, sender=_send, reconciler=_reconcile,
+                            segment_bytes=int(float(cfg.get("segment_mb", 4)) * (1 << 20)),
+                            batch=int(cfg.get("batch", 50)), flush_sec=float(cfg.get("flush_sec", 0.5)),
+                            ack_every=int(cfg.get("ack_every", 1)),
+                            max_age_sec=float(cfg.get("max_age_sec", 300)))
+                legacy = _read_json(OUTBOX, None)
+                if isinstance(legacy, dict) and legacy.get("pending"):
+                    # queued no later than the file's last write: the max-age check expires stale ones
+                    queued = OUTBOX.stat().st_mtime
+                    for o in legacy["pending"]:
+                        ob.append(o, durable=False, ts=queued)
+                    ob.commit()
+                if OUTBOX.exists():
+                    OUTBOX.replace(OUTBOX.with_suffix(".json.migrated"))
+                if cfg.get("auto_flush", True):
+                    ob.start()
+                _OB = ob
+    return _OB
+
 def outbox_append(order: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        with file_lock(OUTBOX):
-            ob = _read_json(OUTBOX, {"pending": [], "sent": []})
-            ob["pending"].append(order)
-            _write_json_atomic(OUTBOX, ob)
-        return {"ok": True, "queued": True}
+        seq = _outbox().append(order)
+        return {"ok": True, "queued": True, "seq": seq}
     except Exception:
         log.exception("outbox_append failed"); return {"ok": False}
+
+def outbox(n: int = 50) -> Dict[str, Any]:
+    try:
+        ob = _outbox()
+        return {"ok": True, **ob.stats(), "next": ob.peek(n)}
+    except Exception:
+        log.exception("outbox failed"); return {"ok": False}
+
+def flush_pending(max_items: int = 10) -> Dict[str, Any]:
+    try:
+        return {"ok": True, **_outbox().drain(max_items)}
+    except Exception:
+        log.exception("flush_pending failed"); return {"ok": False}
@@ -0,0 +1,403 @@
+"""
+Long-lived MetaTrader5 session.
+
+One worker thread owns the terminal connection; every terminal call is queued
+to it, so the (not thread-safe) MT5 API is only touched from one thread and
+``initialize()`` runs once instead of around every query. Lost connections are
+re-established with exponential backoff; calls made while backing off fail fast.
+A call that times out is cancelled, so it never reaches the terminal after its
+caller has given up (unless it had already started).
+
+The terminal is pluggable: anything exposing the MetaTrader5 module surface
+(``initialize``, ``orders_get``, ``order_send``, ...). ``FakeTerminal`` is an
+in-memory stand-in for CI; select it with CFX_MT5_TERMINAL=fake or
+``set_terminal(FakeTerminal())``. CFX_MT5_TERMINAL=sim (or just CFX_MT5_SIM set)
+uses the out-of-process simulated broker from ``mt5_sim`` (address in CFX_MT5_SIM).
+``mt5_client`` trades through this same session.
+
+    from chamelefx.integrations import mt5_session as S
+    S.call("orders_get")            # runs on the session thread
+    S.health()
+"""
+from __future__ import annotations
+import itertools, os, queue, threading, time
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+from chamelefx.log import get_logger
+
+log = get_logger(__name__)
+
+ENV_TERMINAL = "CFX_MT5_TERMINAL"
+
+# MT5 IPC errors that mean the terminal link is gone (vs. a rejected request)
+_LINK_ERRORS = {-10001, -10002, -10004, -10005}
+
+
+class MT5Unavailable(RuntimeError):
+    pass
+
+
+class CallTimeout(TimeoutError):
+    """A session call timed out; ``started`` tells whether the job had already
+    reached the terminal (outcome unknown) or was cancelled while queued."""
+
+    def __init__(self, msg: str, started: bool):
+        super().__init__(msg)
+        self.started = started
+
+
+# ---- fake terminal -------------------------------------------------------------
+
+_Order = namedtuple("TradeOrder", "ticket symbol type volume_current price_open time_setup magic comment",
+                    defaults=(0, ""))
+_Deal = namedtuple("TradeDeal", "ticket order symbol type volume price time magic comment", defaults=(0, ""))
+_Tick = namedtuple("Tick", "time bid ask last")
+_Result = namedtuple("OrderSendResult", "retcode deal order volume price comment request_id")
+_TermInfo = namedtuple("TerminalInfo", "connected trade_allowed name")
+
+
+class FakeTerminal:
+    """In-memory MetaTrader5 look-alike: market deals fill at the quote, pending
+    orders rest until removed. ``fail_init`` / ``drop()`` simulate outages."""
+
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_PENDING = 5
+    TRADE_ACTION_SLTP = 6
+    TRADE_ACTION_MODIFY = 7
+    TRADE_ACTION_REMOVE = 8
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TYPE_BUY_LIMIT = 2
+    ORDER_TYPE_SELL_LIMIT = 3
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_REJECT = 10006
+    TRADE_RETCODE_INVALID = 10013
+
+    def __init__(self, quotes: Optional[Dict[str, float]] = None, spread: float = 0.0002, fail_init: int = 0):
+        self.quotes = {"EURUSD": 1.1000, "GBPUSD": 1.2700, "USDJPY": 150.00, **(quotes or {})}
+        self.spread = float(spread)
+        self.fail_init = int(fail_init)
+        self.connected = False
+        self.init_calls = 0
+        self._err = (1, "Success")
+        self._seq = itertools.count(1000)
+        self._orders: Dict[int, _Order] = {}
+        self._deals: list = []
+        self._lock = threading.Lock()
+
+    # connection
+    def initialize(self, *a, **k) -> bool:
+        self.init_calls += 1
+        if self.fail_init > 0:
+            self.fail_init -= 1
+            self._err = (-10003, "IPC initialize failed")
+            return False
+        self.connected = True
+        self._err = (1, "Success")
+        return True
+
+    def login(self, *a, **k) -> bool:
+        return self.connected
+
+    def shutdown(self) -> None:
+        self.connected = False
+
+    def drop(self) -> None:
+        """Simulate the terminal going away."""
+        self.connected = False
+
+    def last_error(self):
+        return self._err
+
+    def _link(self) -> bool:
+        if not self.connected:
+            self._err = (-10004, "No IPC connection")
+        return self.connected
+
+    def version(self):
+        return (500, 4000, "fake") if self._link() else None
+
+    def terminal_info(self):
+        return _TermInfo(True, True, "FakeTerminal") if self._link() else None
+
+    # market data
+    def symbol_info_tick(self, symbol: str):
+        if not self._link():
+            return None
+        mid = self.quotes.get(str(symbol).upper())
+        if mid is None:
+            self._err = (-1, "unknown symbol")
+            return None
+        return _Tick(int(time.time()), mid - self.spread / 2, mid + self.spread / 2, mid)
+
+    # trading
+    def orders_get(self, *a, **k):
+        if not self._link():
+            return None
+        with self._lock:
+            return tuple(self._orders.values())
+
+    def history_deals_get(self, date_from=None, date_to=None, *a, **k):
+        if not self._link():
+            return None
+        lo = float(date_from or 0); hi = float(date_to or time.time() + 1)
+        with self._lock:
+            return tuple(d for d in self._deals if lo <= d.time <= hi)
+
+    def order_send(self, req: Dict[str, Any]):
+        if not self._link():
+            return None
+        action = req.get("action")
+        now = int(time.time())
+        with self._lock:
+            if action == self.TRADE_ACTION_REMOVE:
+                ok = self._orders.pop(int(req.get("order", 0)), None) is not None
+                return _Result(self.TRADE_RETCODE_DONE if ok else self.TRADE_RETCODE_INVALID, 0,
+                               int(req.get("order", 0)), 0.0, 0.0, "", 0)
+            sym = str(req.get("symbol", "")).upper()
+            vol = float(req.get("volume", 0.0))
+            typ = int(req.get("type", 0))
+            if sym not in self.quotes or vol <= 0:
+                return _Result(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, "invalid", 0)
+            ticket = next(self._seq)
+            if action == self.TRADE_ACTION_PENDING:
+                self._orders[ticket] = _Order(ticket, sym, typ, vol, float(req.get("price", 0.0)), now,
+                                              int(req.get("magic", 0)), str(req.get("comment", "")))
+                return _Result(self.TRADE_RETCODE_DONE, 0, ticket, vol, float(req.get("price", 0.0)), "placed", 0)
+            mid = self.quotes[sym]
+            px = mid + self.spread / 2 if typ % 2 == 0 else mid - self.spread / 2
+            deal = next(self._seq)
+            self._deals.append(_Deal(deal, ticket, sym, typ, vol, px, now,
+                                     int(req.get("magic", 0)), str(req.get("comment", ""))))
+            return _Result(self.TRADE_RETCODE_DONE, deal, ticket, vol, px, "done", 0)
+
+
+# ---- session -------------------------------------------------------------------
+
+def _default_terminal():
+    kind = os.environ.get(ENV_TERMINAL, "").lower()
+    if kind == "fake":
+        return FakeTerminal()
+    if kind == "sim" or os.environ.get("CFX_MT5_SIM"):
+        from chamelefx.integrations import mt5_sim
+        return mt5_sim.from_env()
+    try:
+        import MetaTrader5 as mt5  # noqa: F401
+        return mt5
+    except Exception:
+        return None
+
+
+class MT5Session:
+    def __init__(self, terminal: Any = None, login: Optional[Dict[str, Any]] = None,
+                 backoff_min: float = 0.5, backoff_max: float = 30.0, keepalive_sec: float = 15.0):
+        self.terminal = terminal
+        self.login_args = login
+        self.backoff_min = float(backoff_min)
+        self.backoff_max = float(backoff_max)
+        self.keepalive_sec = float(keepalive_sec)
+        self._q: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._connected = False
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._m = {"calls": 0, "errors": 0, "connects": 0, "connect_failures": 0, "disconnects": 0, "dropped": 0,
+                   "lat_sum": 0.0, "lat_max": 0.0, "last_ok": 0.0, "last_error": None, "connected_since": 0.0}
+
+    # -- worker side (only ever runs on self._thread) --
+    def _connect(self) -> bool:
+        if self._connected:
+            return True
+        now = time.time()
+        if now < self._retry_at:
+            return False
+        t = self.terminal
+        ok = False
+        try:
+            ok = bool(t.initialize())
+            if ok and self.login_args and all(k in self.login_args for k in ("login", "password", "server")):
+                ok = bool(t.login(int(self.login_args["login"]), password=str(self.login_args["password"]),
+                                  server=str(self.login_args["server"])))
+        except Exception as e:
+            self._m["last_error"] = repr(e)
+        if ok:
+            self._connected = True
+            self._backoff = 0.0
+            self._m["connects"] += 1
+            self._m["connected_since"] = now
+            return True
+        self._m["connect_failures"] += 1
+        try:
+            self._m["last_error"] = str(t.last_error())
+        except Exception:
+            pass
+        self._backoff = min(self.backoff_max, max(self.backoff_min, self._backoff * 2))
+        self._retry_at = now + self._backoff
+        log.warning("MT5 connect failed, retry in %.1fs: %s", self._backoff, self._m["last_error"])
+        return False
+
+    def _lost(self) -> bool:
+        try:
+            err = self.terminal.last_error()
+            code = int(err[0]) if isinstance(err, (tuple, list)) else int(err)
+        except Exception:
+            return False
+        return code in _LINK_ERRORS
+
+    def _mark_down(self) -> None:
+        if self._connected:
+            self._connected = False
+            self._m["disconnects"] += 1
+            try:
+                self.terminal.shutdown()
+            except Exception:
+                pass
+
+    def _invoke(self, fn: Callable[[Any], Any]) -> Any:
+        for attempt in (0, 1):
+            if not self._connect():
+                raise MT5Unavailable(f"MT5 not connected (retry in {max(0.0, self._retry_at - time.time()):.1f}s): "
+                                     f"{self._m['last_error']}")
+            res = fn(self.terminal)
+            if res is None and self._lost():
+                # link dropped under us: reconnect once, immediately
+                self._mark_down()
+                self._retry_at = 0.0
+                continue
+            return res
+        raise MT5Unavailable(f"MT5 connection lost: {self._m['last_error']}")
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._q.get(timeout=self.keepalive_sec)
+            except queue.Empty:
+                if self._connected and self.terminal is not None:
+                    try:
+                        if self.terminal.terminal_info() is None and self._lost():
+                            self._mark_down()
+                    except Exception:
+                        self._mark_down()
+                continue
+            if item is None:
+                break
+            fn, fut, t_enq = item
+            if not fut.set_running_or_notify_cancel():
+                self._m["dropped"] += 1      # caller timed out / cancelled while queued
+                continue
+            t0 = time.perf_counter()
+            try:
+                res = self._invoke(fn)
+                fut.set_result(res)
+                self._m["last_ok"] = time.time()
+            except BaseException as e:
+                self._m["errors"] += 1
+                if not isinstance(e, MT5Unavailable):  # keep the underlying connect error
+                    self._m["last_error"] = repr(e)
+                fut.set_exception(e)
+            dt = time.perf_counter() - t0
+            self._m["calls"] += 1
+            self._m["lat_sum"] += dt
+            self._m["lat_max"] = max(self._m["lat_max"], dt)
+        try:
+            if self._connected:
+                self.terminal.shutdown()
+        finally:
+            self._connected = False
+
+    # -- caller side --
+    def _ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="mt5-session", daemon=True)
+            self._thread.start()
+
+    def submit(self, fn: Callable[[Any], Any]) -> Future:
+        """Queue fn(terminal) for the session thread."""
+        if self.terminal is None:
+            raise MT5Unavailable("MetaTrader5 package not installed")
+        self._ensure_thread()
+        fut: Future = Future()
+        self._q.put((fn, fut, time.time()))
+        return fut
+
+    def call(self, name: str | Callable[[Any], Any], *args, timeout: float = 10.0, **kwargs) -> Any:
+        """
+        Run ``terminal.<name>(*args, **kwargs)`` (or a callable taking the terminal)
+        on the session thread. On timeout the job is cancelled if it has not
+        started yet, then CallTimeout (a TimeoutError) is raised.
+        """
+        fn = name if callable(name) else (lambda t: getattr(t, name)(*args, **kwargs))
+        fut = self.submit(fn)
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            started = not fut.cancel()
+            raise CallTimeout(f"mt5 call timed out after {timeout}s", started) from None
+
+    def const(self, name: str, default: Any = None) -> Any:
+        return getattr(self.terminal, name, default)
+
+    def health(self) -> Dict[str, Any]:
+        m = dict(self._m)
+        calls = m.pop("calls")
+        lat_sum = m.pop("lat_sum")
+        now = time.time()
+        return {"ok": self._connected, "terminal": type(self.terminal).__name__ if self.terminal is not None else None,
+                "connected": self._connected, "worker_alive": bool(self._thread and self._thread.is_alive()),
+                "queue_depth": self._q.qsize(), "calls": calls,
+                "lat_avg_ms": round(1000.0 * lat_sum / calls, 3) if calls else 0.0,
+                "lat_max_ms": round(1000.0 * m.pop("lat_max"), 3),
+                "uptime_sec": round(now - m["connected_since"], 1) if self._connected and m["connected_since"] else 0.0,
+                "backoff_sec": self._backoff, "retry_in_sec": round(max(0.0, self._retry_at - now), 2), **m}
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread and self._thread.is_alive():
+            self._q.put(None)
+            self._thread.join(timeout)
+
+
+_SESSION: Optional[MT5Session] = None
+_SLOCK = threading.Lock()
+
+
+def get_session() -> MT5Session:
+    global _SESSION
+    if _SESSION is None:
+        with _SLOCK:
+            if _SESSION is None:
+                login = None
+                try:
+                    from chamelefx.integrations.mt5_client import LOGIN_PATH, _read_json
+                    login = _read_json(LOGIN_PATH, None)
+                except Exception:
+                    pass
+                _SESSION = MT5Session(_default_terminal(), login=login)
+    return _SESSION
+
+
+def set_terminal(terminal: Any, **kwargs) -> MT5Session:
+    """Swap the process-wide session onto another terminal (e.g. FakeTerminal in CI)."""
+    global _SESSION
+    with _SLOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+        _SESSION = MT5Session(terminal, **kwargs)
+    return _SESSION
+
+
+def call(name, *args, timeout: float = 10.0, **kwargs) -> Any:
+    return get_session().call(name, *args, timeout=timeout, **kwargs)
+
+
+def health() -> Dict[str, Any]:
+    return get_session().health()
@@ -0,0 +1,326 @@
+"""
+Simulated MT5 broker in a separate process.
+
+``SimBroker`` extends the in-memory ``FakeTerminal`` with what a real venue
+does to the order path: a sampled service latency per call, random rejects,
+partial fills and net positions. ``serve()`` exposes it over
+``multiprocessing.connection`` (one thread per client connection), and
+``SimTerminal`` is the client side: it has the MetaTrader5 module surface
+(``initialize``, ``symbol_info_tick``, ``order_send``, ``positions_get``,
+``history_deals_get``, ``orders_get``, constants), so it can stand in for the
+real module in ``mt5_client`` and ``mt5_session``.
+
+Select it with CFX_MT5_SIM=host:port (connect to a running broker) or
+CFX_MT5_SIM=spawn (start one for this process); run a standalone broker with
+
+    python -m chamelefx.integrations.mt5_sim --port 18812 --latency-ms 2 --reject 0.01
+
+Config keys (``SimBroker(**cfg)`` / ``spawn(cfg)``):
+  latency        {"dist": "lognormal"|"exp"|"const"|"uniform", "median_ms", "sigma",
+                  "lo_ms", "hi_ms", "floor_ms"}    order_send service time
+  query_latency  same shape, for read calls (ticks, positions, history); default none
+  reject_rate    probability a market order is rejected (TRADE_RETCODE_REJECT)
+  partial_rate   probability a market order fills partially (TRADE_RETCODE_DONE_PARTIAL)
+  partial_min    smallest filled fraction of a partial fill
+  seed, quotes, spread
+"""
+from __future__ import annotations
+import argparse, math, os, random, threading, time
+from collections import namedtuple
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, Optional, Tuple
+
+from chamelefx.log import get_logger
+from chamelefx.integrations.mt5_session import FakeTerminal, _Deal, _Result
+
+log = get_logger(__name__)
+
+ENV_SIM = "CFX_MT5_SIM"
+AUTHKEY = b"cfx-mt5-sim"
+
+_Position = namedtuple("TradePosition", "ticket symbol type volume price_open time")
+
+
+class Latency:
+    """Sampler for a service-time distribution (seconds)."""
+
+    def __init__(self, dist: str = "const", median_ms: float = 0.0, sigma: float = 0.5,
+                 lo_ms: float = 0.0, hi_ms: float = 0.0, floor_ms: float = 0.0):
+        self.dist = str(dist).lower()
+        self.median = float(median_ms) / 1000.0
+        self.sigma = float(sigma)
+        self.lo, self.hi = float(lo_ms) / 1000.0, float(hi_ms) / 1000.0
+        self.floor = float(floor_ms) / 1000.0
+
+    @classmethod
+    def of(cls, spec: Any) -> Optional["Latency"]:
+        if spec is None or isinstance(spec, Latency):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("const", spec) if spec > 0 else None
+        return cls(**dict(spec))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.dist == "lognormal":
+            s = self.median * math.exp(self.sigma * rng.gauss(0.0, 1.0)) if self.median > 0 else 0.0
+        elif self.dist == "exp":
+            s = rng.expovariate(math.log(2) / self.median) if self.median > 0 else 0.0
+        elif self.dist == "uniform":
+            s = rng.uniform(self.lo, self.hi)
+        else:
+            s = self.median
+        return max(self.floor, s)
+
+
+class SimBroker(FakeTerminal):
+    TRADE_ACTION_CLOSE_BY = 10
+    POSITION_TYPE_BUY = 0
+    POSITION_TYPE_SELL = 1
+    TRADE_RETCODE_DONE_PARTIAL = 10010
+
+    def __init__(self, latency: Any = None, query_latency: Any = None, reject_rate: float = 0.0,
+                 partial_rate: float = 0.0, partial_min: float = 0.2, seed: Optional[int] = None,
+                 quotes: Optional[Dict[str, float]] = None, spread: float = 0.0002):
+        super().__init__(quotes=quotes, spread=spread)
+        self.latency = Latency.of(latency)
+        self.query_latency = Latency.of(query_latency)
+        self.reject_rate = float(reject_rate)
+        self.partial_rate = float(partial_rate)
+        self.partial_min = min(1.0, max(0.0, float(partial_min)))
+        self._rng = random.Random(seed)
+        self._rlock = threading.Lock()
+        self._positions: Dict[str, _Position] = {}
+        self.counts = {"orders": 0, "filled": 0, "partial": 0, "rejected": 0}
+
+    def _draw(self):
+        with self._rlock:
+            return self._rng.random(), self._rng.random()
+
+    def _delay(self, lat: Optional[Latency]) -> None:
+        if lat is not None:
+            with self._rlock:
+                s = lat.sample(self._rng)
+            if s > 0:
+                time.sleep(s)
+
+    # reads
+    def symbol_info_tick(self, symbol: str):
+        self._delay(self.query_latency)
+        return super().symbol_info_tick(symbol)
+
+    def orders_get(self, *a, **k):
+        self._delay(self.query_latency)
+        return super().orders_get(*a, **k)
+
+    def history_deals_get(self, date_from=None, date_to=None, *a, **k):
+        self._delay(self.query_latency)
+        return super().history_deals_get(date_from, date_to, *a, **k)
+
+    def positions_get(self, symbol: Optional[str] = None, *a, **k):
+        self._delay(self.query_latency)
+        if not self._link():
+            return None
+        with self._lock:
+            ps = self._positions.values()
+            return tuple(p for p in ps if symbol is None or p.symbol == str(symbol).upper())
+
+    # trading
+    def order_send(self, req: Dict[str, Any]):
+        self._delay(self.latency)
+        if not self._link() or req.get("action") != self.TRADE_ACTION_DEAL:
+            return super().order_send(req)
+        sym = str(req.get("symbol", "")).upper()
+        vol = float(req.get("volume", 0.0))
+        typ = int(req.get("type", 0))
+        if sym not in self.quotes or vol <= 0:
+            return _Result(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, "invalid", 0)
+        u_rej, u_part = self._draw()
+        with self._lock:
+            self.counts["orders"] += 1
+            if u_rej < self.reject_rate:
+                self.counts["rejected"] += 1
+                return _Result(self.TRADE_RETCODE_REJECT, 0, 0, 0.0, 0.0, "rejected", 0)
+            code = self.TRADE_RETCODE_DONE
+            if u_part < self.partial_rate:
+                frac = self.partial_min + (1.0 - self.partial_min) * (u_part / self.partial_rate)
+                vol = max(0.01, round(vol * frac, 2))
+                code = self.TRADE_RETCODE_DONE_PARTIAL
+                self.counts["partial"] += 1
+            self.counts["filled"] += 1
+            mid = self.quotes[sym]
+            px = mid + self.spread / 2 if typ % 2 == 0 else mid - self.spread / 2
+            ticket, deal, now = next(self._seq), next(self._seq), int(time.time())
+            self._deals.append(_Deal(deal, ticket, sym, typ, vol, px, now,
+                                     int(req.get("magic", 0)), str(req.get("comment", ""))))
+            self._net(sym, typ, vol, px, ticket, now)
+            return _Result(code, deal, ticket, vol, px, "done" if code == self.TRADE_RETCODE_DONE else "partial", 0)
+
+    def _net(self, sym: str, typ: int, vol: float, px: float, ticket: int, now: int) -> None:
+        signed = vol if typ % 2 == 0 else -vol
+        p = self._positions.get(sym)
+        cur = 0.0 if p is None else (p.volume if p.type == self.POSITION_TYPE_BUY else -p.volume)
+        new = round(cur + signed, 8)
+        if abs(new) < 1e-9:
+            self._positions.pop(sym, None)
+        elif p is None or (cur > 0) != (new > 0):
+            self._positions[sym] = _Position(ticket, sym, 0 if new > 0 else 1, abs(new), px, now)
+        else:
+            self._positions[sym] = p._replace(volume=abs(new))
+
+    def sim_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counts, "positions": len(self._positions), "deals": len(self._deals)}
+
+
+# ---- wire protocol -----------------------------------------------------------
+# MT5 results are namedtuples; they travel as (name, fields, values) so the
+# client does not need the server's classes to unpickle them.
+
+_NT_CACHE: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+
+def _pack(v: Any) -> Any:
+    if isinstance(v, tuple) and hasattr(v, "_fields"):
+        return ("__nt__", type(v).__name__, v._fields, tuple(v))
+    if isinstance(v, tuple):
+        return tuple(_pack(x) for x in v)
+    return v
+
+def _unpack(v: Any) -> Any:
+    if isinstance(v, tuple) and len(v) == 4 and v[0] == "__nt__":
+        key = (v[1], tuple(v[2]))
+        cls = _NT_CACHE.get(key) or _NT_CACHE.setdefault(key, namedtuple(v[1], v[2]))
+        return cls(*v[3])
+    if isinstance(v, tuple):
+        return tuple(_unpack(x) for x in v)
+    return v
+
+
+def _handle(conn, broker: SimBroker) -> None:
+    try:
+        while True:
+            try:
+                name, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if name.startswith("_"):
+                    raise AttributeError(name)
+                attr = getattr(broker, name)
+                out = ("ok", _pack(attr(*args, **kwargs) if callable(attr) else attr))
+            except Exception as e:
+                out = ("err", repr(e))
+            conn.send(out)
+    finally:
+        conn.close()
+
+
+def serve(address: Tuple[str, int] = ("127.0.0.1", 0), authkey: bytes = AUTHKEY,
+          config: Optional[Dict[str, Any]] = None, ready=None) -> None:
+    """Run a broker until the process is killed. ``ready`` (a Connection) receives the bound address."""
+    broker = SimBroker(**(config or {}))
+    with Listener(tuple(address), authkey=authkey) as ln:
+        log.info("mt5 sim listening on %s", ln.address)
+        if ready is not None:
+            ready.send(ln.address); ready.close()
+        while True:
+            conn = ln.accept()
+            threading.Thread(target=_handle, args=(conn, broker), name="mt5-sim-conn", daemon=True).start()
+
+
+class SimTerminal:
+    """Client for a simulated broker; one connection per calling thread."""
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes = AUTHKEY):
+        self.address = tuple(address)
+        self.authkey = authkey
+        self._local = threading.local()
+        for k in dir(SimBroker):
+            if k.isupper():
+                setattr(self, k, getattr(SimBroker, k))
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = self._local.conn = Client(self.address, authkey=self.authkey)
+        return c
+
+    def _call(self, name: str, *args, **kwargs) -> Any:
+        c = self._conn()
+        try:
+            c.send((name, args, kwargs))
+            status, val = c.recv()
+        except (EOFError, OSError):
+            self._local.conn = None
+            raise
+        if status != "ok":
+            raise RuntimeError(val)
+        return _unpack(val)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *a, **k: self._call(name, *a, **k)
+
+
+class SimProcess:
+    """A broker running in a child process (see ``spawn``)."""
+
+    def __init__(self, proc, address):
+        self.proc, self.address = proc, tuple(address)
+
+    def terminal(self) -> SimTerminal:
+        return SimTerminal(self.address)
+
+    def stop(self) -> None:
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.proc.join(5.0)
+
+
+def spawn(config: Optional[Dict[str, Any]] = None, address: Tuple[str, int] = ("127.0.0.1", 0),
+          timeout: float = 10.0) -> SimProcess:
+    """Start a broker process on ``address`` (port 0 = any free port)."""
+    import multiprocessing as mp
+    rx, tx = mp.Pipe(duplex=False)
+    p = mp.Process(target=serve, args=(address, AUTHKEY, config, tx), name="mt5-sim", daemon=True)
+    p.start()
+    tx.close()
+    if not rx.poll(timeout):
+        p.terminate()
+        raise RuntimeError("mt5 sim did not start")
+    return SimProcess(p, rx.recv())
+
+
+_SPAWNED: Optional[SimProcess] = None
+
+def from_env() -> Optional[SimTerminal]:
+    """Terminal selected by CFX_MT5_SIM (``host:port`` or ``spawn``), else None."""
+    global _SPAWNED
+    spec = os.environ.get(ENV_SIM, "").strip()
+    if not spec:
+        return None
+    if spec.lower() == "spawn":
+        if _SPAWNED is None:
+            _SPAWNED = spawn()
+        return _SPAWNED.terminal()
+    host, _, port = spec.rpartition(":")
+    return SimTerminal((host or "127.0.0.1", int(port)))
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Simulated MT5 broker")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18812)
+    ap.add_argument("--dist", default="lognormal")
+    ap.add_argument("--latency-ms", type=float, default=2.0)
+    ap.add_argument("--sigma", type=float, default=0.5)
+    ap.add_argument("--reject", type=float, default=0.0)
+    ap.add_argument("--partial", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=None)
+    a = ap.parse_args(argv)
+    serve((a.host, a.port), config={"latency": {"dist": a.dist, "median_ms": a.latency_ms, "sigma": a.sigma},
+                                    "reject_rate": a.reject, "partial_rate": a.partial, "seed": a.seed})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Durable append-only outbox.
+
+Entries are numbered (``seq``) and appended as JSON lines to segment files
+``<dir>/<first_seq>.seg``; a segment rolls over at ``segment_bytes``. Appends
+are made durable by group commit: whichever caller reaches ``fsync`` first
+syncs everything written so far, and callers whose seq is already covered
+return without syncing again. Delivery progress is a single offset record
+(``ack.json``: last acked seq + segment/byte position), so acknowledging never
+rewrites queued data; fully acknowledged segments are deleted.
+
+Delivery is in order and at-least-once: ``drain()`` hands entries (``{seq, ts,
+order}``) to ``sender``; a sender exception stops the batch and the entry is
+retried later, while any returned result (accepted or rejected by the broker)
+acknowledges it. The ack offset is written (fsynced) every ``ack_every``
+delivered entries, default 1, so a crash re-sends at most that many
+already-delivered orders.
+
+A sender that cannot tell whether the entry reached the broker (e.g. it timed
+out mid-send) raises ``Unknown``: the entry is parked (recorded in ack.json)
+and never re-sent blindly. The next drain first asks ``reconciler(entry)``,
+which returns the broker's result if the entry got through (acked as is),
+None if it provably did not (sent normally), or raises while it cannot tell
+(stays parked). Entries older than ``max_age_sec`` are acked as expired
+without being sent, so a backlog is not traded long after it was queued.
+"""
+from __future__ import annotations
+import json, os, threading, time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from chamelefx.log import get_logger
+from chamelefx.utils.atomic_json import read_json, write_json_atomic
+
+log = get_logger(__name__)
+
+Sender = Callable[[Dict[str, Any]], Dict[str, Any]]
+Reconciler = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+class Unknown(RuntimeError):
+    """The sender cannot tell whether the entry reached the broker."""
+
+
+class Outbox:
+    def __init__(self, directory: Path, sender: Optional[Sender] = None, segment_bytes: int = 4 << 20,
+                 batch: int = 50, flush_sec: float = 0.5, durable: bool = True, ack_every: int = 1,
+                 reconciler: Optional[Reconciler] = None, max_age_sec: float = 0.0):
+        self.dir = Path(directory)
+        self.sender = sender
+        self.reconciler = reconciler
+        self.max_age_sec = max(0.0, float(max_age_sec or 0.0))   # 0 = no limit
+        self.segment_bytes = int(segment_bytes)
+        self.batch = max(1, int(batch))
+        self.flush_sec = float(flush_sec)
+        self.durable = bool(durable)
+        self.ack_every = max(1, int(ack_every))
+        self.ack_path = self.dir / "ack.json"
+        self._wlock = threading.Lock()      # append order / segment rollover
+        self._slock = threading.Lock()      # fsync (group commit leader)
+        self._dlock = threading.Lock()      # one drainer at a time
+        self._written = 0                   # highest seq written to the OS
+        self._synced = 0                    # highest seq known to be on disk
+        self._fh = None
+        self._seg: Optional[Path] = None
+        self._size = 0
+        self._flusher: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stop = False
+        self.stats_ = {"appended": 0, "fsyncs": 0, "sent": 0, "rejected": 0, "expired": 0, "send_errors": 0,
+                       "unknown": 0, "reconciled": 0, "last_error": None, "last_drain": 0.0}
+        self._open()
+
+    # ---- segments -------------------------------------------------------------
+    def _segments(self) -> List[Path]:
+        return sorted(self.dir.glob("*.seg"))
+
+    @staticmethod
+    def _first_seq(p: Path) -> int:
+        return int(p.stem)
+
+    def _open(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        ack = read_json(self.ack_path, None) or {}
+        self._ack = {"seq": int(ack.get("seq", 0)), "segment": ack.get("segment"), "pos": int(ack.get("pos", 0)),
+                     "unknown": int(ack.get("unknown") or 0)}
+        segs = self._segments()
+        last_seq = self._ack["seq"]
+        if segs:
+            tail = segs[-1]
+            # recover: drop a torn trailing line left by a crash mid-append
+            data = tail.read_bytes()
+            cut = data.rfind(b"\n") + 1
+            if cut != len(data):
+                with open(tail, "r+b") as f:
+                    f.truncate(cut)
+                data = data[:cut]
+            last_seq = self._first_seq(tail) - 1
+            for line in data.splitlines():
+                try:
+                    last_seq = max(last_seq, int(json.loads(line)["seq"]))
+                except Exception:
+                    pass
+            self._seg = tail
+            self._size = cut
+            self._fh = open(tail, "ab", buffering=0)
+        self._written = self._synced = last_seq
+
+    def _roll(self, first_seq: int) -> None:
+        # caller holds _wlock; _slock keeps a concurrent commit() off the closing handle
+        with self._slock:
+            if self._fh is not None:
+                os.fsync(self._fh.fileno())
+                self._fh.close()
+                self._synced = max(self._synced, self._written)
+            self._seg = self.dir / f"{first_seq:020d}.seg"
+            self._fh = open(self._seg, "ab", buffering=0)
+            self._size = 0
+            self._fsync_dir()
+
+    def _fsync_dir(self) -> None:
+        if os.name == "nt":
+            return
+        try:
+            fd = os.open(str(self.dir), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    # ---- write side -----------------------------------------------------------
+    def append(self, order: Dict[str, Any], durable: Optional[bool] = None, ts: Optional[float] = None) -> int:
+        """Queue one entry; returns its seq. O(1): one write + (shared) fsync.
+        ``ts`` overrides the queue time (used for the max-age check)."""
+        with self._wlock:
+            seq = self._written + 1
+            line = (json.dumps({"seq": seq, "ts": time.time() if ts is None else float(ts), "order": order},
+                               separators=(",", ":"), default=str) + "\n").encode("utf-8")
+            if self._fh is None or (self._size and self._size + len(line) > self.segment_bytes):
+                self._roll(seq)
+            self._fh.write(line)
+            self._size += len(line)
+            self._written = seq
+            self.stats_["appended"] += 1
+        if self.durable if durable is None else durable:
+            self.commit(seq)
+        self._wake.set()
+        return seq
+
+    def commit(self, seq: Optional[int] = None) -> None:
+        """Ensure entries up to ``seq`` (default: all written) are on disk."""
+        seq = self._written if seq is None else seq
+        if self._synced >= seq:
+            return
+        with self._slock:
+            if self._synced >= seq:
+                return                       # a concurrent leader's fsync covered us
+            target = self._written
+            fh = self._fh
+            if fh is not None:
+                os.fsync(fh.fileno())
+                self.stats_["fsyncs"] += 1
+            self._synced = max(self._synced, target)
+
+    # ---- read side ------------------------------------------------------------
+    def _read_from(self, segment: Optional[str], pos: int, after_seq: int, limit: int) -> List[Tuple[Dict[str, Any], str, int]]:
+        """Up to ``limit`` entries with seq > after_seq, with the (segment, end offset) after each."""
+        out: List[Tuple[Dict[str, Any], str, int]] = []
+        if limit <= 0:
+            return out
+        segs = self._segments()
+        if segment:
+            segs = [s for s in segs if s.name >= segment]
+        for s in segs:
+            start = pos if s.name == segment else 0
+            with open(s, "rb") as f:
+                f.seek(start)
+                off = start
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break                # still being written
+                    off += len(raw)
+                    try:
+                        ent = json.loads(raw)
+                    except Exception:
+                        continue
+                    if int(ent.get("seq", 0)) <= after_seq:
+                        continue
+                    out.append((ent, s.name, off))
+                    if len(out) >= limit:
+                        return out
+        return out
+
+    def peek(self, n: int = 50) -> List[Dict[str, Any]]:
+        a = self._ack
+        return [e for e, _, _ in self._read_from(a["segment"], a["pos"], a["seq"], max(0, int(n)))]
+
+    def pending(self) -> int:
+        return max(0, self._written - self._ack["seq"])
+
+    # ---- delivery -------------------------------------------------------------
+    def _set_ack(self, seq: int, segment: str, pos: int) -> None:
+        unknown = self._ack.get("unknown", 0)
+        self._ack = {"seq": seq, "segment": segment, "pos": pos, "unknown": unknown if unknown > seq else 0}
+        write_json_atomic(self.ack_path, {**self._ack, "ts": time.time()})
+        # segments whose successor starts at or before the next unacked seq are done
+        segs = self._segments()
+        for cur, nxt in zip(segs, segs[1:]):
+            if self._first_seq(nxt) <= seq + 1 and cur != self._seg:
+                try:
+                    cur.unlink()
+                except OSError:
+                    pass
+
+    def _park(self, seq: int) -> None:
+        """Record ``seq`` as sent-with-unknown-outcome (0 clears it)."""
+        self._ack = {**self._ack, "unknown": seq}
+        write_json_atomic(self.ack_path, {**self._ack, "ts": time.time()})
+
+    def _deliver(self, ent: Dict[str, Any]) -> Dict[str, Any]:
+        seq = int(ent["seq"])
+        if self._ack.get("unknown") == seq:
+            if self.reconciler is None:
+                raise Unknown(f"seq {seq} outcome unknown and no reconciler")
+            res = self.reconciler(ent)       # raises while the broker cannot answer
+            if res is not None:
+                self.stats_["reconciled"] += 1
+                return res
+            self._park(0)                    # provably not sent: safe to send
+        if self.max_age_sec and time.time() - float(ent.get("ts", 0.0)) > self.max_age_sec:
+            return {"ok": False, "error": "expired", "expired": True}
+        return self.sender(ent) or {}
+
+    def drain(self, max_items: Optional[int] = None) -> Dict[str, Any]:
+        """Send up to ``max_items`` pending entries (default: one batch)."""
+        if self.sender is None:
+            return {"sent": 0, "rejected": 0, "expired": 0, "pending": self.pending(), "error": "no_sender"}
+        limit = max(0, int(max_items if max_items is not None else self.batch))
+        sent = rejected = expired = 0
+        results: List[Dict[str, Any]] = []
+        err = None
+        with self._dlock:
+            self.commit()                     # only deliver what is durable
+            while limit > 0:
+                a = self._ack
+                batch = self._read_from(a["segment"], a["pos"], a["seq"], min(limit, self.batch))
+                if not batch:
+                    break
+                done = None
+                unacked = 0
+                for ent, seg, off in batch:
+                    try:
+                        res = self._deliver(ent)
+                    except Unknown as e:
+                        err = repr(e)
+                        self.stats_["unknown"] += 1
+                        self.stats_["last_error"] = err
+                        self._park(int(ent["seq"]))
+                        break
+                    except Exception as e:
+                        err = repr(e)
+                        self.stats_["send_errors"] += 1
+                        self.stats_["last_error"] = err
+                        break
+                    ok = bool(res.get("ok"))
+                    if res.get("expired"):
+                        expired += 1
+                    else:
+                        sent += ok; rejected += (not ok)
+                    results.append({"seq": ent["seq"], "ok": ok, "ticket": res.get("ticket"),
+                                    "error": None if ok else res.get("error")})
+                    done = (int(ent["seq"]), seg, off)
+                    unacked += 1
+                    if unacked >= self.ack_every:
+                        self._set_ack(*done)
+                        unacked = 0
+                if done and unacked:
+                    self._set_ack(*done)
+                limit -= len(batch)
+                if err:
+                    break
+        self.stats_["sent"] += sent
+        self.stats_["rejected"] += rejected
+        self.stats_["expired"] += expired
+        self.stats_["last_drain"] = time.time()
+        return {"sent": sent, "rejected": rejected, "expired": expired, "pending": self.pending(), "error": err,
+                "results": results}
+
+    def _run(self) -> None:
+        while not self._stop:
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            if self._stop:
+                break
+            try:
+                if not self.durable:
+                    self.commit()
+                while self.pending():
+                    r = self.drain(self.batch)
+                    if r.get("error") or not (r["sent"] or r["rejected"] or r["expired"]):
+                        time.sleep(self.flush_sec)   # broker down: back off until next tick
+                        break
+            except Exception:
+                log.exception("outbox flusher failed")
+
+    def start(self) -> None:
+        """Start the background flusher (idempotent)."""
+        if self._flusher and self._flusher.is_alive():
+            return
+        self._stop = False
+        self._flusher = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop(self) -> None:
+        self._stop = True
+        self._wake.set()
+        if self._flusher:
+            self._flusher.join(5.0)
+        self.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.stats_, "last_seq": self._written, "synced_seq": self._synced,
+                "acked_seq": self._ack["seq"], "parked_seq": self._ack.get("unknown") or None, "pending": self.pending(),
+                "segments": len(self._segments()), "flusher": bool(self._flusher and self._flusher.is_alive())}
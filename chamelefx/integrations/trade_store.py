@@ -0,0 +1,337 @@
+"""
+Embedded SQLite trade store (WAL) for fills and order echoes.
+
+Replaces runtime/fills.json (capped at 500 rows) and runtime/orders_recent.json
+(rewritten on every order). Writes are buffered and committed in batches by a
+background flusher; every read flushes the buffer first, so a process always
+sees its own writes. History is unbounded; range queries use the indexes on
+symbol/ts/ticket/venue.
+"""
+from __future__ import annotations
+import atexit, json, os, sqlite3, threading, time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from chamelefx.log import get_logger
+
+log = get_logger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+RUN  = ROOT / "runtime"
+DB_PATH = RUN / "trades.db"
+LEGACY_FILLS  = RUN / "fills.json"
+LEGACY_ORDERS = RUN / "orders_recent.json"
+
+BATCH_SIZE = 256
+FLUSH_SEC  = 0.05
+
+FILL_COLS  = ("ts", "ticket", "symbol", "side", "qty", "price", "bench", "mid", "vwap", "venue", "mode", "kind")
+ORDER_COLS = ("ts", "symbol", "side", "weight", "lots", "status", "ticket", "venue", "order_type")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts     REAL NOT NULL,
+    ticket INTEGER,
+    symbol TEXT,
+    side   TEXT,
+    qty    REAL,
+    price  REAL,
+    bench  REAL,
+    mid    REAL,
+    vwap   REAL,
+    venue  TEXT,
+    mode   TEXT,
+    kind   TEXT NOT NULL DEFAULT 'fill',
+    extra  TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_fills_symbol_ts ON fills(symbol, ts);
+CREATE INDEX IF NOT EXISTS ix_fills_ts        ON fills(ts);
+CREATE INDEX IF NOT EXISTS ix_fills_ticket    ON fills(ticket);
+CREATE INDEX IF NOT EXISTS ix_fills_venue_ts  ON fills(venue, ts);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts         REAL NOT NULL,
+    symbol     TEXT,
+    side       TEXT,
+    weight     REAL,
+    lots       REAL,
+    status     TEXT,
+    ticket     INTEGER,
+    venue      TEXT,
+    order_type TEXT,
+    extra      TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_orders_symbol_ts ON orders(symbol, ts);
+CREATE INDEX IF NOT EXISTS ix_orders_ts        ON orders(ts);
+CREATE INDEX IF NOT EXISTS ix_orders_ticket    ON orders(ticket);
+CREATE INDEX IF NOT EXISTS ix_orders_venue     ON orders(venue);
+"""
+
+
+def _num(x) -> Optional[float]:
+    try:
+        return None if x is None else float(x)
+    except Exception:
+        return None
+
+
+def _int(x) -> Optional[int]:
+    try:
+        return None if x is None else int(x)
+    except Exception:
+        return None
+
+
+def _fill_row(rec: Dict[str, Any]) -> tuple:
+    r = dict(rec)
+    kind = r.pop("kind", None) or ("modify" if "modify_ticket" in r else
+                                   "close" if any(k in r for k in ("close", "close_ticket", "close_symbol")) else "fill")
+    qty = r.pop("qty", None)
+    if qty is None:
+        qty = r.get("lots")
+    sym = r.pop("symbol", None)
+    row = (
+        _num(r.pop("ts", None)) or time.time(),
+        _int(r.pop("ticket", None)),
+        str(sym).upper() if sym else None,
+        r.pop("side", None),
+        _num(qty),
+        _num(r.pop("price", None)),
+        _num(r.pop("bench", None)),
+        _num(r.pop("mid", None)),
+        _num(r.pop("vwap", None)),
+        (str(r.pop("venue")).upper() if r.get("venue") else r.pop("venue", None)),
+        r.pop("mode", None),
+        kind,
+        json.dumps(r, default=str) if r else None,
+    )
+    return row
+
+
+def _order_row(rec: Dict[str, Any]) -> tuple:
+    r = dict(rec)
+    sym = r.pop("symbol", None)
+    return (
+        _num(r.pop("ts", None)) or time.time(),
+        str(sym).upper() if sym else None,
+        r.pop("side", None),
+        _num(r.pop("weight", None)),
+        _num(r.pop("lots", None)),
+        r.pop("status", None),
+        _int(r.pop("ticket", None)),
+        (str(r.pop("venue")).upper() if r.get("venue") else r.pop("venue", None)),
+        r.pop("order_type", None),
+        json.dumps(r, default=str) if r else None,
+    )
+
+
+def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    d = {k: row[k] for k in row.keys() if k != "extra"}
+    extra = row["extra"]
+    if extra:
+        try:
+            for k, v in json.loads(extra).items():
+                d.setdefault(k, v)
+        except Exception:
+            pass
+    return d
+
+
+class TradeStore:
+    def __init__(self, path: Path = DB_PATH, batch_size: int = BATCH_SIZE, flush_sec: float = FLUSH_SEC):
+        self.path = Path(path)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_sec = float(flush_sec)
+        self._tls = threading.local()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()   # held from pop to commit, so readers see in-flight rows
+        self._pending_fills: List[tuple] = []
+        self._pending_orders: List[tuple] = []
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._ready = False
+
+    # ---- connection -------------------------------------------------------
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._tls, "conn", None)
+        if c is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            c = sqlite3.connect(str(self.path), timeout=10.0, check_same_thread=False)
+            c.row_factory = sqlite3.Row
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._tls.conn = c
+            if not self._ready:
+                with self._lock:
+                    if not self._ready:
+                        c.executescript(_SCHEMA)
+                        self._migrate_legacy(c)
+                        self._ready = True
+        return c
+
+    def _migrate_legacy(self, c: sqlite3.Connection) -> None:
+        """One-time import of the old JSON files; they are renamed *.migrated."""
+        for src, table, conv, key in ((LEGACY_FILLS, "fills", _fill_row, None),
+                                      (LEGACY_ORDERS, "orders", _order_row, "orders")):
+            if not src.exists():
+                continue
+            try:
+                raw = json.loads(src.read_text(encoding="utf-8"))
+                rows = raw.get(key, []) if key and isinstance(raw, dict) else raw
+                rows = [conv(r) for r in rows if isinstance(r, dict)] if isinstance(rows, list) else []
+                self._insert(c, table, rows)
+                c.commit()
+                os.replace(src, src.with_suffix(src.suffix + ".migrated"))
+                log.info("trade_store: migrated %d rows from %s", len(rows), src.name)
+            except Exception:
+                log.exception("trade_store: legacy import failed for %s", src)
+
+    @staticmethod
+    def _insert(c: sqlite3.Connection, table: str, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        cols = (FILL_COLS if table == "fills" else ORDER_COLS) + ("extra",)
+        sql = f"INSERT INTO {table} ({','.join(cols)}) VALUES ({','.join('?' * len(cols))})"
+        c.executemany(sql, rows)
+
+    # ---- writes (batched) -------------------------------------------------
+    def _enqueue(self, bucket: List[tuple], rows: Iterable[tuple]) -> None:
+        with self._lock:
+            bucket.extend(rows)
+            full = (len(self._pending_fills) + len(self._pending_orders)) >= self.batch_size
+        if full:
+            self.flush()
+        else:
+            self._ensure_flusher()
+            self._wake.set()
+
+    def add_fill(self, rec: Dict[str, Any]) -> None:
+        self._enqueue(self._pending_fills, [_fill_row(rec)])
+
+    def add_fills(self, recs: Iterable[Dict[str, Any]]) -> None:
+        self._enqueue(self._pending_fills, [_fill_row(r) for r in recs])
+
+    def add_order(self, rec: Dict[str, Any]) -> None:
+        self._enqueue(self._pending_orders, [_order_row(rec)])
+
+    def add_orders(self, recs: Iterable[Dict[str, Any]]) -> None:
+        self._enqueue(self._pending_orders, [_order_row(r) for r in recs])
+
+    def flush(self) -> int:
+        """Commit everything buffered in one transaction; returns once any concurrent flush has committed."""
+        with self._flush_lock:
+            with self._lock:
+                fills, self._pending_fills = self._pending_fills, []
+                orders, self._pending_orders = self._pending_orders, []
+            if not fills and not orders:
+                return 0
+            c = self._conn()
+            try:
+                with c:
+                    self._insert(c, "fills", fills)
+                    self._insert(c, "orders", orders)
+            except Exception:
+                log.exception("trade_store flush failed; re-queueing %d rows", len(fills) + len(orders))
+                with self._lock:
+                    self._pending_fills[:0] = fills
+                    self._pending_orders[:0] = orders
+                return 0
+            return len(fills) + len(orders)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name="trade-store-flush", daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.flush_sec)  # let a burst accumulate into one commit
+            try:
+                self.flush()
+            except Exception:
+                log.exception("trade_store flusher error")
+
+    # ---- reads ------------------------------------------------------------
+    def _select(self, table: str, symbol=None, venue=None, since=None, until=None, ticket=None,
+                kind=None, status=None, after_id=None, limit=None, desc=False) -> List[Dict[str, Any]]:
+        self.flush()
+        where, args = [], []
+        for col, op, val in (("symbol", "=", str(symbol).upper() if symbol else None),
+                             ("venue", "=", str(venue).upper() if venue else None),
+                             ("ts", ">=", since), ("ts", "<", until),
+                             ("ticket", "=", ticket), ("kind", "=", kind),
+                             ("status", "=", status), ("id", ">", after_id)):
+            if val is not None:
+                where.append(f"{col} {op} ?"); args.append(val)
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, id DESC" if desc else " ORDER BY ts, id"
+        if limit:
+            sql += " LIMIT ?"; args.append(int(limit))
+        return [_to_dict(r) for r in self._conn().execute(sql, args)]
+
+    def fills(self, symbol: str | None = None, venue: str | None = None, since: float | None = None,
+              until: float | None = None, ticket: int | None = None, kind: str | None = "fill",
+              after_id: int | None = None, limit: int | None = None, desc: bool = False) -> List[Dict[str, Any]]:
+        return self._select("fills", symbol=symbol, venue=venue, since=since, until=until, ticket=ticket,
+                            kind=kind, after_id=after_id, limit=limit, desc=desc)
+
+    def orders(self, symbol: str | None = None, venue: str | None = None, since: float | None = None,
+               until: float | None = None, ticket: int | None = None, status: str | None = None,
+               limit: int | None = None, desc: bool = False) -> List[Dict[str, Any]]:
+        return self._select("orders", symbol=symbol, venue=venue, since=since, until=until, ticket=ticket,
+                            status=status, limit=limit, desc=desc)
+
+    def recent_fills(self, n: int = 20, symbol: str | None = None) -> List[Dict[str, Any]]:
+        return self.fills(symbol=symbol, limit=n, desc=True)
+
+    def order_counts(self, since: float | None = None) -> Dict[str, int]:
+        self.flush()
+        sql, args = "SELECT symbol, COUNT(*) FROM orders", []
+        if since is not None:
+            sql += " WHERE ts >= ?"; args.append(float(since))
+        sql += " GROUP BY symbol"
+        return {str(s): int(n) for s, n in self._conn().execute(sql, args) if s}
+
+    def fill_rows(self, cols: Iterable[str] = ("id",) + FILL_COLS, kind: str | None = "fill",
+                  after_id: int | None = None) -> List[tuple]:
+        """Plain tuples (no dict conversion) in id order, for columnar readers such as execution.tca."""
+        self.flush()
+        cols = [c for c in cols if c == "id" or c in FILL_COLS]
+        where, args = ["id > ?"], [int(after_id or 0)]
+        if kind is not None:
+            where.append("kind = ?"); args.append(kind)
+        cur = self._conn().cursor()
+        cur.row_factory = None
+        return cur.execute(f"SELECT {', '.join(cols)} FROM fills WHERE {' AND '.join(where)} ORDER BY id", args).fetchall()
+
+    def high_water(self) -> int:
+        """Largest fill id; changes whenever a fill is added."""
+        self.flush()
+        row = self._conn().execute("SELECT MAX(id) FROM fills").fetchone()
+        return int(row[0] or 0)
+
+
+_STORE = TradeStore()
+atexit.register(_STORE.flush)
+
+add_fill = _STORE.add_fill
+add_fills = _STORE.add_fills
+add_order = _STORE.add_order
+add_orders = _STORE.add_orders
+flush = _STORE.flush
+fills = _STORE.fills
+orders = _STORE.orders
+recent_fills = _STORE.recent_fills
+order_counts = _STORE.order_counts
+fill_rows = _STORE.fill_rows
+high_water = _STORE.high_water
@@ -1,7 +1,9 @@
 from __future__ import annotations
-import json, time, math
+import atexit, json, threading, time, math
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+from chamelefx.utils import config as _config
+from chamelefx.utils import latency as _latency
 
 ROOT = Path(__file__).resolve().parents[2]
 CFX  = ROOT / "chamelefx"
@@ -17,18 +19,16 @@ def _day_key(ts: Optional[float] = None) -> str:
     return d
 
 def _load_cfg() -> Dict[str, Any]:
-    import json
-    p = CFX / "config.json"
-    try:
-        return json.loads(p.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return _config.get()
+
+def _empty_state() -> Dict[str, Any]:
+    return {"ts": _now(), "by_symbol": {}, "global": {}}
 
 def _load_state() -> Dict[str, Any]:
     try:
         return json.loads(STATE_FILE.read_text(encoding="utf-8"))
     except Exception:
-        return {"ts": _now(), "by_symbol": {}, "global": {}}
+        return _empty_state()
 
 def _save_state(s: Dict[str, Any]) -> None:
     STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -40,24 +40,161 @@ def _get_cap_bps(symbol: str, cfg: Dict[str, Any]) -> float:
     bps_map = ((cfg.get("risk") or {}).get("daily_loss_bps") or {})
     return float(bps_map.get(symbol, bps_map.get("DEFAULT", 150)))  # 1.5% default
 
+class RiskEngine:
+    """
+    Resident risk state (same shape as risk_state.json). Gate checks and PnL
+    updates touch memory only; a background thread writes a snapshot at most
+    every `snapshot_sec` when something changed, plus once at exit.
+    """
+    def __init__(self, path: Path = STATE_FILE, snapshot_sec: float = 2.0):
+        self.path = Path(path)
+        self.snapshot_sec = float(snapshot_sec)
+        self._lock = threading.RLock()
+        self._wlock = threading.Lock()      # serialize+write as one step: snapshots land in order
+        self._st = self._read(self.path)
+        self._st.setdefault("by_symbol", {}); self._st.setdefault("global", {})
+        self._dirty = False
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _read(p: Path) -> Dict[str, Any]:
+        try: return json.loads(p.read_text(encoding="utf-8"))
+        except Exception: return _empty_state()
+
+    # ---- persistence ----
+    def _touch(self) -> None:
+        self._st["ts"] = _now()
+        self._dirty = True
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="risk-snapshot", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.snapshot_sec)
+            self.flush()
+
+    def flush(self) -> bool:
+        # _wlock orders concurrent flushes (snapshot thread, reset(), atexit) so an
+        # older blob can never replace a newer one; updates only wait on _lock
+        with self._wlock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                blob = json.dumps(self._st, indent=2)
+                self._dirty = False
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(blob, encoding="utf-8")
+                tmp.replace(self.path)
+                return True
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._st))
+
+    # ---- updates ----
+    def record_pnl(self, symbol: str, pnl: float) -> Dict[str, Any]:
+        day = _day_key()
+        with self._lock:
+            d = self._st["by_symbol"].setdefault(symbol, {}).setdefault(day, {"pnl": 0.0, "losses_seq": 0, "last_update": _now()})
+            d["pnl"] = float(d.get("pnl", 0.0)) + float(pnl)
+            d["last_update"] = _now()
+            # sequence loss counter (increment on negative pnl point)
+            d["losses_seq"] = int(d.get("losses_seq", 0)) + 1 if pnl < 0 else 0
+            self._touch()
+            return {"ok": True, "symbol": symbol, "day": day, "pnl_today": d["pnl"], "losses_seq": d["losses_seq"]}
+
+    def set_equity(self, equity: float) -> float:
+        with self._lock:
+            self._st["global"]["equity_last"] = float(equity)
+            self._touch()
+            return self._st["global"]["equity_last"]
+
+    def reset(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            if symbol is None:
+                self._st["by_symbol"] = {}
+            else:
+                self._st["by_symbol"].pop(symbol, None)
+            self._touch()
+        self.flush()
+        return self.snapshot()
+
+    # ---- gate ----
+    def _gate_one(self, body: Dict[str, Any], cfg: Dict[str, Any], day: str, now: float) -> Dict[str, Any]:
+        symbol = str(body.get("symbol", "UNKNOWN"))
+        equity = float(self._st["global"].get("equity_last", 0.0))
+        # Allow config equity override if app feeds it elsewhere
+        eq_cfg = float(((cfg.get("account") or {}).get("equity_override", 0.0)))
+        if eq_cfg > 0:
+            equity = eq_cfg
+
+        # --- daily loss cap check ---
+        symd = (self._st["by_symbol"].get(symbol, {}).get(day, {}) or {})
+        pnl_today = float(symd.get("pnl", 0.0))
+        cap_bps   = _get_cap_bps(symbol, cfg)
+        cap_amt   = (cap_bps / 1e4) * max(1.0, equity)
+        if pnl_today <= -cap_amt:
+            return {"ok": True, "blocked": True, "reason": f"daily_loss_cap_{cap_bps}bps", "state": {"pnl_today": pnl_today, "cap_amt": cap_amt}}
+
+        # --- sequence-loss brake ---
+        seq_conf = ((cfg.get("risk") or {}).get("seq_loss") or {})
+        max_losses = int(seq_conf.get("max_losses", 3))
+        cooldown   = float(seq_conf.get("cooldown_sec", 1800))
+        losses_seq = int(symd.get("losses_seq", 0))
+        last_ts    = float(symd.get("last_update", 0.0))
+        if losses_seq >= max_losses:
+            # Enforce cooldown from last update
+            if now - last_ts < cooldown:
+                remain = int(cooldown - (now - last_ts))
+                return {"ok": True, "blocked": True, "reason": f"seq_loss_cooldown_{remain}s", "state": {"losses_seq": losses_seq}}
+            # else reset sequence counter (gracefully)
+            self._st["by_symbol"].setdefault(symbol, {}).setdefault(day, {})["losses_seq"] = 0
+            self._touch()
+
+        return {"ok": True, "body": body, "state": {"pnl_today": pnl_today, "losses_seq": losses_seq}}
+
+    def gate(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return self.gate_batch([body])[0]
+
+    def gate_batch(self, bodies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One config read and one lock round for all legs of a basket."""
+        cfg = _load_cfg()
+        day, now = _day_key(), _now()
+        with self._lock:
+            return [self._gate_one(b, cfg, day, now) for b in bodies]
+
+_ENGINE: Optional[RiskEngine] = None
+_ELOCK = threading.Lock()
+
+def engine() -> RiskEngine:
+    global _ENGINE
+    if _ENGINE is None:
+        with _ELOCK:
+            if _ENGINE is None:
+                snap = float(((_load_cfg().get("risk") or {}).get("snapshot_sec", 2.0)))
+                _ENGINE = RiskEngine(snapshot_sec=snap)
+                atexit.register(_ENGINE.flush)
+    return _ENGINE
+
+def state() -> Dict[str, Any]:
+    """Current (in-memory) risk state."""
+    return engine().snapshot()
+
+def flush() -> bool:
+    return engine().flush()
+
 def record_pnl(symbol: str, pnl: float, equity: float) -> Dict[str, Any]:
     """
     Record realized PnL for today; update cumulative loss.
     """
-    st = _load_state()
-    day = _day_key()
-    sym = st["by_symbol"].setdefault(symbol, {})
-    d = sym.setdefault(day, {"pnl": 0.0, "losses_seq": 0, "last_update": _now()})
-    d["pnl"] = float(d.get("pnl", 0.0)) + float(pnl)
-    d["last_update"] = _now()
-    # sequence loss counter (increment on negative pnl point)
-    if pnl < 0:
-        d["losses_seq"] = int(d.get("losses_seq", 0)) + 1
-    else:
-        d["losses_seq"] = 0
-    st["ts"] = _now()
-    _save_state(st)
-    return {"ok": True, "symbol": symbol, "day": day, "pnl_today": d["pnl"], "losses_seq": d["losses_seq"]}
+    return engine().record_pnl(symbol, pnl)
 
 def pretrade_gate(body: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -65,47 +202,20 @@ def pretrade_gate(body: Dict[str, Any]) -> Dict[str, Any]:
       { ok: True/False, blocked?:bool, reason?:str, body?:dict, state?:dict }
     Non-destructive: if blocked, caller can still echo-ack but must skip live route.
     """
-    cfg = _load_cfg()
-    st  = _load_state()
-    symbol = str(body.get("symbol", "UNKNOWN"))
-    equity = float(((st.get("global") or {}).get("equity_last", 0.0)))
-    # Allow config equity override if app feeds it elsewhere
-    eq_cfg = float(((cfg.get("account") or {}).get("equity_override", 0.0)))
-    if eq_cfg > 0:
-        equity = eq_cfg
-
-    # --- daily loss cap check ---
-    day = _day_key()
-    symd = (st.get("by_symbol", {}).get(symbol, {}).get(day, {}) or {})
-    pnl_today = float(symd.get("pnl", 0.0))
-    cap_bps   = _get_cap_bps(symbol, cfg)
-    cap_amt   = (cap_bps / 1e4) * max(1.0, equity)
-    if pnl_today <= -cap_amt:
-        return {"ok": True, "blocked": True, "reason": f"daily_loss_cap_{cap_bps}bps", "state": {"pnl_today": pnl_today, "cap_amt": cap_amt}}
-
-    # --- sequence-loss brake ---
-    seq_conf = ((cfg.get("risk") or {}).get("seq_loss") or {})
-    max_losses = int(seq_conf.get("max_losses", 3))
-    cooldown   = float(seq_conf.get("cooldown_sec", 1800))
-    losses_seq = int(symd.get("losses_seq", 0))
-    last_ts    = float(symd.get("last_update", 0.0))
-    if losses_seq >= max_losses:
-        # Enforce cooldown from last update
-        if _now() - last_ts < cooldown:
-            remain = int(cooldown - (_now() - last_ts))
-            return {"ok": True, "blocked": True, "reason": f"seq_loss_cooldown_{remain}s", "state": {"losses_seq": losses_seq}}
-        # else reset sequence counter (gracefully)
-        st["by_symbol"].setdefault(symbol, {}).setdefault(day, {})["losses_seq"] = 0
-        _save_state(st)
-
-    return {"ok": True, "body": body, "state": {"pnl_today": pnl_today, "losses_seq": losses_seq}}
+    t = time.perf_counter()
+    out = engine().gate(body)
+    _latency.record("risk.gate", time.perf_counter() - t, symbol=str(body.get("symbol", "")))
+    return out
+
+def pretrade_gate_batch(bodies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """pretrade_gate for every leg of a basket in one pass; results keep input order."""
+    t = time.perf_counter()
+    res = engine().gate_batch(list(bodies or []))
+    _latency.record("risk.gate_batch", time.perf_counter() - t)
+    return {"ok": True, "results": res, "blocked": sum(1 for r in res if r.get("blocked"))}
 
 def set_equity(equity: float) -> Dict[str, Any]:
-    st = _load_state()
-    st["global"]["equity_last"] = float(equity)
-    st["ts"] = _now()
-    _save_state(st)
-    return {"ok": True, "equity": st["global"]["equity_last"]}
+    return {"ok": True, "equity": engine().set_equity(equity)}
 
 def portfolio_drift_flag(current_weights: Dict[str, float], target_weights: Dict[str, float], drift_bps: float = 100.0) -> Dict[str, Any]:
     """
@@ -1,31 +1,32 @@
 from __future__ import annotations
-import json, time
+import time
 from pathlib import Path
 from typing import Dict, Any
+from chamelefx.utils.journal import Journal
+from chamelefx.utils.ttlcache import cached
 
 ROOT = Path(__file__).resolve().parents[2]
 DATA = ROOT / "data" / "telemetry"
 FILE = DATA / "alpha_attribution.json"
 
-def _load():
-    try:
-        return json.loads(FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return {"signals": {}, "ts": time.time()}
+def _default():
+    return {"signals": {}, "ts": time.time()}
+
+def _apply(d, ev):
+    s = d.setdefault("signals", {}).setdefault(ev["signal"], {"pnl_sum": 0.0, "count": 0})
+    s["pnl_sum"] += float(ev["pnl"])
+    s["count"]   += 1
+    d["ts"] = ev.get("ts", time.time())
 
-def _save(x):
-    DATA.mkdir(parents=True, exist_ok=True)
-    tmp = FILE.with_suffix(".tmp")
-    tmp.write_text(json.dumps(x, indent=2), encoding="utf-8")
-    tmp.replace(FILE)
+_J = Journal(FILE, _apply, _default)
+
+def _load():
+    return _J.load()
 
 def record(signal: str, pnl: float) -> Dict[str, Any]:
-    d = _load()
-    s = d["signals"].setdefault(signal, {"pnl_sum": 0.0, "count": 0})
-    s["pnl_sum"] += float(pnl)
-    s["count"]   += 1
-    d["ts"] = time.time()
-    _save(d)
+    _J.append({"signal": signal, "pnl": float(pnl), "ts": time.time()})
+    summary_all.cache_clear()
+    s = _load()["signals"][signal]
     return {"ok": True, "signal": signal, "pnl_sum": s["pnl_sum"], "count": s["count"]}
 
 def summary(signal: str) -> Dict[str, Any]:
@@ -34,6 +35,7 @@ def summary(signal: str) -> Dict[str, Any]:
     avg = (s["pnl_sum"]/s["count"]) if s["count"] else 0.0
     return {"ok": True, "signal": signal, "pnl_sum": s["pnl_sum"], "count": s["count"], "avg": avg}
 
+@cached(ttl=2.0)
 def summary_all() -> Dict[str, Any]:
     d = _load()
     out = {}
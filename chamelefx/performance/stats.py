@@ -17,26 +17,69 @@ def max_drawdown(eq)->float:
     e=np.asarray(eq, dtype=float)
     return float((np.maximum.accumulate(e)-e).max() if e.size else 0.0)
 
-def pvalue_bootstrap(ret, n=1000, seed=42)->float:
-    """Right-tail: mean>0 significance by bootstrap resampling."""
-    r=np.asarray(ret, dtype=float); 
+# ---- resampling tests ----------------------------------------------------------
+# Resamples are drawn as index matrices in chunks of at most MEM_BUDGET_MB and
+# reduced with one NumPy call per chunk. Chunk RNG streams come from
+# SeedSequence(seed).spawn(), so results don't depend on the number of workers.
+
+MEM_BUDGET_MB = 64
+
+def _rows_per_chunk(cells_per_row: int, mem_mb) -> int:
+    budget = int(float(mem_mb or MEM_BUDGET_MB) * (1 << 20))
+    return max(1, budget // (16 * max(1, cells_per_row)))  # int64 index + float64 value per cell
+
+def _plan(n: int, rows: int, seed):
+    sizes = [min(rows, n - a) for a in range(0, n, rows)]
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+def _run_chunks(fn, args, plan, workers) -> int:
+    if workers and int(workers) > 1 and len(plan) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(int(workers), len(plan))) as ex:
+            return int(sum(ex.map(fn, *zip(*[(*args, m, ss) for m, ss in plan]))))
+    return int(sum(fn(*args, m, ss) for m, ss in plan))
+
+def _block_len(block, size: int) -> int:
+    # at most T//2: a block as long as the series makes every circular resample a
+    # rotation of it, whose mean is exactly the observed one (p-value 0 for any input)
+    cap = max(1, size // 2)
+    if block == "auto":
+        return max(1, min(int(round(size ** (1.0 / 3.0))), cap))
+    return max(1, min(int(block or 1), cap))
+
+def _boot_chunk(r: np.ndarray, L: int, base: float, m: int, ss) -> int:
+    """Circular block bootstrap (L=1 is the plain iid bootstrap) of the mean.
+    Block sums come from a prefix sum, so each resample costs ceil(T/L) lookups."""
+    T = r.size
+    k = -(-T // L); last = T - (k - 1) * L
+    st = np.random.default_rng(ss).integers(0, T, size=(m, k), dtype=np.int32 if T < 2**31 - L else np.int64)
+    if L == 1:
+        tot = r[st].sum(axis=1)
+    else:
+        c = np.concatenate(([0.0], np.cumsum(np.concatenate((r, r[:L])))))
+        tot = (c[st[:, :-1] + L] - c[st[:, :-1]]).sum(axis=1) + (c[st[:, -1] + last] - c[st[:, -1]])
+    return int(np.count_nonzero(tot / T >= base))
+
+def _perm_chunk(r: np.ndarray, s: np.ndarray, base: float, m: int, ss) -> int:
+    P = np.random.default_rng(ss).permuted(np.broadcast_to(r, (m, r.size)), axis=1)
+    return int(np.count_nonzero(P @ s / r.size >= base))
+
+def pvalue_bootstrap(ret, n=1000, seed=42, block=None, workers=1, mem_mb=None)->float:
+    """Right-tail: mean>0 significance by bootstrap resampling.
+    block: None/1 for iid draws, an int or "auto" (T**(1/3)) for a circular block
+    bootstrap that preserves autocorrelation; the block length is capped at T//2.
+    workers>1 spreads chunks over processes."""
+    r=np.asarray(ret, dtype=float)
     if r.size<10: return 1.0
-    rng=np.random.default_rng(seed)
-    base=np.mean(r)
-    cnt=0
-    for _ in range(n):
-        s=r[rng.integers(0, r.size, size=r.size)]
-        if np.mean(s)>=base: cnt+=1
+    L=_block_len(block, r.size)
+    plan=_plan(int(n), _rows_per_chunk(-(-r.size // L), mem_mb), seed)
+    cnt=_run_chunks(_boot_chunk, (r, L, float(np.mean(r))), plan, workers)
     return float(1.0 - cnt/max(1,n))
 
-def pvalue_permutation(ret, sig, n=1000, seed=43)->float:
+def pvalue_permutation(ret, sig, n=1000, seed=43, workers=1, mem_mb=None)->float:
     """Null: signal independent of returns. Permute returns vs signals."""
     r=np.asarray(ret, dtype=float); s=np.asarray(sig, dtype=float)
     if r.size==0 or r.size!=s.size: return 1.0
-    base=np.mean(r*s)
-    rng=np.random.default_rng(seed)
-    cnt=0
-    for _ in range(n):
-        rp=r[rng.permutation(r.size)]
-        if np.mean(rp*s)>=base: cnt+=1
+    plan=_plan(int(n), _rows_per_chunk(r.size, mem_mb), seed)
+    cnt=_run_chunks(_perm_chunk, (r, s, float(np.mean(r*s))), plan, workers)
     return float(1.0 - cnt/max(1,n))
@@ -2,6 +2,7 @@ from __future__ import annotations
 from chamelefx.log import get_logger
 import os, json, math
 from typing import Dict, Any, Tuple
+from chamelefx.utils import config as _config
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 RUNTIME = os.path.join(ROOT, "runtime")
@@ -10,8 +11,7 @@ VOLF = os.path.join(RUNTIME, "vols.json")  # optional: {"EURUSD":0.006, ...} (da
 REGF = os.path.join(RUNTIME, "regime.json")# optional: {"vol_regime":"low|med|high","trend":"up|down|range"}
 
 def _cfg() -> Dict[str, Any]:
-    try: return json.load(open(CFG,"r",encoding="utf-8"))
-    except: return {}
+    return _config.get()
 
 def _read_json(path, default):
     try: return json.load(open(path,"r",encoding="utf-8"))
@@ -84,7 +84,7 @@ def compute(method: str, weights: Dict[str,float], equity: float, params: Dict[s
 
 def default_params() -> Dict[str,Any]:
     cfg = _cfg()
-    sizing = cfg.get("sizing", {})
+    sizing = _config.thaw(cfg.get("sizing", {}))
     if not sizing:
         sizing = {
             "method": "fixed",
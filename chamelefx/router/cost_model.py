@@ -1,46 +1,61 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
-import json, statistics, time
+import atexit, json, math, threading, time
+from chamelefx.utils.tdigest import TDigest
 
 ROOT = Path(__file__).resolve().parents[1]
 RUN  = ROOT / "runtime"
 RUN.mkdir(parents=True, exist_ok=True)
-FILLS = RUN / "fills.json"
 COSTS = RUN / "router_costs.json"
+SKETCHES = RUN / "router_sketches.json"
+
+SYNC_SEC = 1.0      # min interval between trade-store catch-ups on the read path
+PERSIST_SEC = 30.0  # min interval between sketch snapshots
+
+log = get_logger(__name__)
 
 def _read_json(p: Path, default):
     try: return json.loads(p.read_text(encoding="utf-8"))
     except Exception: return default
 
-def _save_json(p: Path, data):
+def _save_json(p: Path, data, indent=2):
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=indent, separators=None if indent else (",", ":")), encoding="utf-8")
+    tmp.replace(p)
+
+def _row(r: dict) -> dict | None:
+    if not isinstance(r, dict): return None
+    sym = str(r.get("symbol","")).upper()
+    if not sym: return None
+    try:
+        px  = float(r.get("price", 0.0))
+        qty = abs(float(r.get("qty", 0.0)))
+    except Exception:
+        return None
+    if px <= 0 or qty <= 0: return None
+    bench = float(r.get("bench") or px)
+    side  = str(r.get("side","buy")).lower()
+    venue = str(r.get("venue") or "").upper() or "DEFAULT"
+    bps = 0.0
+    if bench > 0:
+        sgn = 1.0 if side=="buy" else -1.0
+        bps = ((px - bench)/bench) * 10000.0 * sgn
+    return {"symbol":sym,"venue":venue,"qty":qty,"bps":bps}
 
-def _fills() -> List[dict]:
-    rows = _read_json(FILLS, [])
-    if not isinstance(rows, list): rows = []
-    out = []
+def _fills(after_id: int = 0) -> Tuple[List[dict], int]:
+    """Parsed fills with id > after_id, plus the highest id seen."""
+    from chamelefx.integrations import trade_store as _store
+    rows = _store.fills(kind="fill", after_id=after_id or None)
+    out, hwm = [], int(after_id or 0)
     for r in rows:
-        if not isinstance(r, dict): continue
-        sym = str(r.get("symbol","")).upper()
-        if not sym: continue
-        try:
-            px  = float(r.get("price", 0.0))
-            qty = abs(float(r.get("qty", 0.0)))
-        except Exception:
-            continue
-        if px <= 0 or qty <= 0: continue
-        bench = float(r.get("bench", px))
-        side  = str(r.get("side","buy")).lower()
-        venue = str(r.get("venue","")).upper() or "DEFAULT"
-        bps = 0.0
-        if bench > 0:
-            sgn = 1.0 if side=="buy" else -1.0
-            bps = ((px - bench)/bench) * 10000.0 * sgn
-        out.append({"symbol":sym,"venue":venue,"qty":qty,"bps":bps})
-    return out
+        try: hwm = max(hwm, int(r.get("id") or 0))
+        except Exception: pass
+        x = _row(r)
+        if x: out.append(x)
+    return out, hwm
 
 def _bucket(notional: float) -> str:
     n = float(notional)
@@ -48,50 +63,139 @@ def _bucket(notional: float) -> str:
     if n <= 200_000: return "M"
     return "L"
 
+class _Cell:
+    """Exact n/sum/sumsq plus a t-digest for the tail quantile."""
+    __slots__ = ("n", "s", "ss", "td", "_p95")
+
+    def __init__(self, n=0, s=0.0, ss=0.0, td: TDigest | None = None):
+        self.n, self.s, self.ss = int(n), float(s), float(ss)
+        self.td = td or TDigest()
+        self._p95 = None
+
+    def add(self, x: float) -> None:
+        self.n += 1; self.s += x; self.ss += x*x
+        self.td.add(x)
+        self._p95 = None
+
+    def stats(self) -> dict:
+        if not self.n:
+            return {"mean":0.0,"stdev":0.0,"p95":0.0,"n":0}
+        mean = self.s/self.n
+        stdev = math.sqrt(max(0.0, self.ss/self.n - mean*mean)) if self.n > 1 else 0.0
+        if self._p95 is None:
+            self._p95 = float(self.td.quantile(0.95))
+        return {"mean":float(mean),"stdev":float(stdev),"p95":self._p95,"n":self.n}
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "s": self.s, "ss": self.ss, "td": self.td.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "_Cell":
+        return cls(d.get("n", 0), d.get("s", 0.0), d.get("ss", 0.0), TDigest.from_dict(d.get("td")))
+
+# resident sketches: symbol -> venue -> size bucket -> _Cell
+_LOCK = threading.RLock()
+_CELLS: Dict[str, Dict[str, Dict[str, _Cell]]] = {}
+_HWM = 0              # last trade-store fill id folded in
+_LAST_SYNC = 0.0
+_LAST_PERSIST = 0.0
+_DIRTY = False
+_LOADED = False
+
+def _load() -> None:
+    global _HWM, _LOADED
+    _LOADED = True
+    d = _read_json(SKETCHES, None)
+    if not isinstance(d, dict): return
+    try:
+        for sym, venues in (d.get("symbols") or {}).items():
+            for v, buckets in venues.items():
+                for b, cell in buckets.items():
+                    _CELLS.setdefault(sym, {}).setdefault(v, {})[b] = _Cell.from_dict(cell)
+        _HWM = int(d.get("hwm", 0) or 0)
+    except Exception:
+        log.exception("router sketches unreadable, rebuilding")
+        _CELLS.clear(); _HWM = 0
+
+def _persist(force: bool = False) -> None:
+    global _DIRTY, _LAST_PERSIST
+    with _LOCK:
+        if not _DIRTY or (not force and time.time() - _LAST_PERSIST < PERSIST_SEC):
+            return
+        obj = {"hwm": _HWM, "ts": time.time(),
+               "symbols": {s: {v: {b: c.to_dict() for b, c in bs.items()} for v, bs in vs.items()}
+                           for s, vs in _CELLS.items()}}
+        _DIRTY = False
+        _LAST_PERSIST = time.time()
+    try:
+        _save_json(SKETCHES, obj, indent=None)
+    except Exception:
+        log.exception("router sketch snapshot failed")
+
+atexit.register(lambda: _persist(force=True))
+
+def _sync(force: bool = False) -> int:
+    """Fold fills newer than the high-water mark into the sketches. Returns #fills added."""
+    global _HWM, _LAST_SYNC, _DIRTY
+    with _LOCK:
+        if not _LOADED:
+            _load()
+        now = time.time()
+        if not force and now - _LAST_SYNC < SYNC_SEC:
+            return 0
+        _LAST_SYNC = now
+        try:
+            from chamelefx.integrations import trade_store as _store
+            if _store.high_water() < _HWM:  # store was reset: rebuild from scratch
+                _CELLS.clear(); _HWM = 0
+            rows, hwm = _fills(_HWM)
+        except Exception:
+            log.exception("router cost sync failed")
+            return 0
+        for r in rows:
+            cell = _CELLS.setdefault(r["symbol"], {}).setdefault(r["venue"], {}).get(_bucket(r["qty"]))
+            if cell is None:
+                cell = _CELLS[r["symbol"]][r["venue"]][_bucket(r["qty"])] = _Cell()
+            cell.add(float(r["bps"]))
+        if rows or hwm != _HWM:
+            _HWM = hwm; _DIRTY = True
+    _persist()
+    return len(rows)
+
+def _table() -> dict:
+    with _LOCK:
+        return {"updated": _LAST_SYNC or time.time(),
+                "symbols": {s: {v: {b: c.stats() for b, c in bs.items()} for v, bs in vs.items()}
+                            for s, vs in _CELLS.items()}}
+
 def refresh() -> dict:
-    rows = _fills()
-    if not rows:
-        _save_json(COSTS, {"updated": time.time(), "symbols": {}})
-        return {"ok": True, "counts": 0, "symbols": 0}
-    agg: Dict[str, Dict[str, Dict[str, list]]] = {}
-    for r in rows:
-        sym, venue = r["symbol"], r["venue"]
-        b = _bucket(r["qty"])
-        agg.setdefault(sym, {}).setdefault(venue, {}).setdefault(b, []).append(float(r["bps"]))
-    table = {"updated": time.time(), "symbols": {}}
-    for sym, venues in agg.items():
-        table["symbols"][sym] = {}
-        for v, buckets in venues.items():
-            out = {}
-            for b, arr in buckets.items():
-                if not arr:
-                    out[b] = {"mean":0.0,"stdev":0.0,"p95":0.0,"n":0}
-                else:
-                    a = sorted(arr); n=len(a)
-                    mean = float(sum(a)/n)
-                    stdev = float((sum((x-mean)**2 for x in a)/n)**0.5) if n>1 else 0.0
-                    p95 = float(a[min(n-1, int(0.95*n))])
-                    out[b] = {"mean":mean,"stdev":stdev,"p95":p95,"n":n}
-            table["symbols"][sym][v] = out
+    added = _sync(force=True)
+    table = _table()
     _save_json(COSTS, table)
-    return {"ok": True, "counts": len(rows), "symbols": len(table["symbols"])}
+    _persist(force=True)
+    n = sum(c["n"] for vs in table["symbols"].values() for bs in vs.values() for c in bs.values())
+    return {"ok": True, "counts": n, "added": added, "symbols": len(table["symbols"])}
 
 def summary() -> dict:
-    return _read_json(COSTS, {"updated": 0, "symbols": {}})
+    _sync()
+    return _table()
 
 def cost_penalty_bps(symbol: str, notional: float, venue: str | None = None, mode: str = "p95") -> float:
-    tab = summary()
+    _sync()
     sym = str(symbol).upper()
-    if sym not in tab.get("symbols", {}): return 0.0
-    ven = (venue or "DEFAULT").upper()
-    size = _bucket(notional)
-    vs = tab["symbols"][sym]
-    names = [ven] if ven in vs else list(vs.keys())
-    if not names: return 0.0
-    def pick(vname: str) -> float:
-        bx = vs[vname].get(size) or {}
-        if mode=="mean":  return float(bx.get("mean", 0.0))
-        if mode=="stdev": return float(bx.get("stdev", 0.0))
-        return float(bx.get("p95", 0.0))
-    vals = [pick(n) for n in names]
-    return float(vals[0] if ven in vs else min(vals) if vals else 0.0)
+    with _LOCK:
+        vs = _CELLS.get(sym)
+        if not vs: return 0.0
+        ven = (venue or "DEFAULT").upper()
+        size = _bucket(notional)
+        names = [ven] if ven in vs else list(vs.keys())
+        if not names: return 0.0
+        def pick(vname: str) -> float:
+            c = vs[vname].get(size)
+            if c is None: return 0.0
+            bx = c.stats()
+            if mode=="mean":  return float(bx["mean"])
+            if mode=="stdev": return float(bx["stdev"])
+            return float(bx["p95"])
+        vals = [pick(n) for n in names]
+        return float(vals[0] if ven in vs else min(vals) if vals else 0.0)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
-from chamelefx.router import cost_model as _costm
-import json, time
+from chamelefx.utils import config as _config
+from chamelefx.utils import latency as _latency
+from chamelefx.router import venue_stats as _vstats
+from chamelefx.router import state as _state
+import json, threading, time
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 ROOT = Path(__file__).resolve().parents[2]
 TEL  = ROOT / "data" / "telemetry"
@@ -20,7 +23,7 @@ def _jload(p: Path, default):
         return default
 
 def _cfg()->Dict[str, Any]:
-    return _jload(CONF, {})
+    return _config.get()
 
 def _weights(conf: Dict[str, Any])->Dict[str,float]:
     r = (conf.get("router") or {}).get("weights", {})
@@ -39,78 +42,190 @@ def _reenable_thr_bps(conf: Dict[str, Any])->float:
 def _venues(conf: Dict[str, Any])->List[str]:
     return list((conf.get("router") or {}).get("venues", ["MT5_PRIMARY","MT5_ALT"]))
 
-def _write_status(d: Dict[str, Any])->None:
+LAT_STAGE = "mt5.order_send"
+LAT_MIN_N = 20
+
+def _latency_sec(conf: Dict[str, Any], venue: str, symbol: str):
+    """
+    Measured p90 order_send latency: the venue's online estimate (router.venue_stats),
+    then this process's histograms (venue+symbol, venue, symbol, all sends);
+    router.latency_default_sec (0.15) until LAT_MIN_N samples.
+    """
+    q = _vstats.latency_sec(venue, 0.9, min_n=LAT_MIN_N)
+    if q is not None:
+        return q, "venue_stats"
+    for v, s in ((venue, symbol), (venue, None), (None, symbol), (None, None)):
+        q = _latency.quantile(LAT_STAGE, 0.9, venue=v, symbol=s, min_n=LAT_MIN_N)
+        if q is not None:
+            return q, "measured"
+    return float((conf.get("router") or {}).get("latency_default_sec", 0.15)), "default"
+
+def _write_status(venues: List[str])->None:
+    """
+    Refresh enabled/total/ts in router_status.json. The file belongs to
+    router.state (disabled, cooldowns): it is re-read under state's lock and
+    only the summary fields are replaced, so a stale view never overwrites them.
+    """
     TEL.mkdir(parents=True, exist_ok=True)
-    tmp = ROUT_STAT.with_suffix(".tmp")
-    tmp.write_text(json.dumps(d, indent=2), encoding="utf-8")
-    tmp.replace(ROUT_STAT)
+    with _state.LOCK:
+        cur = _jload(ROUT_STAT, {})
+        cur = cur if isinstance(cur, dict) else {}
+        dis = set(cur.get("disabled", []))
+        d = {**cur, "enabled": len([v for v in venues if v not in dis]), "total": len(venues), "ts": time.time()}
+        tmp = ROUT_STAT.with_suffix(".tmp")
+        tmp.write_text(json.dumps(d, indent=2), encoding="utf-8")
+        tmp.replace(ROUT_STAT)
+
+def _fsig(p: Path):
+    try:
+        st = p.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _score_row(w: Dict[str, float], conf: Dict[str, Any], symd: Dict[str, Any], v: str, symbol: str,
+               disabled) -> Dict[str, Any]:
+    # simplified venue stats: use symbol cost as proxy, defaults to 3.0 bps
+    sl_bps = float(symd.get(symbol, {}).get("slippage_bps", 3.0))
+    fill_rate, fill_src = _vstats.fill_rate(v, float((conf.get("router") or {}).get("fill_rate_default", 0.9)))
+    latency, lat_src = _latency_sec(conf, v, symbol)
+    # normalize: smaller is better for slippage/latency → convert to [0..1]
+    slip_norm = min(1.0, sl_bps / 10.0)
+    lat_norm  = min(1.0, latency / 1.0)
+    s = (-w["slippage"] * slip_norm) + (w["fill_rate"] * fill_rate) + (-w["latency"] * lat_norm)
+    return {"venue": v, "score": float(s), "slippage_bps": sl_bps, "fill_rate": fill_rate, "latency": latency,
+            "latency_src": lat_src, "fill_rate_src": fill_src, "enabled": v not in disabled}
+
+class ScoreTable:
+    """
+    Resident per-symbol venue scores. Inputs (config, slippage_model.json,
+    router_status.json) are re-checked at most every check_sec; a change drops
+    all tables, and measured inputs (latency) are refreshed after ttl_sec. A
+    decision is otherwise a dict lookup. The status summary is written only
+    when it changes, at most every status_sec.
+    """
+
+    def __init__(self, check_sec: float = 0.5, ttl_sec: float = 5.0, status_sec: float = 5.0):
+        self.check_sec, self.ttl_sec, self.status_sec = float(check_sec), float(ttl_sec), float(status_sec)
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._inputs: Dict[str, Any] = {}
+        self._sig = None
+        self._checked = 0.0
+        self._status_last: Optional[Dict[str, Any]] = None
+        self._status_due: Optional[threading.Timer] = None
+        self._status_at = 0.0
+        self.stats = {"hits": 0, "builds": 0, "invalidations": 0, "status_writes": 0}
+
+    def invalidate(self) -> None:
+        # lock-free on purpose: also reached from config listeners fired inside _check
+        self._checked = 0.0
+
+    def _check(self, now: float) -> None:
+        # caller holds _lock
+        if now - self._checked < self.check_sec:
+            return
+        self._checked = now
+        sig = (_config.version(), _fsig(SLIP_MODEL), _fsig(ROUT_STAT))
+        if sig == self._sig:
+            return
+        conf = _cfg()
+        st = _jload(ROUT_STAT, {})
+        self._inputs = {"conf": conf, "w": _weights(conf), "venues": _venues(conf),
+                        "symd": _jload(SLIP_MODEL, {"symbols": {}}).get("symbols", {}),
+                        "disabled": set(st.get("disabled", []) if isinstance(st, dict) else [])}
+        if self._sig is not None:
+            self.stats["invalidations"] += 1
+        self._sig = sig
+        self._tables.clear()
+        venues, dis = self._inputs["venues"], self._inputs["disabled"]
+        self._status({"enabled": len([v for v in venues if v not in dis]), "total": len(venues),
+                      "venues": list(venues)})
+
+    def _build(self, symbol: str, now: float) -> Dict[str, Any]:
+        i = self._inputs
+        rows = sorted((_score_row(i["w"], i["conf"], i["symd"], v, symbol, i["disabled"]) for v in i["venues"]),
+                      key=lambda x: x["score"], reverse=True)
+        best = next((r for r in rows if r["enabled"]), rows[0] if rows else None)
+        self.stats["builds"] += 1
+        t = {"scores": rows, "best": best, "ts": time.time(), "built": now}
+        self._tables[symbol] = t
+        return t
+
+    def table(self, symbol: str) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._check(now)
+            t = self._tables.get(symbol)
+            if t is None or now - t["built"] > self.ttl_sec:
+                return self._build(symbol, now)
+            self.stats["hits"] += 1
+            return t
+
+    # ---- debounced status file --------------------------------------------------
+    def _status(self, summary: Dict[str, Any]) -> None:
+        # caller holds _lock
+        if summary == self._status_last:
+            return
+        self._status_last = summary
+        if self._status_due is not None:
+            return                                  # pending write will pick up the latest summary
+        delay = max(0.0, self._status_at + self.status_sec - time.monotonic())
+        self._status_due = threading.Timer(delay, self._flush_status)
+        self._status_due.daemon = True
+        self._status_due.start()
+
+    def _flush_status(self) -> None:
+        with self._lock:
+            self._status_due = None
+            summary = dict(self._status_last or {})
+            self._status_at = time.monotonic()
+        try:
+            # _sig is left alone: the next _check re-reads the file, which also
+            # picks up any router.state change made since the summary was taken
+            _write_status(summary.get("venues", []))
+            with self._lock:
+                self.stats["status_writes"] += 1
+        except Exception:
+            get_logger(__name__).exception("router status write failed")
+
+_TABLE = ScoreTable()
+
+@_config.on_change
+def _on_cfg_change(cfg) -> None:
+    _TABLE.invalidate()
+
+def invalidate() -> None:
+    """Force the next lookup to re-check inputs (router.state calls this after a change)."""
+    _TABLE.invalidate()
 
 def score_venues(symbol: str)->Dict[str, Any]:
     """
     Score = -w_slip * normalized_slip + w_fill * fill_rate - w_lat * norm_latency
-    Higher is better.
+    Higher is better. Served from the resident ScoreTable.
     """
-    conf = _cfg()
-    w = _weights(conf)
-    model = _jload(SLIP_MODEL, {"symbols":{}})
-    symd  = model.get("symbols", {})
-    venues = _venues(conf)
-    out = []
-    for v in venues:
-        # simplified venue stats: use symbol cost as proxy, defaults to 3.0 bps
-        sl_bps = float(symd.get(symbol, {}).get("slippage_bps", 3.0))
-        fill_rate = 0.9  # stub; could be learned from fills later
-        latency   = 0.15 # seconds; stub; can be measured
-        # normalize: smaller is better for slippage/latency → convert to [0..1]
-        slip_norm = min(1.0, sl_bps / 10.0)
-        lat_norm  = min(1.0, latency / 1.0)
-        s = (-w["slippage"] * slip_norm) + (w["fill_rate"] * fill_rate) + (-w["latency"] * lat_norm)
-        out.append({"venue": v, "score": float(s), "slippage_bps": sl_bps, "fill_rate": fill_rate, "latency": latency})
-    out = sorted(out, key=lambda x: x["score"], reverse=True)
-    # status summary for UI
-    status = _jload(ROUT_STAT, {})
-    enabled_list = [v for v in venues if v not in (status.get("disabled", []))]
-    _write_status({"enabled": len(enabled_list), "total": len(venues), "disabled": status.get("disabled", []), "ts": time.time()})
-    return {"ok": True, "scores": out, "ts": time.time()}
+    t0 = time.perf_counter()
+    t = _TABLE.table(symbol)
+    _latency.record("router.score", time.perf_counter() - t0, symbol=symbol)
+    return {"ok": True, "scores": list(t["scores"]), "ts": t["ts"]}
 
-def best_venue(symbol: str)->Dict[str, Any]:
-    s = score_venues(symbol)
-    if not s.get("scores"):
+def decide(symbol: str)->Dict[str, Any]:
+    """Best enabled venue (highest score); a dict lookup while inputs are unchanged."""
+    t = _TABLE.table(symbol)
+    if t["best"] is None:
         return {"ok": False, "error": "no_venues"}
-    return {"ok": True, "best": s["scores"][0], "ts": s["ts"]}
+    return {"ok": True, "best": t["best"], "ts": t["ts"]}
 
-from pathlib import Path
-import json, time, statistics
-from typing import Dict, Any
-
-LOGS = Path(__file__).resolve().parents[2] / "data" / "logs"
-STATS = Path(__file__).resolve().parents[2] / "data" / "telemetry" / "venue_stats.json"
-
-def _parse_exec_log(source="execution.log", lookback=500):
-    f = LOGS / source
-    if not f.exists(): return []
-    lines = f.read_text(encoding="utf-8", errors="ignore").splitlines()[-lookback:]
-    out=[]
-    for l in lines:
-        try:
-            j=json.loads(l)
-            out.append(j)
-        except Exception:
-    get_logger(__name__).exception('Unhandled exception')
-    return out
+def best_venue(symbol: str)->Dict[str, Any]:
+    return decide(symbol)
+
+def table_stats()->Dict[str, Any]:
+    return {"ok": True, **_TABLE.stats, "symbols": len(_TABLE._tables)}
 
 def compute(symbol="EURUSD", lookback=500)->Dict[str, Any]:
-    trades = _parse_exec_log("execution.log", lookback)
-    sym_trades = [t for t in trades if t.get("symbol")==symbol]
-    if not sym_trades: return {"ok": False, "error": "no_trades"}
-    lats=[t.get("lat_ms",0) for t in sym_trades if "lat_ms" in t]
-    costs=[t.get("slip_bps",0) for t in sym_trades if "slip_bps" in t]
-    out={
-        "ok": True,
-        "samples": len(sym_trades),
-        "avg_latency": statistics.mean(lats) if lats else None,
-        "avg_slip_bps": statistics.mean(costs) if costs else None,
-    }
-    STATS.parent.mkdir(parents=True, exist_ok=True)
-    STATS.write_text(json.dumps(out, indent=2))
+    """Venue execution stats from the online estimators (router.venue_stats); no log scan."""
+    out = _vstats.summary()
+    agg = out["venues"].get(_vstats.ALL) or {}
+    out.update({"samples": agg.get("n", 0), "avg_latency": agg.get("latency_ewma_ms"),
+                "avg_slip_bps": agg.get("slippage_ewma_bps")})
     return out
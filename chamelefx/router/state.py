@@ -1,12 +1,14 @@
 from __future__ import annotations
 from chamelefx.log import get_logger
-import json, time
+import json, threading, time
 from pathlib import Path
 from typing import Dict, Any, List
 
 ROOT = Path(__file__).resolve().parents[2]
 TEL  = ROOT / "data" / "telemetry"
 STATE_FILE = TEL / "router_status.json"
+# serializes read-modify-write of router_status.json (shared with scorer's status writer)
+LOCK = threading.RLock()
 
 def _load()->Dict[str, Any]:
     try:
@@ -19,37 +21,45 @@ def _save(d: Dict[str, Any]):
     tmp = STATE_FILE.with_suffix(".tmp")
     tmp.write_text(json.dumps(d, indent=2), encoding="utf-8")
     tmp.replace(STATE_FILE)
+    try:
+        from chamelefx.router import scorer as _scorer
+        _scorer.invalidate()              # venue set changed: rescore on next lookup
+    except Exception:
+        pass
 
 def disable(venue: str, secs: int)->Dict[str, Any]:
-    st = _load()
-    if venue not in st.get("disabled", []):
-        st.setdefault("disabled", []).append(venue)
-    st.setdefault("cooldowns", {})[venue] = time.time() + float(secs)
-    st["ts"] = time.time()
-    _save(st)
+    with LOCK:
+        st = _load()
+        if venue not in st.get("disabled", []):
+            st.setdefault("disabled", []).append(venue)
+        st.setdefault("cooldowns", {})[venue] = time.time() + float(secs)
+        st["ts"] = time.time()
+        _save(st)
     return {"ok": True, "state": st}
 
 def enable(venue: str)->Dict[str, Any]:
-    st = _load()
-    if venue in st.get("disabled", []):
-        st["disabled"].remove(venue)
-    st.get("cooldowns", {}).pop(venue, None)
-    st["ts"] = time.time()
-    _save(st)
+    with LOCK:
+        st = _load()
+        if venue in st.get("disabled", []):
+            st["disabled"].remove(venue)
+        st.get("cooldowns", {}).pop(venue, None)
+        st["ts"] = time.time()
+        _save(st)
     return {"ok": True, "state": st}
 
 def sweep()->Dict[str, Any]:
-    st = _load()
-    cd = st.get("cooldowns", {})
-    now = time.time()
-    changed = False
-    for v, t in list(cd.items()):
-        if now >= float(t):
-            # cooldown elapsed → re-enable
-            st["disabled"] = [x for x in st.get("disabled", []) if x != v]
-            cd.pop(v, None)
-            changed = True
-    if changed:
-        st["ts"] = time.time()
-        _save(st)
+    with LOCK:
+        st = _load()
+        cd = st.get("cooldowns", {})
+        now = time.time()
+        changed = False
+        for v, t in list(cd.items()):
+            if now >= float(t):
+                # cooldown elapsed → re-enable
+                st["disabled"] = [x for x in st.get("disabled", []) if x != v]
+                cd.pop(v, None)
+                changed = True
+        if changed:
+            st["ts"] = time.time()
+            _save(st)
     return {"ok": True, "state": st}
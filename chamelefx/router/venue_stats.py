@@ -0,0 +1,193 @@
+"""
+Online per-venue execution estimators.
+
+Each execution event (``record``) updates, in O(1):
+  - time-decayed fill / reject / partial-fill rates (half-life HALF_LIFE_SEC,
+    fill rate shrunk toward PRIOR_FILL with PRIOR_N pseudo-events)
+  - latency EWMA plus a t-digest for p50/p90/p99
+  - slippage EWMA (bps vs arrival mid, positive = cost)
+for the venue and for the "ALL" aggregate. State is resident, snapshotted to
+data/telemetry/venue_stats.json at most every PERSIST_SEC (off the caller's
+thread) and at exit; reads never touch disk.
+"""
+from __future__ import annotations
+from chamelefx.log import get_logger
+from typing import Any, Dict, Optional
+from pathlib import Path
+import atexit, json, math, threading, time
+from chamelefx.utils.tdigest import TDigest
+
+ROOT = Path(__file__).resolve().parents[2]
+TEL  = ROOT / "data" / "telemetry"
+STATS = TEL / "venue_stats.json"
+
+HALF_LIFE_SEC = 3600.0
+EWMA_ALPHA = 0.1
+PRIOR_FILL = 0.9
+PRIOR_N = 2.0
+MIN_N = 20          # samples before latency quantiles are trusted
+PERSIST_SEC = 30.0
+ALL = "ALL"
+
+log = get_logger(__name__)
+
+
+class _Venue:
+    __slots__ = ("tot", "fill", "rej", "part", "t", "n", "lat", "slip", "td")
+
+    def __init__(self):
+        self.tot = self.fill = self.rej = self.part = 0.0
+        self.t = 0.0
+        self.n = 0
+        self.lat: Optional[float] = None      # ms
+        self.slip: Optional[float] = None     # bps
+        self.td = TDigest(50)
+
+    def _decay(self, now: float) -> None:
+        if self.t and now > self.t:
+            k = 0.5 ** ((now - self.t) / HALF_LIFE_SEC)
+            self.tot *= k; self.fill *= k; self.rej *= k; self.part *= k
+        self.t = max(self.t, now)
+
+    def add(self, now: float, ok: bool, filled: float, partial: bool,
+            lat_ms: Optional[float], slip_bps: Optional[float]) -> None:
+        self._decay(now)
+        self.n += 1
+        self.tot += 1.0
+        self.fill += min(1.0, max(0.0, filled)) if ok else 0.0
+        self.rej += 0.0 if ok else 1.0
+        self.part += 1.0 if (ok and partial) else 0.0
+        if lat_ms is not None and math.isfinite(lat_ms):
+            self.lat = lat_ms if self.lat is None else self.lat + EWMA_ALPHA * (lat_ms - self.lat)
+            self.td.add(lat_ms)
+        if slip_bps is not None and math.isfinite(slip_bps):
+            self.slip = slip_bps if self.slip is None else self.slip + EWMA_ALPHA * (slip_bps - self.slip)
+
+    def stats(self) -> Dict[str, Any]:
+        tot = self.tot
+        q = self.td.quantile
+        has_lat = len(self.td) > 0
+        return {"n": self.n, "n_eff": round(tot, 3),
+                "fill_rate": round((self.fill + PRIOR_FILL * PRIOR_N) / (tot + PRIOR_N), 6),
+                "reject_rate": round(self.rej / tot, 6) if tot else 0.0,
+                "partial_rate": round(self.part / tot, 6) if tot else 0.0,
+                "latency_ewma_ms": None if self.lat is None else round(self.lat, 4),
+                "latency_p50_ms": round(q(0.5), 4) if has_lat else None,
+                "latency_p90_ms": round(q(0.9), 4) if has_lat else None,
+                "latency_p99_ms": round(q(0.99), 4) if has_lat else None,
+                "slippage_ewma_bps": None if self.slip is None else round(self.slip, 4),
+                "ts": self.t}
+
+    def to_dict(self) -> dict:
+        return {"w": [self.tot, self.fill, self.rej, self.part], "t": self.t, "n": self.n,
+                "lat": self.lat, "slip": self.slip, "td": self.td.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "_Venue":
+        v = cls()
+        v.tot, v.fill, v.rej, v.part = (float(x) for x in d.get("w", [0, 0, 0, 0]))
+        v.t, v.n = float(d.get("t", 0.0)), int(d.get("n", 0))
+        v.lat, v.slip = d.get("lat"), d.get("slip")
+        v.td = TDigest.from_dict(d.get("td"))
+        return v
+
+
+_LOCK = threading.Lock()
+_VENUES: Dict[str, _Venue] = {}
+_LOADED = False
+_DIRTY = False
+_LAST_PERSIST = 0.0
+_WRITER: Optional[threading.Thread] = None
+
+def _load() -> None:
+    global _LOADED
+    _LOADED = True
+    try:
+        d = json.loads(STATS.read_text(encoding="utf-8"))
+        for name, v in (d.get("venues") or {}).items():
+            _VENUES[name] = _Venue.from_dict(v)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        log.exception("venue stats unreadable, starting fresh")
+        _VENUES.clear()
+
+def _ensure() -> None:
+    if not _LOADED:
+        with _LOCK:
+            if not _LOADED:
+                _load()
+
+def _persist(force: bool = False) -> None:
+    global _DIRTY, _LAST_PERSIST
+    with _LOCK:
+        if not _DIRTY or (not force and time.time() - _LAST_PERSIST < PERSIST_SEC):
+            return
+        obj = {"ts": time.time(), "venues": {k: v.to_dict() for k, v in _VENUES.items()}}
+        _DIRTY = False
+        _LAST_PERSIST = time.time()
+    try:
+        TEL.mkdir(parents=True, exist_ok=True)
+        tmp = STATS.with_suffix(".tmp")
+        tmp.write_text(json.dumps(obj, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(STATS)
+    except Exception:
+        log.exception("venue stats snapshot failed")
+
+atexit.register(lambda: _persist(force=True))
+
+def record(venue: str, ok: bool, latency_sec: Optional[float] = None, partial: bool = False,
+           filled: float = 1.0, slip_bps: Optional[float] = None, ts: Optional[float] = None) -> None:
+    """One execution event (ack or reject) for ``venue``; ``filled`` = filled/requested volume."""
+    global _DIRTY, _WRITER
+    _ensure()
+    now = float(ts or time.time())
+    lat_ms = None if latency_sec is None else float(latency_sec) * 1000.0
+    name = str(venue or "").upper() or "UNKNOWN"
+    with _LOCK:
+        for k in (name, ALL):
+            v = _VENUES.get(k)
+            if v is None:
+                v = _VENUES[k] = _Venue()
+            v.add(now, bool(ok), float(filled), bool(partial), lat_ms, slip_bps)
+        _DIRTY = True
+        due = time.time() - _LAST_PERSIST >= PERSIST_SEC and not (_WRITER and _WRITER.is_alive())
+        if due:
+            _WRITER = threading.Thread(target=_persist, name="venue-stats-persist", daemon=True)
+    if due:
+        _WRITER.start()
+
+def get(venue: str) -> Optional[Dict[str, Any]]:
+    _ensure()
+    with _LOCK:
+        v = _VENUES.get(str(venue or "").upper())
+        return None if v is None else v.stats()
+
+def fill_rate(venue: str, default: float = PRIOR_FILL) -> tuple:
+    """(rate, source): the venue's decayed fill rate, else the all-venue one, else default."""
+    for k, src in ((venue, "venue"), (ALL, "all")):
+        s = get(k)
+        if s and s["n"]:
+            return s["fill_rate"], src
+    return float(default), "default"
+
+def latency_sec(venue: str, q: float = 0.9, min_n: int = MIN_N) -> Optional[float]:
+    """q-quantile latency (seconds) for the venue, else all venues; None below min_n samples."""
+    _ensure()
+    with _LOCK:
+        for k in (str(venue or "").upper(), ALL):
+            v = _VENUES.get(k)
+            if v is not None and len(v.td) >= min_n:
+                return v.td.quantile(q) / 1000.0
+    return None
+
+def summary() -> Dict[str, Any]:
+    _ensure()
+    with _LOCK:
+        return {"ok": True, "venues": {k: v.stats() for k, v in _VENUES.items()}, "ts": time.time()}
+
+def reset() -> None:
+    global _DIRTY
+    with _LOCK:
+        _VENUES.clear()
+        _DIRTY = True
@@ -0,0 +1,147 @@
+"""
+Shared, mtime-aware view of chamelefx/config.json.
+
+The file is parsed once and handed out as a deep-frozen mapping. Every access
+does a single ``stat()``; the file is re-parsed only when its mtime, size or
+inode changes. Callbacks registered with ``on_change`` run after a reload.
+
+    from chamelefx.utils import config as C
+    C.get()                                   # whole config (read-only)
+    C.section("router", "weights")            # nested section, {} if missing
+    C.value("execution.cost.max_bps", 4.0, float)
+"""
+from __future__ import annotations
+import json, os, threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from chamelefx.log import get_logger
+
+log = get_logger(__name__)
+
+CFG_PATH = Path(__file__).resolve().parents[1] / "config.json"
+
+
+class FrozenDict(dict):
+    """Read-only dict; still a dict so it serializes like one."""
+    def _ro(self, *a, **k):
+        raise TypeError("config view is read-only")
+    __setitem__ = __delitem__ = _ro
+    clear = pop = popitem = setdefault = update = _ro
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def thaw(self) -> Dict[str, Any]:
+        """Plain mutable deep copy."""
+        return thaw(self)
+
+
+_EMPTY = FrozenDict()
+
+
+def freeze(x: Any) -> Any:
+    if isinstance(x, dict):
+        return FrozenDict((k, freeze(v)) for k, v in x.items())
+    if isinstance(x, list):
+        return tuple(freeze(v) for v in x)
+    return x
+
+
+def thaw(x: Any) -> Any:
+    if isinstance(x, dict):
+        return {k: thaw(v) for k, v in x.items()}
+    if isinstance(x, tuple):
+        return [thaw(v) for v in x]
+    return x
+
+
+class ConfigService:
+    def __init__(self, path: Path = CFG_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._sig = None
+        self._cfg: FrozenDict = _EMPTY
+        self._version = 0
+        self._listeners: List[Callable[[FrozenDict], None]] = []
+
+    def _stat_sig(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def get(self) -> FrozenDict:
+        sig = self._stat_sig()
+        if sig == self._sig:
+            return self._cfg
+        with self._lock:
+            if sig == self._sig:
+                return self._cfg
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                cfg = freeze(raw if isinstance(raw, dict) else {})
+            except FileNotFoundError:
+                cfg = _EMPTY
+            except Exception:
+                # half-written file: keep serving the last good parse, retry next call
+                log.exception("config parse failed: %s", self.path)
+                return self._cfg
+            self._cfg = cfg
+            self._sig = sig
+            self._version += 1
+            listeners = list(self._listeners)
+        for cb in listeners:
+            try:
+                cb(cfg)
+            except Exception:
+                log.exception("config listener failed")
+        return cfg
+
+    @property
+    def version(self) -> int:
+        self.get()
+        return self._version
+
+    def on_change(self, cb: Callable[[FrozenDict], None]) -> Callable[[FrozenDict], None]:
+        """Register a reload callback (usable as a decorator)."""
+        with self._lock:
+            self._listeners.append(cb)
+        return cb
+
+    def section(self, *path: str) -> FrozenDict:
+        cur: Any = self.get()
+        for k in path:
+            cur = cur.get(k) if isinstance(cur, dict) else None
+            if cur is None:
+                return _EMPTY
+        return cur if isinstance(cur, dict) else _EMPTY
+
+    def value(self, dotted: str, default: Any = None, cast: Optional[Callable[[Any], Any]] = None) -> Any:
+        cur: Any = self.get()
+        for k in dotted.split("."):
+            if not isinstance(cur, dict) or k not in cur:
+                return default
+            cur = cur[k]
+        if cast is None or cur is None:
+            return cur
+        try:
+            return cast(cur)
+        except Exception:
+            return default
+
+
+_SERVICE = ConfigService()
+
+get = _SERVICE.get
+section = _SERVICE.section
+value = _SERVICE.value
+on_change = _SERVICE.on_change
+
+
+def version() -> int:
+    return _SERVICE.version
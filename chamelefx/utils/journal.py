@@ -0,0 +1,121 @@
+"""
+Append-only telemetry journal.
+
+Each writer appends one compact JSON line per event to ``<name>.jsonl`` next to
+its snapshot file (the JSON file the module used to rewrite on every event).
+Readers rebuild state as ``snapshot + replay(journal tail)`` and keep it
+resident, so after the first load only newly appended bytes are parsed.
+Every ``compact_every`` events (or ``compact_sec`` seconds) the current state
+is written back to the snapshot and the journal is truncated.
+"""
+from __future__ import annotations
+import json, os, threading, time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from chamelefx.log import get_logger
+from chamelefx.utils.atomic_json import read_json, write_json_atomic
+from chamelefx.utils.filelock import file_lock
+
+log = get_logger(__name__)
+
+OFFSET_KEY = "journal_offset"
+
+Reducer = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+
+class Journal:
+    def __init__(self, snapshot: Path, reducer: Reducer, default: Callable[[], Dict[str, Any]],
+                 compact_every: int = 1000, compact_sec: float = 300.0):
+        self.snapshot = Path(snapshot)
+        self.path = self.snapshot.with_suffix(".jsonl")
+        self.reducer = reducer
+        self.default = default
+        self.compact_every = max(1, int(compact_every))
+        self.compact_sec = float(compact_sec)
+        self._lock = threading.RLock()
+        self._state: Optional[Dict[str, Any]] = None
+        self._snap_sig = None
+        self._pos = 0
+        self._since_compact = 0
+        self._last_compact = time.time()
+
+    # ---- write side -------------------------------------------------------
+    def append(self, event: Dict[str, Any]) -> None:
+        """O(1): one line appended, no read of existing data."""
+        line = (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.path):
+                with open(self.path, "ab") as f:
+                    f.write(line)
+            self._since_compact += 1
+            if (self._since_compact >= self.compact_every
+                    or (time.time() - self._last_compact) >= self.compact_sec):
+                try:
+                    self.compact()
+                except Exception:
+                    log.exception("journal compaction failed: %s", self.path)
+
+    def compact(self) -> Dict[str, Any]:
+        """Fold the journal into the snapshot and truncate it."""
+        with self._lock, file_lock(self.path):
+            state = self._refresh()
+            end = self._pos
+            # 1) snapshot that already covers the whole journal
+            write_json_atomic(self.snapshot, {**state, OFFSET_KEY: end})
+            # 2) drop the folded events; a crash here leaves offset > size,
+            #    which _refresh() treats as "journal already truncated"
+            with open(self.path, "ab") as f:
+                f.truncate(0)
+            write_json_atomic(self.snapshot, {**state, OFFSET_KEY: 0})
+            self._snap_sig = self._sig(self.snapshot)
+            self._pos = 0
+            self._since_compact = 0
+            self._last_compact = time.time()
+            return state
+
+    # ---- read side --------------------------------------------------------
+    def load(self) -> Dict[str, Any]:
+        """Current state (snapshot + journal tail). Treat the result as read-only."""
+        with self._lock:
+            return self._refresh()
+
+    @staticmethod
+    def _sig(p: Path):
+        try:
+            st = p.stat()
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except Exception:
+            return None
+
+    def _refresh(self) -> Dict[str, Any]:
+        sig = self._sig(self.snapshot)
+        if self._state is None or sig != self._snap_sig:
+            snap = read_json(self.snapshot, None)
+            if not isinstance(snap, dict):
+                snap = self.default()
+            self._pos = int(snap.pop(OFFSET_KEY, 0) or 0)
+            self._state = snap
+            self._snap_sig = sig
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size < self._pos:
+            self._pos = 0
+        if size > self._pos:
+            with open(self.path, "rb") as f:
+                f.seek(self._pos)
+                chunk = f.read(size - self._pos)
+            # only consume complete lines; a concurrent writer may be mid-line
+            cut = chunk.rfind(b"\n") + 1
+            for raw in chunk[:cut].splitlines():
+                if not raw.strip():
+                    continue
+                try:
+                    self.reducer(self._state, json.loads(raw))
+                except Exception:
+                    log.exception("bad journal line in %s", self.path)
+            self._pos += cut
+        return self._state
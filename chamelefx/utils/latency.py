@@ -0,0 +1,181 @@
+"""
+Latency histograms for the execution hot path.
+
+``Histogram`` is HDR-style: values (recorded in seconds, stored as integer
+microseconds) go into log-linear buckets, 64 linear sub-buckets per power of
+two, so every reported quantile is within ~1.6% of the true value from 1µs up
+to hours, in a fixed 2k-slot array. Recording is a couple of integer ops under
+an uncontended lock.
+
+A process-wide registry keys histograms by (stage, venue, symbol):
+
+    from chamelefx.utils import latency
+    latency.record("risk.gate", dt, symbol="EURUSD")
+    with latency.timer("mt5.order_send", venue="MT5", symbol=sym): ...
+    latency.summary(by="stage")        # p50/p90/p99/max per stage
+    latency.quantile("mt5.order_send", 0.9, venue="MT5")   # seconds, or None
+"""
+from __future__ import annotations
+import threading, time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+_P = 7                      # 2**7 sub-buckets in the first (linear) range
+_M = 1 << _P
+_H = _M >> 1
+_EMAX = 36                  # up to 2**(36+7) µs
+_SLOTS = _M + _EMAX * _H
+
+
+def _index(us: int) -> int:
+    if us < _M:
+        return us
+    e = min(us.bit_length() - _P, _EMAX)
+    return _M + (e - 1) * _H + (min(us >> e, _M - 1) - _H)
+
+
+def _bounds() -> Tuple[np.ndarray, np.ndarray]:
+    lo = np.empty(_SLOTS); width = np.empty(_SLOTS)
+    lo[:_M] = np.arange(_M); width[:_M] = 1.0
+    for e in range(1, _EMAX + 1):
+        s = _M + (e - 1) * _H
+        lo[s:s + _H] = (np.arange(_H) + _H) * float(1 << e)
+        width[s:s + _H] = float(1 << e)
+    return lo, width
+
+_LO, _WIDTH = _bounds()
+_MID_MS = (_LO + (_WIDTH - 1.0) / 2.0) / 1000.0
+
+
+class Histogram:
+    __slots__ = ("counts", "n", "total", "lo", "hi", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * _SLOTS
+        self.n = 0
+        self.total = 0.0
+        self.lo = float("inf")
+        self.hi = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, sec: float) -> None:
+        us = int(sec * 1e6) if sec > 0 else 0
+        i = _index(us)
+        with self._lock:
+            self.counts[i] += 1
+            self.n += 1
+            self.total += sec
+            if sec > self.hi: self.hi = sec
+            if sec < self.lo: self.lo = sec
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        with other._lock:
+            c, n, t, lo, hi = list(other.counts), other.n, other.total, other.lo, other.hi
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, c)]
+            self.n += n; self.total += t
+            self.lo = min(self.lo, lo); self.hi = max(self.hi, hi)
+        return self
+
+    def quantiles(self, qs) -> List[float]:
+        """Quantiles in milliseconds (bucket midpoints, clamped to the observed min/max)."""
+        with self._lock:
+            c = np.asarray(self.counts, dtype=np.int64); n = self.n; lo, hi = self.lo, self.hi
+        if n == 0:
+            return [0.0 for _ in qs]
+        cum = np.cumsum(c)
+        ranks = np.maximum(1, np.ceil(np.asarray(qs, dtype=float) * n)).astype(np.int64)
+        idx = np.searchsorted(cum, ranks, side="left")
+        return [float(min(max(v, lo * 1000.0), hi * 1000.0)) for v in _MID_MS[idx]]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p90, p99, p999 = self.quantiles((0.5, 0.9, 0.99, 0.999))
+        return {"n": self.n, "p50": round(p50, 4), "p90": round(p90, 4), "p99": round(p99, 4),
+                "p999": round(p999, 4), "max": round(self.hi * 1000.0, 4),
+                "mean": round(self.total / self.n * 1000.0, 4) if self.n else 0.0}
+
+
+# ---- registry -----------------------------------------------------------------
+
+_REG: Dict[Tuple[str, str, str], Histogram] = {}
+_REG_LOCK = threading.Lock()
+
+
+def histogram(stage: str, venue: str = "", symbol: str = "") -> Histogram:
+    key = (stage, venue or "", symbol or "")
+    h = _REG.get(key)
+    if h is None:
+        with _REG_LOCK:
+            h = _REG.setdefault(key, Histogram())
+    return h
+
+
+def record(stage: str, sec: float, venue: str = "", symbol: str = "") -> None:
+    histogram(stage, venue, symbol).record(sec)
+
+
+@contextmanager
+def timer(stage: str, venue: str = "", symbol: str = "") -> Iterator[None]:
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(stage, venue, symbol).record(time.perf_counter() - t)
+
+
+def _select(stage=None, venue=None, symbol=None):
+    with _REG_LOCK:
+        items = list(_REG.items())
+    return [(k, h) for k, h in items
+            if (stage is None or k[0] == stage) and (venue is None or k[1] == venue)
+            and (symbol is None or k[2] == symbol)]
+
+
+def merged(stage: Optional[str] = None, venue: Optional[str] = None, symbol: Optional[str] = None) -> Histogram:
+    out = Histogram()
+    for _, h in _select(stage, venue, symbol):
+        out.merge(h)
+    return out
+
+
+def quantile(stage: str, q: float, venue: Optional[str] = None, symbol: Optional[str] = None,
+             min_n: int = 1) -> Optional[float]:
+    """
+    q-quantile in seconds over the matching histograms, or None with fewer than
+    min_n samples. An exact (stage, venue, symbol) key or a single match is read
+    in place; histograms are only merged when several match and have enough samples.
+    """
+    if venue is not None and symbol is not None:
+        h = _REG.get((stage, venue, symbol))
+        hs = [h] if h is not None else []
+    else:
+        hs = [h for _, h in _select(stage, venue, symbol)]
+    if sum(h.n for h in hs) < max(1, int(min_n)):
+        return None
+    h = hs[0] if len(hs) == 1 else merged(stage, venue, symbol)
+    return h.quantiles((q,))[0] / 1000.0
+
+
+def summary(stage: Optional[str] = None, venue: Optional[str] = None, symbol: Optional[str] = None,
+            by: str = "key") -> List[Dict[str, Any]]:
+    """
+    Rows with p50/p90/p99/max (ms). ``by`` = "key" (one row per stage/venue/symbol),
+    or "stage" / "venue" / "symbol" to merge the other dimensions.
+    """
+    dims = ("stage", "venue", "symbol")
+    groups: Dict[Tuple[str, ...], Histogram] = {}
+    for k, h in _select(stage, venue, symbol):
+        g = k if by == "key" else (k[0],) + ((k[dims.index(by)],) if by != "stage" else ())
+        groups.setdefault(g, Histogram()).merge(h)
+    rows = []
+    for g, h in sorted(groups.items()):
+        names = dims if by == "key" else (("stage",) if by == "stage" else ("stage", by))
+        rows.append({**dict(zip(names, g)), **h.snapshot()})
+    return rows
+
+
+def reset() -> None:
+    with _REG_LOCK:
+        _REG.clear()
@@ -0,0 +1,104 @@
+"""
+Fixed-capacity rolling window with O(1) updates.
+
+Values live in a preallocated ring buffer; count, mean and the sum of squared
+deviations (M2) are maintained with Welford's update on push and its inverse on
+eviction. M2 is recomputed exactly from the buffer once per ``cap`` updates to
+keep floating-point drift bounded (amortized O(1)).
+"""
+from __future__ import annotations
+import math
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class RollingWindow:
+    __slots__ = ("cap", "_buf", "_head", "n", "mean", "_m2", "_since_exact")
+
+    def __init__(self, cap: int, values: Optional[Iterable[float]] = None):
+        self.cap = max(1, int(cap))
+        self._buf = np.zeros(self.cap, dtype=np.float64)
+        self._head = 0              # next write slot
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._since_exact = 0
+        for v in (() if values is None else values):
+            self.push(v)
+
+    def push(self, x: float) -> Optional[float]:
+        """Append x; returns the evicted value once the window is full."""
+        x = float(x)
+        old = None
+        if self.n == self.cap:
+            old = float(self._buf[self._head])
+            # remove `old` (inverse Welford), then add x
+            n1 = self.n - 1
+            if n1 == 0:
+                self.mean = 0.0; self._m2 = 0.0
+            else:
+                d = old - self.mean
+                self.mean -= d / n1
+                self._m2 -= d * (old - self.mean)
+            self.n = n1
+        self._buf[self._head] = x
+        self._head = (self._head + 1) % self.cap
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self._m2 += d * (x - self.mean)
+        self._since_exact += 1
+        if self._since_exact >= self.cap:
+            self._exact()
+        return old
+
+    def _exact(self) -> None:
+        v = self.array()
+        self.mean = float(v.mean()) if v.size else 0.0
+        self._m2 = float(((v - self.mean) ** 2).sum()) if v.size else 0.0
+        self._since_exact = 0
+
+    @property
+    def m2(self) -> float:
+        return max(0.0, self._m2)
+
+    @property
+    def var(self) -> float:
+        """Population variance (statistics.pvariance)."""
+        return self.m2 / self.n if self.n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    @property
+    def snr(self) -> float:
+        return abs(self.mean) / (self.std + 1e-12)
+
+    def moments(self) -> Tuple[int, float, float]:
+        """(n, mean, M2) for combining with other samples."""
+        return self.n, self.mean, self.m2
+
+    def array(self) -> np.ndarray:
+        """Window contents, oldest first (copy)."""
+        if self.n < self.cap:
+            return self._buf[:self.n].copy()
+        return np.concatenate((self._buf[self._head:], self._buf[:self._head]))
+
+    def values(self) -> List[float]:
+        return self.array().tolist()
+
+    def last(self, default: Optional[float] = None) -> Optional[float]:
+        return float(self._buf[(self._head - 1) % self.cap]) if self.n else default
+
+    def resize(self, cap: int) -> None:
+        """Change capacity, keeping the newest values (O(window), rare)."""
+        cap = max(1, int(cap))
+        if cap == self.cap:
+            return
+        keep = self.array()[-cap:]
+        self.__init__(cap, keep)
+
+    def __len__(self) -> int:
+        return self.n
@@ -0,0 +1,118 @@
+"""
+Merging t-digest (Dunning) for streaming quantiles.
+
+Points are buffered and folded into at most ~``delta`` centroids using the k1
+scale function, which keeps clusters small near the tails so p95/p99 stay
+accurate. Digests are mergeable (``merge``) and serialize to a flat
+``[mean, weight, ...]`` list. While every centroid still holds a single point
+(small samples) quantiles are exact nearest-rank values, ``a[int(q*n)]``.
+"""
+from __future__ import annotations
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class TDigest:
+    __slots__ = ("delta", "_m", "_w", "_bx", "_bw", "n", "lo", "hi")
+
+    def __init__(self, delta: float = 100.0):
+        self.delta = float(delta)
+        self._m = np.empty(0, dtype=np.float64)   # centroid means, sorted
+        self._w = np.empty(0, dtype=np.float64)   # centroid weights
+        self._bx: List[float] = []
+        self._bw: List[float] = []
+        self.n = 0.0
+        self.lo = math.inf
+        self.hi = -math.inf
+
+    # ---- updates -----------------------------------------------------------
+    def add(self, x: float, w: float = 1.0) -> None:
+        x = float(x)
+        self._bx.append(x); self._bw.append(float(w))
+        self.n += w
+        if x < self.lo: self.lo = x
+        if x > self.hi: self.hi = x
+        if len(self._bx) >= 5 * self.delta:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        other._compress()
+        self._bx.extend(other._m.tolist()); self._bw.extend(other._w.tolist())
+        self.n += other.n
+        self.lo = min(self.lo, other.lo); self.hi = max(self.hi, other.hi)
+        self._compress()
+        return self
+
+    def _k(self, q: float) -> float:
+        return self.delta / (2.0 * math.pi) * math.asin(2.0 * min(1.0, max(0.0, q)) - 1.0)
+
+    def _compress(self) -> None:
+        if not self._bx:
+            return
+        m = np.concatenate((self._m, np.asarray(self._bx)))
+        w = np.concatenate((self._w, np.asarray(self._bw)))
+        self._bx, self._bw = [], []
+        order = np.argsort(m, kind="stable")
+        m, w = m[order].tolist(), w[order].tolist()
+        total = sum(w)
+        out_m: List[float] = []; out_w: List[float] = []
+        cm, cw = m[0], w[0]
+        q0 = 0.0
+        k_lo = self._k(q0)
+        for x, wx in zip(m[1:], w[1:]):
+            if self._k((q0 + cw + wx) / total) - k_lo <= 1.0:
+                cm += (x - cm) * wx / (cw + wx)
+                cw += wx
+            else:
+                out_m.append(cm); out_w.append(cw)
+                q0 += cw
+                k_lo = self._k(q0 / total)
+                cm, cw = x, wx
+        out_m.append(cm); out_w.append(cw)
+        self._m = np.asarray(out_m); self._w = np.asarray(out_w)
+
+    # ---- queries -----------------------------------------------------------
+    def quantile(self, q: float) -> float:
+        self._compress()
+        k = self._m.size
+        if k == 0:
+            return 0.0
+        q = min(1.0, max(0.0, float(q)))
+        if k == int(round(self.n)) and np.all(self._w == 1.0):
+            return float(self._m[min(k - 1, int(q * k))])
+        if k == 1:
+            return float(self._m[0])
+        t = q * self.n
+        mid = np.cumsum(self._w) - self._w / 2.0
+        if t <= mid[0]:
+            return float(self.lo + (self._m[0] - self.lo) * (t / mid[0] if mid[0] > 0 else 1.0))
+        if t >= mid[-1]:
+            span = self.n - mid[-1]
+            return float(self._m[-1] + (self.hi - self._m[-1]) * ((t - mid[-1]) / span if span > 0 else 0.0))
+        i = int(np.searchsorted(mid, t, side="right")) - 1
+        f = (t - mid[i]) / (mid[i + 1] - mid[i])
+        return float(self._m[i] + (self._m[i + 1] - self._m[i]) * f)
+
+    def __len__(self) -> int:
+        return int(self.n)
+
+    # ---- (de)serialization ----------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        flat = np.column_stack((self._m, self._w)).ravel()
+        return {"d": self.delta, "n": self.n, "lo": self.lo if self.n else None, "hi": self.hi if self.n else None,
+                "c": [round(v, 6) for v in flat.tolist()]}
+
+    @classmethod
+    def from_dict(cls, d: Optional[Dict[str, Any]]) -> "TDigest":
+        t = cls(float((d or {}).get("d", 100.0)))
+        if not d:
+            return t
+        c = np.asarray(d.get("c") or [], dtype=np.float64).reshape(-1, 2)
+        t._m, t._w = c[:, 0].copy(), c[:, 1].copy()
+        t.n = float(d.get("n", t._w.sum()))
+        if d.get("lo") is not None: t.lo = float(d["lo"])
+        if d.get("hi") is not None: t.hi = float(d["hi"])
+        return t
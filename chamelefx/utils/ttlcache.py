@@ -1,22 +1,229 @@
+"""
+Thread-safe LRU + TTL cache with single-flight loading.
+
+    cache = TTLCache(ttl_seconds=2.0, max_items=512, name="perf.summary")
+    cache.get(key, fn)                  # sync; fn() runs once per key however many callers miss
+    await cache.aget(key, fn)           # async; fn may return an awaitable
+    cache.set(key, value, ttl=30.0)     # per-key TTL
+
+    @cached(ttl=2.0)
+    def summary_all(): ...
+    summary_all.cache_clear()           # e.g. after a write
+
+Eviction is O(1) (least recently used first), entries expire individually,
+and concurrent misses on a key are coalesced: one caller computes, the others
+(sync or async) wait for its result or exception. Every cache is listed in a
+process-wide registry so ``stats_all()`` can report hit/miss/eviction counts.
+"""
 from __future__ import annotations
-import time
-from typing import Any, Callable, Tuple, Dict
+import asyncio, functools, inspect, itertools, threading, time, weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+WAIT_SEC = 60.0         # how long a coalesced caller waits before computing itself
+
+_MISS = object()
+_seq = itertools.count(1)
+_REGISTRY: "weakref.WeakValueDictionary[str, TTLCache]" = weakref.WeakValueDictionary()
+_REG_LOCK = threading.Lock()
+
+
+class _Flight:
+    __slots__ = ("ev", "val", "exc", "waiters")
+
+    def __init__(self):
+        self.ev = threading.Event()
+        self.val: Any = None
+        self.exc: Optional[BaseException] = None
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def result(self) -> Any:
+        if self.exc is not None:
+            raise self.exc
+        return self.val
+
+
+def _resolve(fut: asyncio.Future, val: Any, exc: Optional[BaseException]) -> None:
+    if not fut.done():
+        fut.set_exception(exc) if exc is not None else fut.set_result(val)
+
 
 class TTLCache:
-    def __init__(self, ttl_seconds: float = 2.0, max_items: int = 512):
+    def __init__(self, ttl_seconds: float = 2.0, max_items: int = 512, name: Optional[str] = None):
         self.ttl = float(ttl_seconds)
-        self.max = int(max_items)
-        self._d: Dict[Any, Tuple[float, Any]] = {}
-
-    def get(self, key: Any, fn: Callable[[], Any]):
-        now = time.time()
-        v = self._d.get(key)
-        if v is not None:
-            ts, val = v
-            if (now - ts) <= self.ttl:
-                return val
-        val = fn()
-        if len(self._d) >= self.max:
+        self.max = max(1, int(max_items))
+        self._d: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()   # key -> (expires_at, value)
+        self._inflight: Dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = self.coalesced = self.errors = 0
+        with _REG_LOCK:
+            n = name or f"cache-{next(_seq)}"
+            if n in _REGISTRY:
+                n = f"{n}#{next(_seq)}"
+            self.name = n
+            _REGISTRY[n] = self
+
+    # -- plain access --
+    def _lookup(self, key: Any, now: float) -> Any:
+        """Fresh value or _MISS; caller holds the lock."""
+        e = self._d.get(key)
+        if e is None:
+            return _MISS
+        if e[0] < now:
+            del self._d[key]
+            self.expired += 1
+            return _MISS
+        self._d.move_to_end(key)
+        return e[1]
+
+    def _store(self, key: Any, val: Any, ttl: Optional[float]) -> None:
+        self._d[key] = (time.monotonic() + (self.ttl if ttl is None else float(ttl)), val)
+        self._d.move_to_end(key)
+        while len(self._d) > self.max:
+            self._d.popitem(last=False)
+            self.evictions += 1
+
+    def peek(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            v = self._lookup(key, time.monotonic())
+        return default if v is _MISS else v
+
+    def set(self, key: Any, val: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, val, ttl)
+
+    def invalidate(self, key: Any) -> bool:
+        with self._lock:
+            return self._d.pop(key, _MISS) is not _MISS
+
+    def clear(self) -> None:
+        with self._lock:
             self._d.clear()
-        self._d[key] = (now, val)
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.peek(key, _MISS) is not _MISS
+
+    # -- single-flight loading --
+    def _begin(self, key: Any):
+        """(value, None, False) on a hit, else (None, flight, leader)."""
+        with self._lock:
+            v = self._lookup(key, time.monotonic())
+            if v is not _MISS:
+                self.hits += 1
+                return v, None, False
+            self.misses += 1
+            fl = self._inflight.get(key)
+            if fl is not None:
+                self.coalesced += 1
+                return None, fl, False
+            fl = self._inflight[key] = _Flight()
+            return None, fl, True
+
+    def _finish(self, key: Any, fl: _Flight, val: Any, exc: Optional[BaseException], ttl: Optional[float]) -> None:
+        with self._lock:
+            if exc is None:
+                self._store(key, val, ttl)
+            else:
+                self.errors += 1
+            if self._inflight.get(key) is fl:
+                del self._inflight[key]
+            fl.val, fl.exc = val, exc
+            waiters, fl.waiters = fl.waiters, []
+        fl.ev.set()
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, fut, val, exc)
+            except RuntimeError:
+                pass                                    # waiter's loop is closed
+
+    def get(self, key: Any, fn: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Cached value for ``key``, computing it with ``fn()`` on a miss (once across threads)."""
+        v, fl, leader = self._begin(key)
+        if fl is None:
+            return v
+        if not leader:
+            if fl.ev.wait(WAIT_SEC):
+                return fl.result()
+            return fn()
+        try:
+            val = fn()
+        except BaseException as e:
+            self._finish(key, fl, None, e, ttl)
+            raise
+        self._finish(key, fl, val, None, ttl)
+        return val
+
+    async def aget(self, key: Any, fn: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Async ``get``: ``fn()`` may return a value or an awaitable; waiters don't block the loop."""
+        v, fl, leader = self._begin(key)
+        if fl is None:
+            return v
+        if not leader:
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            with self._lock:
+                done = fl.ev.is_set()
+                if not done:
+                    fl.waiters.append((loop, fut))
+            if done:
+                return fl.result()
+            try:
+                return await asyncio.wait_for(asyncio.shield(fut), WAIT_SEC)
+            except asyncio.TimeoutError:
+                val = fn()
+                return (await val) if inspect.isawaitable(val) else val
+        try:
+            val = fn()
+            if inspect.isawaitable(val):
+                val = await val
+        except BaseException as e:
+            self._finish(key, fl, None, e, ttl)
+            raise
+        self._finish(key, fl, val, None, ttl)
         return val
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self.hits + self.misses
+            return {"name": self.name, "size": len(self._d), "max_items": self.max, "ttl_sec": self.ttl,
+                    "hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / n, 6) if n else 0.0,
+                    "evictions": self.evictions, "expired": self.expired,
+                    "coalesced": self.coalesced, "errors": self.errors, "inflight": len(self._inflight)}
+
+
+def _make_key(args: tuple, kwargs: dict) -> Hashable:
+    return (args, tuple(sorted(kwargs.items()))) if kwargs else args
+
+
+def cached(ttl: float = 2.0, max_items: int = 512, name: Optional[str] = None,
+           key: Optional[Callable[..., Hashable]] = None):
+    """Memoize a sync or async function in a TTLCache (``fn.cache``, ``fn.cache_clear()``)."""
+    def deco(fn):
+        cache = TTLCache(ttl, max_items, name or f"{fn.__module__}.{fn.__qualname__}")
+        kf = key or (lambda *a, **k: _make_key(a, k))
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*a, **k):
+                return await cache.aget(kf(*a, **k), lambda: fn(*a, **k))
+        else:
+            @functools.wraps(fn)
+            def wrapper(*a, **k):
+                return cache.get(kf(*a, **k), lambda: fn(*a, **k))
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return deco
+
+
+def registry() -> Dict[str, TTLCache]:
+    with _REG_LOCK:
+        return dict(_REGISTRY)
+
+
+def stats_all() -> Dict[str, Any]:
+    caches = registry()
+    return {"ok": True, "caches": [caches[k].stats() for k in sorted(caches)], "ts": time.time()}
@@ -4,6 +4,8 @@ from __future__ import annotations
 import os, time, math, json, statistics as st
 from typing import List, Dict, Any, Callable, Tuple
 
+import numpy as np
+
 try:
     from chamelefx.audit_writer import log as audit_log
 except Exception:
@@ -88,6 +90,141 @@ class Backtester:
         self.balance=bal
         return {"balance":self.balance,"trades":self.history,"equity":self.equity}
 
+    def run_vectorized(self, prices, signals, lots=0.1, sl=None, tp=None):
+        """
+        Array form of run() for signal-array strategies: signals[i] > 0 buys and
+        < 0 sells at prices[i]; lots/sl/tp are scalars or per-tick arrays (sl/tp are
+        absolute price levels, NaN/0 = none). Same fills, exits and output as run().
+        """
+        return _run_vectorized(self, prices, signals, lots=lots, sl=sl, tp=tp)
+
+# ---- vectorized engine -------------------------------------------------------
+
+_BLOCK = 256            # ticks per block for the first-exit search
+_CHUNK_CELLS = 1 << 22  # entries*_BLOCK cells evaluated per NumPy call (~32 MB of float64)
+
+def _levels(p: np.ndarray):
+    """Per-block min/max sparse tables: tab[k][b] covers blocks [b, b+2**k). NaN ticks are ignored."""
+    n = p.size
+    nb = -(-n // _BLOCK)
+    pad = nb * _BLOCK - n
+    pmin = np.concatenate([p, np.full(pad, np.inf)]).reshape(nb, _BLOCK)
+    pmin = np.fmin.reduce(pmin, axis=1)
+    pmax = np.concatenate([p, np.full(pad, -np.inf)]).reshape(nb, _BLOCK)
+    pmax = np.fmax.reduce(pmax, axis=1)
+    mins, maxs = [pmin], [pmax]
+    k = 1
+    while (1 << k) <= nb:
+        h = 1 << (k - 1)
+        mins.append(np.minimum(mins[-1][:-h], mins[-1][h:]))
+        maxs.append(np.maximum(maxs[-1][:-h], maxs[-1][h:]))
+        k += 1
+    return nb, mins, maxs
+
+def _scan(p: np.ndarray, first: np.ndarray, stop: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """First j in [first, stop) with p[j] <= lo or p[j] >= hi, row-wise; -1 if none. stop-first <= _BLOCK."""
+    out = np.full(first.size, -1, dtype=np.int64)
+    rows = max(1, _CHUNK_CELLS // _BLOCK)
+    off = np.arange(_BLOCK)
+    for a in range(0, first.size, rows):
+        f = first[a:a+rows]; e = stop[a:a+rows]
+        idx = f[:, None] + off
+        ok = idx < e[:, None]
+        w = p[np.minimum(idx, p.size - 1)]
+        hit = ok & ((w <= lo[a:a+rows, None]) | (w >= hi[a:a+rows, None]))
+        j = hit.argmax(axis=1)
+        found = hit[np.arange(j.size), j]
+        out[a:a+rows] = np.where(found, f + j, -1)
+    return out
+
+def _first_exit(p: np.ndarray, start: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    For each entry, index of the first tick >= start where price leaves (lo, hi).
+    Rest of the entry's own block is scanned directly; the first later block that
+    contains a crossing is found by binary lifting over block min/max tables, then
+    scanned. Cost is O(entries * (_BLOCK + log n)) independent of holding time.
+    """
+    n = p.size
+    out = np.full(start.size, -1, dtype=np.int64)
+    if start.size == 0 or n == 0:
+        return out
+    blk_end = np.minimum((start // _BLOCK + 1) * _BLOCK, n)
+    out[:] = _scan(p, start, blk_end, lo, hi)
+    todo = np.flatnonzero(out < 0)
+    if todo.size == 0:
+        return out
+    nb, mins, maxs = _levels(p)
+    cur = start[todo] // _BLOCK + 1
+    tlo, thi = lo[todo], hi[todo]
+    for k in range(len(mins) - 1, -1, -1):
+        span = 1 << k
+        can = cur + span <= nb
+        c = np.minimum(cur, mins[k].size - 1)
+        clear = can & (mins[k][c] > tlo) & (maxs[k][c] < thi)
+        cur = np.where(clear, cur + span, cur)
+    has = cur < nb
+    if has.any():
+        b = cur[has]
+        out[todo[has]] = _scan(p, b * _BLOCK, np.minimum(b * _BLOCK + _BLOCK, n), tlo[has], thi[has])
+    return out
+
+def _per_tick(x, n: int, fill: float) -> np.ndarray:
+    if x is None:
+        return np.full(n, fill)
+    a = np.asarray(x, dtype=float)
+    return np.full(n, float(a)) if a.ndim == 0 else a
+
+def _run_vectorized(bt: "Backtester", prices, signals, lots=0.1, sl=None, tp=None) -> Dict[str, Any]:
+    p = np.ascontiguousarray(prices, dtype=float)
+    n = p.size
+    sig = np.asarray(signals, dtype=float)
+    if sig.shape != p.shape:
+        raise ValueError("signals must have the same length as prices")
+    ent = np.flatnonzero(sig != 0)
+    buy = sig[ent] > 0
+    lot = _per_tick(lots, n, 0.1)[ent]
+    sl_e = _per_tick(sl, n, np.nan)[ent]
+    tp_e = _per_tick(tp, n, np.nan)[ent]
+    # `if self.sl` semantics: 0/None/NaN mean "no level"
+    sl_e = np.where(sl_e == 0, np.nan, sl_e); tp_e = np.where(tp_e == 0, np.nan, tp_e)
+
+    fill = p[ent] + np.where(buy, bt.spread, -bt.spread)
+    if bt.slippage:
+        fill = fill + np.where(buy, bt.slippage, -bt.slippage)
+
+    # exit band: leave when price <= lo or >= hi (sl/tp swap sides for sells)
+    lo = np.where(buy, sl_e, tp_e); hi = np.where(buy, tp_e, sl_e)
+    lo = np.where(np.isnan(lo), -np.inf, lo); hi = np.where(np.isnan(hi), np.inf, hi)
+    ex = np.full(ent.size, -1, dtype=np.int64)
+    armed = np.flatnonzero(np.isfinite(lo) | np.isfinite(hi))
+    ex[armed] = _first_exit(p, ent[armed], lo[armed], hi[armed])
+
+    done = np.flatnonzero(ex >= 0)
+    done = done[np.lexsort((ent[done], ex[done]))]   # same order the tick loop closes them
+    xb, xi = buy[done], ex[done]
+    xpx = p[xi]; xin = fill[done]; xl = lot[done]; xsl = sl_e[done]
+    pnl = np.where(xb, xpx - xin, xin - xpx) * xl * bt.point_value
+    # sl check wins when both levels are crossed on the same tick, as in Trade.check_exit
+    reason = np.where(xb, np.where(xpx <= lo[done], "sl", "tp"), np.where(xpx >= hi[done], "sl", "tp"))
+    has_r = ~np.isnan(xsl) & (xin != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rv = pnl / np.maximum(1e-9, np.abs(xin - xsl) * bt.point_value * xl)
+
+    deltas = np.bincount(xi, weights=pnl - bt.commission, minlength=n) if n else np.zeros(0)
+    eq = bt.balance + np.cumsum(deltas)
+
+    trades = [
+        {"symbol": bt.symbol, "side": "buy" if b else "sell", "entry": e, "exit": x, "lots": l,
+         "pnl": q, "reason": rs, "r": (r if hr else None), "commission": -bt.commission}
+        for b, e, x, l, q, rs, r, hr in zip(xb.tolist(), xin.tolist(), xpx.tolist(), xl.tolist(),
+                                           pnl.tolist(), reason.tolist(), rv.tolist(), has_r.tolist())
+    ]
+    bt.history.extend(trades)
+    bt.equity.extend(eq.tolist())
+    bt.balance = float(eq[-1]) if n else bt.balance
+    audit_log("backtest", "vectorized", {"symbol": bt.symbol, "ticks": int(n), "entries": int(ent.size), "exits": len(trades)})
+    return {"balance": bt.balance, "trades": bt.history, "equity": bt.equity}
+
 def metrics(summary:dict)->dict:
     eq=_safe(summary.get("equity",[]))
     tr=summary.get("trades",[])